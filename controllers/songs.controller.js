@@ -3,7 +3,7 @@ const { Op, Sequelize } = require("sequelize");
 const youtubedl = require("youtube-dl-exec");
 const fs = require("fs");
 const path = require("path");
-const { spawn } = require("child_process");
+const { spawnPythonStage } = require("../utils/pythonStage");
 const cloudinary = require("cloudinary").v2;
 const multer = require("multer");
 
@@ -132,6 +132,37 @@ async function downloadYouTubeAudio(youtubeUrl, outputPath) {
   });
 }
 
+// 진행 중인 Demucs 분리 수 (이 값 이상이면 auto 요청은 빠른 분리로 전환)
+let activeDemucsSeparations = 0;
+const FAST_SEPARATION_THRESHOLD = parseInt(
+  process.env.FAST_SEPARATION_THRESHOLD || "2",
+  10
+);
+
+// 요청별 분리 방식: "enhanced" | "fast" | "auto"(기본, 대기열 상태에 따라 선택)
+function chooseSeparationMode(requestedMode = "auto") {
+  if (requestedMode === "enhanced" || requestedMode === "fast") {
+    return requestedMode;
+  }
+  if (activeDemucsSeparations >= FAST_SEPARATION_THRESHOLD) {
+    console.log(
+      `⚡ Demucs 분리 ${activeDemucsSeparations}개 진행 중, 빠른 분리로 전환`
+    );
+    return "fast";
+  }
+  return "enhanced";
+}
+
+// Demucs 분리 실행 동안 진행 중 개수 집계
+async function trackDemucsSeparation(separate) {
+  activeDemucsSeparations += 1;
+  try {
+    return await separate();
+  } finally {
+    activeDemucsSeparations -= 1;
+  }
+}
+
 // 기타 음원 분리 함수
 async function separateGuitar(inputAudioPath, outputGuitarPath) {
   return new Promise((resolve) => {
@@ -142,7 +173,7 @@ async function separateGuitar(inputAudioPath, outputGuitarPath) {
     console.log(`📥 입력: ${inputAudioPath}`);
     console.log(`📤 출력: ${outputGuitarPath}`);
 
-    const pythonProcess = spawn(
+    const pythonProcess = spawnPythonStage(
       pythonEnvPath,
       [scriptPath, inputAudioPath, outputGuitarPath],
       {
@@ -272,6 +303,97 @@ async function convertToMidi(inputGuitarPath, outputMidiPath) {
   });
 }
 
+// 멀티 버전 MIDI 변환 (Basic Pitch 1회 실행 → Tabify 호환 → 향상된 → 최적화 → 기본 순으로 후처리)
+async function tryMultiVariantMidiConversion(
+  inputGuitarPath,
+  outputMidiPath,
+  pythonEnvPath
+) {
+  return new Promise((resolve) => {
+    const scriptPath = path.join(
+      __dirname,
+      "../scripts/midi_conversion_multi.py"
+    );
+    const reportPath = `${outputMidiPath}.json`;
+
+    console.log(`🎼 멀티 버전 MIDI 변환 실행: ${scriptPath}`);
+
+    const pythonProcess = spawnPythonStage(
+      pythonEnvPath,
+      [scriptPath, inputGuitarPath, outputMidiPath, "first", reportPath],
+      {
+        stdio: ["pipe", "pipe", "pipe"],
+      }
+    );
+
+    let stdout = "";
+    let stderr = "";
+
+    pythonProcess.stdout.on("data", (data) => {
+      const output = data.toString();
+      stdout += output;
+      console.log(`🎼 ${output.trim()}`);
+    });
+
+    pythonProcess.stderr.on("data", (data) => {
+      const error = data.toString();
+      stderr += error;
+      console.error(`🎼 ERROR: ${error.trim()}`);
+    });
+
+    pythonProcess.on("close", (code) => {
+      // 어떤 버전이 성공했는지와 단계별 시간은 리포트 파일에서 확인
+      let report = null;
+      try {
+        report = JSON.parse(fs.readFileSync(reportPath, "utf8"));
+        fs.unlinkSync(reportPath);
+      } catch (error) {
+        report = null;
+      }
+
+      if (code === 0 && fs.existsSync(outputMidiPath)) {
+        console.log(
+          `✅ 멀티 버전 MIDI 변환 완료 (${report ? report.variant : "unknown"})`
+        );
+        const stats = fs.statSync(outputMidiPath);
+        resolve({
+          success: true,
+          output_path: outputMidiPath,
+          file_size_mb: (stats.size / (1024 * 1024)).toFixed(2),
+          conversion_type: report ? report.variant : null,
+          timings: report ? report.timings : null,
+          stdout: stdout,
+          stderr: stderr,
+        });
+      } else {
+        console.error(`❌ 멀티 버전 MIDI 변환 실패 (종료 코드: ${code})`);
+        resolve({
+          success: false,
+          error: `멀티 버전 MIDI 변환 실패 (코드: ${code})`,
+          timings: report ? report.timings : null,
+          stdout: stdout,
+          stderr: stderr,
+        });
+      }
+    });
+
+    pythonProcess.on("error", (error) => {
+      console.error(`❌ Python 프로세스 오류:`, error);
+      resolve({
+        success: false,
+        error: error.message,
+        stdout: stdout,
+        stderr: stderr,
+      });
+    });
+  });
+}
+
+// 이 크기(MB) 이상인 기타 스템은 Tabify 변환을 스트리밍으로 실행 (곡 전체 활성화를 메모리에 올리지 않음)
+const TABIFY_STREAM_MIN_MB = parseFloat(
+  process.env.TABIFY_STREAM_MIN_MB || "50"
+);
+
 // Tabify 호환 MIDI 변환 시도
 async function tryTabifyCompatibleMidiConversion(
   inputGuitarPath,
@@ -283,12 +405,18 @@ async function tryTabifyCompatibleMidiConversion(
       __dirname,
       "../scripts/midi_conversion_tabify_compatible.py"
     );
+    const inputSizeMb = fs.existsSync(inputGuitarPath)
+      ? fs.statSync(inputGuitarPath).size / (1024 * 1024)
+      : 0;
+    const streamArgs = inputSizeMb >= TABIFY_STREAM_MIN_MB ? ["--stream"] : [];
 
-    console.log(`🎸 Tabify 호환 MIDI 변환 실행: ${scriptPath}`);
+    console.log(
+      `🎸 Tabify 호환 MIDI 변환 실행: ${scriptPath}${streamArgs.length ? " (스트리밍)" : ""}`
+    );
 
-    const pythonProcess = spawn(
+    const pythonProcess = spawnPythonStage(
       pythonEnvPath,
-      [scriptPath, inputGuitarPath, outputMidiPath],
+      [scriptPath, inputGuitarPath, outputMidiPath, ...streamArgs],
       {
         stdio: ["pipe", "pipe", "pipe"],
       }
@@ -380,7 +508,7 @@ async function tryEnhancedMidiConversion(
     console.log(`📥 입력: ${inputGuitarPath}`);
     console.log(`📤 출력: ${outputMidiPath}`);
 
-    const pythonProcess = spawn(
+    const pythonProcess = spawnPythonStage(
       pythonEnvPath,
       [scriptPath, inputGuitarPath, outputMidiPath],
       {
@@ -470,7 +598,7 @@ async function tryOptimizedMidiConversion(
 
     console.log(`🎸 기타 최적화 MIDI 변환 실행: ${scriptPath}`);
 
-    const pythonProcess = spawn(
+    const pythonProcess = spawnPythonStage(
       pythonEnvPath,
       [scriptPath, inputGuitarPath, outputMidiPath],
       {
@@ -557,7 +685,7 @@ async function tryBasicMidiConversion(
 
     console.log(`🐍 기본 MIDI 변환 실행: ${scriptPath}`);
 
-    const pythonProcess = spawn(
+    const pythonProcess = spawnPythonStage(
       pythonEnvPath,
       [scriptPath, inputGuitarPath, outputMidiPath],
       {
@@ -649,7 +777,7 @@ async function separateGuitarStem(
     console.log(`📥 입력: ${inputAudioPath}`);
     console.log(`📤 출력: ${outputGuitarPath}`);
 
-    const pythonProcess = spawn(
+    const pythonProcess = spawnPythonStage(
       pythonEnvPath,
       [scriptPath, inputAudioPath, outputGuitarPath],
       {
@@ -739,7 +867,7 @@ async function separateGuitarEnhanced(inputAudioPath, outputGuitarPath) {
     console.log(`📥 입력: ${inputAudioPath}`);
     console.log(`📤 출력: ${outputGuitarPath}`);
 
-    const pythonProcess = spawn(
+    const pythonProcess = spawnPythonStage(
       pythonEnvPath,
       [scriptPath, inputAudioPath, outputGuitarPath],
       {
@@ -815,6 +943,146 @@ async function separateGuitarEnhanced(inputAudioPath, outputGuitarPath) {
   });
 }
 
+// 빠른 기타 분리 함수 (Demucs 없음, 미리보기/과부하 시 사용)
+async function separateGuitarFast(
+  inputAudioPath,
+  outputGuitarPath,
+  pythonEnvPath = path.join(__dirname, "../audio_env_39/bin/python3")
+) {
+  return new Promise((resolve) => {
+    const scriptPath = path.join(
+      __dirname,
+      "../scripts/guitar_separation_fast.py"
+    );
+
+    console.log(`⚡ 빠른 기타 분리 실행: ${scriptPath}`);
+    console.log(`📥 입력: ${inputAudioPath}`);
+    console.log(`📤 출력: ${outputGuitarPath}`);
+
+    const pythonProcess = spawnPythonStage(
+      pythonEnvPath,
+      [scriptPath, inputAudioPath, outputGuitarPath],
+      {
+        stdio: ["pipe", "pipe", "pipe"],
+      }
+    );
+
+    let stdout = "";
+    let stderr = "";
+
+    pythonProcess.stdout.on("data", (data) => {
+      const output = data.toString();
+      stdout += output;
+      console.log(`🐍 ${output.trim()}`);
+    });
+
+    pythonProcess.stderr.on("data", (data) => {
+      const error = data.toString();
+      stderr += error;
+      console.error(`🐍 ERROR: ${error.trim()}`);
+    });
+
+    pythonProcess.on("close", (code) => {
+      if (code === 0 && fs.existsSync(outputGuitarPath)) {
+        console.log("✅ 빠른 기타 분리 완료");
+        const stats = fs.statSync(outputGuitarPath);
+        resolve({
+          success: true,
+          output_path: outputGuitarPath,
+          file_size_mb: (stats.size / (1024 * 1024)).toFixed(2),
+          stdout: stdout,
+          fast: true,
+        });
+      } else {
+        console.error(`❌ 빠른 기타 분리 실패 코드: ${code}`);
+        resolve({
+          success: false,
+          error: `빠른 기타 분리 실패 (코드: ${code})`,
+          stdout: stdout,
+          stderr: stderr,
+        });
+      }
+    });
+
+    pythonProcess.on("error", (error) => {
+      console.error(`❌ Python 프로세스 오류:`, error);
+      resolve({
+        success: false,
+        error: error.message,
+        stdout: stdout,
+        stderr: stderr,
+      });
+    });
+  });
+}
+
+// 내부 float16 스템(.stem) → PCM_16 WAV (API 응답으로 내보내는 기타 오디오용)
+async function exportStemWav(
+  inputStemPath,
+  outputWavPath,
+  pythonEnvPath = path.join(__dirname, "../audio_env_39/bin/python3")
+) {
+  return new Promise((resolve) => {
+    const scriptPath = path.join(__dirname, "../scripts/stem_format.py");
+
+    console.log(`💾 스템 WAV 변환 실행: ${scriptPath}`);
+    console.log(`📥 입력: ${inputStemPath}`);
+    console.log(`📤 출력: ${outputWavPath}`);
+
+    const pythonProcess = spawnPythonStage(
+      pythonEnvPath,
+      [scriptPath, inputStemPath, outputWavPath],
+      {
+        stdio: ["pipe", "pipe", "pipe"],
+      }
+    );
+
+    let stdout = "";
+    let stderr = "";
+
+    pythonProcess.stdout.on("data", (data) => {
+      const output = data.toString();
+      stdout += output;
+      console.log(`🐍 ${output.trim()}`);
+    });
+
+    pythonProcess.stderr.on("data", (data) => {
+      const error = data.toString();
+      stderr += error;
+      console.error(`🐍 ERROR: ${error.trim()}`);
+    });
+
+    pythonProcess.on("close", (code) => {
+      if (code === 0 && fs.existsSync(outputWavPath)) {
+        console.log("✅ 스템 WAV 변환 완료");
+        resolve({
+          success: true,
+          output_path: outputWavPath,
+          stdout: stdout,
+        });
+      } else {
+        console.error(`❌ 스템 WAV 변환 실패 코드: ${code}`);
+        resolve({
+          success: false,
+          error: `스템 WAV 변환 실패 (코드: ${code})`,
+          stdout: stdout,
+          stderr: stderr,
+        });
+      }
+    });
+
+    pythonProcess.on("error", (error) => {
+      console.error(`❌ Python 프로세스 오류:`, error);
+      resolve({
+        success: false,
+        error: error.message,
+        stdout: stdout,
+        stderr: stderr,
+      });
+    });
+  });
+}
+
 // 모노포닉 MIDI 변환 함수
 async function convertToMonophonicMidi(inputGuitarPath, outputMidiPath) {
   return new Promise((resolve) => {
@@ -828,7 +1096,7 @@ async function convertToMonophonicMidi(inputGuitarPath, outputMidiPath) {
     console.log(`📥 입력: ${inputGuitarPath}`);
     console.log(`📤 출력: ${outputMidiPath}`);
 
-    const pythonProcess = spawn(
+    const pythonProcess = spawnPythonStage(
       pythonEnvPath,
       [scriptPath, inputGuitarPath, outputMidiPath],
       {
@@ -926,7 +1194,7 @@ async function generateGuitarTab(
       args.push(outputTabTextPath);
     }
 
-    const pythonProcess = spawn(pythonEnvPath, args, {
+    const pythonProcess = spawnPythonStage(pythonEnvPath, args, {
       stdio: ["pipe", "pipe", "pipe"],
     });
 
@@ -998,7 +1266,17 @@ async function generateGuitarTab(
   });
 }
 
-// Tabify를 사용한 기타 TAB 생성 함수 (새로운 방식)
+// 여러 페이지 PNG TAB: 1페이지는 그대로, 2페이지부터 <이름>_page<N>.png (guitar_tab_generator.page_paths)
+function listTabPageFiles(tabImagePath) {
+  const { dir, name, ext } = path.parse(tabImagePath);
+  const files = [path.basename(tabImagePath)];
+  for (let page = 2; fs.existsSync(path.join(dir, `${name}_page${page}${ext}`)); page++) {
+    files.push(`${name}_page${page}${ext}`);
+  }
+  return files;
+}
+
+// 운지 최적화 기타 TAB 생성 함수 (tabify_converter.py, 동적 계획법 운지 - 외부 tabify CLI 불필요)
 async function generateGuitarTabWithTabify(
   inputMidiPath,
   outputTabImagePath,
@@ -1008,7 +1286,7 @@ async function generateGuitarTabWithTabify(
   return new Promise((resolve) => {
     const scriptPath = path.join(__dirname, "../scripts/tabify_converter.py");
 
-    console.log(`🎸 Tabify를 사용한 TAB 생성 실행: ${scriptPath}`);
+    console.log(`🎸 운지 최적화 TAB 생성 실행: ${scriptPath}`);
     console.log(`📥 입력: ${inputMidiPath}`);
     console.log(`📤 출력: ${outputTabImagePath}`);
 
@@ -1017,7 +1295,7 @@ async function generateGuitarTabWithTabify(
       args.push(outputTabTextPath);
     }
 
-    const pythonProcess = spawn(pythonEnvPath, args, {
+    const pythonProcess = spawnPythonStage(pythonEnvPath, args, {
       stdio: ["pipe", "pipe", "pipe"],
     });
 
@@ -1049,7 +1327,7 @@ async function generateGuitarTabWithTabify(
               tab_text_path: outputTabTextPath,
               file_size_kb: (stats.size / 1024).toFixed(2),
               stdout: stdout,
-              method: "Tabify (Professional)",
+              method: "DP Fingering (Native)",
             });
           } else {
             resolve({
@@ -1092,7 +1370,7 @@ async function generateGuitarTabWithTabify(
 
 //ai 생성하기
 exports.generateTabFromAudio = async (req, res) => {
-  const { audio_url } = req.body;
+  const { audio_url, separationMode = "auto" } = req.body;
 
   if (!audio_url) {
     return res.status(400).json({ message: "audio_url이 필요합니다." });
@@ -1163,28 +1441,31 @@ exports.generateTabFromAudio = async (req, res) => {
 
     console.log(`🎵 영상 정보: ${title} by ${author} (${duration}초)`);
 
-    // 🎸 2단계: 향상된 기타 음원 분리
-    console.log("🎸 향상된 기타 음원 분리 시작...");
-    const guitarFileName = `guitar_enhanced_${Date.now()}.wav`;
+    // 🎸 2단계: 기타 음원 분리 (향상된 Demucs 분리, 대기열이 밀리면 빠른 분리)
+    const mode = chooseSeparationMode(separationMode);
+    console.log(`🎸 기타 음원 분리 시작 (${mode})...`);
+    // 중간 기타 오디오는 float16 스템(.stem)으로 전달 (WAV 인코딩/디코딩 생략)
+    const guitarFileName = `guitar_enhanced_${Date.now()}.stem`;
     const guitarFilePath = path.join(outputDir, guitarFileName);
 
-    const guitarSeparationResult = await separateGuitarEnhanced(
-      finalAudioPath,
-      guitarFilePath
-    );
+    const guitarSeparationResult =
+      mode === "fast"
+        ? await separateGuitarFast(finalAudioPath, guitarFilePath)
+        : await trackDemucsSeparation(() =>
+            separateGuitarEnhanced(finalAudioPath, guitarFilePath)
+          );
 
     if (!guitarSeparationResult.success) {
-      console.log("⚠️ 향상된 기타 분리 실패, 기본 방법으로 재시도...");
-      const basicGuitarResult = await separateGuitar(
-        finalAudioPath,
-        guitarFilePath
+      console.log("⚠️ 기타 분리 실패, 기본 방법으로 재시도...");
+      const basicGuitarResult = await trackDemucsSeparation(() =>
+        separateGuitar(finalAudioPath, guitarFilePath)
       );
       if (!basicGuitarResult.success) {
         throw new Error(`기타 분리 실패: ${basicGuitarResult.error}`);
       }
       console.log("✅ 기본 기타 분리 완료!");
     } else {
-      console.log("✅ 향상된 기타 분리 완료!");
+      console.log(`✅ 기타 분리 완료! (${mode})`);
     }
 
     // 🎼 3단계: 기타 최적화 MIDI 변환 (듣기 좋은 소리)
@@ -1211,9 +1492,9 @@ exports.generateTabFromAudio = async (req, res) => {
       console.log("✅ 기타 최적화 MIDI 변환 완료!");
     }
 
-    // 🎼 4단계: 기타 TAB 생성
+    // 🎼 4단계: 기타 TAB 생성 (모든 페이지를 PDF 하나로)
     console.log("🎸 기타 TAB 악보 생성 시작...");
-    const tabImageFileName = `tab_${Date.now()}.png`;
+    const tabImageFileName = `tab_${Date.now()}.pdf`;
     const tabTextFileName = `tab_${Date.now()}.txt`;
     const tabImagePath = path.join(outputDir, tabImageFileName);
     const tabTextPath = path.join(outputDir, tabTextFileName);
@@ -1242,14 +1523,14 @@ exports.generateTabFromAudio = async (req, res) => {
 
       // TAB 이미지가 성공적으로 생성된 경우 Cloudinary에 업로드
       if (tabGenerationResult.success && fs.existsSync(tabImagePath)) {
-        console.log("📤 TAB 이미지 Cloudinary 업로드 중...");
+        console.log("📤 TAB 악보(PDF) Cloudinary 업로드 중...");
         const tabUploadResult = await cloudinary.uploader.upload(tabImagePath, {
           folder: "grip/ai-generated-tabs",
           public_id: `ai_tab_${Date.now()}`,
           resource_type: "image",
         });
         tabSheetUrl = tabUploadResult.secure_url;
-        console.log("✅ TAB 이미지 Cloudinary 업로드 완료");
+        console.log("✅ TAB 악보(PDF) Cloudinary 업로드 완료");
 
         // 로컬 파일 삭제
         fs.unlinkSync(tabImagePath);
@@ -1316,7 +1597,12 @@ exports.generateTabFromAudio = async (req, res) => {
       processing_info: {
         guitar_separation: {
           enhanced: guitarSeparationResult.enhanced || false,
-          method: guitarSeparationResult.enhanced ? "향상된 분리" : "기본 분리",
+          fast: guitarSeparationResult.fast || false,
+          method: guitarSeparationResult.enhanced
+            ? "향상된 분리"
+            : guitarSeparationResult.fast
+            ? "빠른 분리"
+            : "기본 분리",
           file_size_mb: guitarSeparationResult.file_size_mb,
         },
         midi_conversion: {
@@ -1658,7 +1944,7 @@ async function convertToGuitarOptimizedMidi(inputGuitarPath, outputMidiPath) {
     console.log(`📥 입력: ${inputGuitarPath}`);
     console.log(`📤 출력: ${outputMidiPath}`);
 
-    const pythonProcess = spawn(
+    const pythonProcess = spawnPythonStage(
       pythonEnvPath,
       [scriptPath, inputGuitarPath, outputMidiPath],
       {
@@ -1744,7 +2030,11 @@ async function convertToGuitarOptimizedMidi(inputGuitarPath, outputMidiPath) {
 // YouTube-to-MIDI 변환 파이프라인
 exports.convertYouTube = async (req, res) => {
   try {
-    const { youtubeUrl, tabMethod = "tabify" } = req.body; // 기본값은 tabify
+    const {
+      youtubeUrl,
+      tabMethod = "tabify", // 기본값은 tabify
+      separationMode = "auto", // enhanced | fast | auto
+    } = req.body;
 
     if (!youtubeUrl) {
       return res.status(400).json({
@@ -1756,7 +2046,7 @@ exports.convertYouTube = async (req, res) => {
     console.log(`🎥 YouTube-to-MIDI 변환 시작: ${youtubeUrl}`);
     console.log(
       `🎸 TAB 생성 방식: ${
-        tabMethod === "tabify" ? "Tabify (Professional)" : "Custom (기존 방식)"
+        tabMethod === "tabify" ? "DP Fingering (Native)" : "Custom (기존 방식)"
       }`
     );
 
@@ -1767,7 +2057,12 @@ exports.convertYouTube = async (req, res) => {
 
     const timestamp = Date.now();
     const outputAudioPath = path.join(outputDir, `audio_${timestamp}.wav`);
+    // 분리 → MIDI 변환 사이는 내부 float16 스템(.stem), 응답으로는 WAV를 내보냄
     const outputGuitarPath = path.join(
+      outputDir,
+      `guitar_enhanced_${timestamp}.stem`
+    );
+    const outputGuitarWavPath = path.join(
       outputDir,
       `guitar_enhanced_${timestamp}.wav`
     );
@@ -1792,15 +2087,25 @@ exports.convertYouTube = async (req, res) => {
       });
     }
 
-    // 2. 기타 스템 분리
-    console.log("🎸 2단계: 기타 스템 분리");
+    // 2. 기타 스템 분리 (대기열이 밀리면 빠른 분리, Demucs 실패 시에도 빠른 분리로 재시도)
+    const mode = chooseSeparationMode(separationMode);
+    console.log(`🎸 2단계: 기타 스템 분리 (${mode})`);
     const pythonEnvPath =
       "/Users/choechiwon/madcamp/week2/GRIP_back/audio_env_39/bin/python";
-    const separationResult = await separateGuitarStem(
-      outputAudioPath,
-      outputGuitarPath,
-      pythonEnvPath
-    );
+    let separationResult =
+      mode === "fast"
+        ? await separateGuitarFast(outputAudioPath, outputGuitarPath, pythonEnvPath)
+        : await trackDemucsSeparation(() =>
+            separateGuitarStem(outputAudioPath, outputGuitarPath, pythonEnvPath)
+          );
+    if (!separationResult.success && mode !== "fast") {
+      console.log("⚠️ Demucs 분리 실패, 빠른 분리로 재시도");
+      separationResult = await separateGuitarFast(
+        outputAudioPath,
+        outputGuitarPath,
+        pythonEnvPath
+      );
+    }
     if (!separationResult.success) {
       return res.status(500).json({
         success: false,
@@ -1809,34 +2114,16 @@ exports.convertYouTube = async (req, res) => {
       });
     }
 
-    // 3. MIDI 변환 (Tabify 호환 → 향상된 → 최적화 → 기본 순으로 시도)
+    // 3. MIDI 변환 (Basic Pitch 1회 실행 후 Tabify 호환 → 향상된 → 최적화 → 기본 순으로 후처리)
     console.log("🎹 3단계: MIDI 변환");
-    let midiResult = await tryTabifyCompatibleMidiConversion(
+    let midiResult = await tryMultiVariantMidiConversion(
       outputGuitarPath,
       outputMidiPath,
       pythonEnvPath
     );
 
     if (!midiResult.success) {
-      console.log("⚠️ Tabify 호환 MIDI 변환 실패, 향상된 버전 시도");
-      midiResult = await tryEnhancedMidiConversion(
-        outputGuitarPath,
-        outputMidiPath,
-        pythonEnvPath
-      );
-    }
-
-    if (!midiResult.success) {
-      console.log("⚠️ 향상된 MIDI 변환 실패, 최적화 버전 시도");
-      midiResult = await tryOptimizedMidiConversion(
-        outputGuitarPath,
-        outputMidiPath,
-        pythonEnvPath
-      );
-    }
-
-    if (!midiResult.success) {
-      console.log("⚠️ 최적화 MIDI 변환 실패, 기본 버전 시도");
+      console.log("⚠️ 멀티 버전 MIDI 변환 실패, 기본 버전 시도");
       midiResult = await tryBasicMidiConversion(
         outputGuitarPath,
         outputMidiPath,
@@ -1898,12 +2185,28 @@ exports.convertYouTube = async (req, res) => {
       });
     }
 
+    // 5. 기타 스템을 WAV로 내보내고 내부 .stem 정리
+    const wavResult = await exportStemWav(
+      outputGuitarPath,
+      outputGuitarWavPath,
+      pythonEnvPath
+    );
+    if (!wavResult.success) {
+      return res.status(500).json({
+        success: false,
+        message: "기타 스템 WAV 변환 실패",
+        error: wavResult.error,
+      });
+    }
+    if (fs.existsSync(outputGuitarPath)) fs.unlinkSync(outputGuitarPath);
+
     // 성공 응답
     const responseData = {
       audioFile: path.basename(outputAudioPath),
-      guitarStemFile: path.basename(outputGuitarPath),
+      guitarStemFile: path.basename(outputGuitarWavPath),
       midiFile: path.basename(outputMidiPath),
       tabImageFile: path.basename(outputTabImagePath),
+      tabPageFiles: listTabPageFiles(outputTabImagePath),
       tabTextFile: path.basename(outputTabTextPath),
       processingTime: Date.now() - timestamp,
       tabMethod: tabResult.method || tabMethod,
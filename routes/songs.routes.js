@@ -243,6 +243,11 @@ router.delete("/:songId", authenticateToken, songsController.deleteSong);
  *                       type: string
  *                     tabImageFile:
  *                       type: string
+ *                     tabPageFiles:
+ *                       type: array
+ *                       items:
+ *                         type: string
+ *                       description: Every TAB page image, first page first
  *                     tabTextFile:
  *                       type: string
  *                     tabMethod:
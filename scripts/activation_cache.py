@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Basic Pitch 활성화 캐시
+오디오 파일 내용 해시 + 모델 버전을 키로 note/onset/contour 활성화를 압축 .npz로 저장
+임계값/최소 노트 길이만 바꿔서 다시 뽑을 때는 추론 없이 노트 추출만 다시 실행 (수 ms)
+
+사용법 (캐시에서 다시 추출):
+  python activation_cache.py <input.wav|.stem> <output.mid> [--onset-threshold 0.5]
+                             [--frame-threshold 0.3] [--minimum-note-length 127.7] [--variant basic]
+"""
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+import numpy as np
+from lru_file_cache import LruFileCache
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "ACTIVATION_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "temp", "activation_cache")
+)
+DEFAULT_MAX_MB = float(os.environ.get("ACTIVATION_CACHE_MAX_MB", "1024"))
+OUTPUT_KEYS = ("note", "onset", "contour")
+
+def file_hash(path, chunk_size=1 << 20):
+    """오디오 파일 내용의 sha256 (경로/수정 시각과 무관)"""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+class ActivationCache(LruFileCache):
+    """크기 상한이 있는 LRU 활성화 캐시 (float16 + zip 압축 .npz)"""
+    SUFFIX = ".npz"
+    LABEL = "활성화 캐시"
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_mb=DEFAULT_MAX_MB):
+        super().__init__(cache_dir, max_mb)
+
+    def make_key(self, audio_path, model_version):
+        """오디오 파일 내용 + 모델 버전 → 캐시 키"""
+        hasher = hashlib.sha256()
+        hasher.update(file_hash(audio_path).encode("utf-8"))
+        hasher.update(json.dumps({"model": model_version}, sort_keys=True).encode("utf-8"))
+        return hasher.hexdigest()
+
+    def _save(self, f, model_output):
+        # float32 대비 약 40%
+        np.savez_compressed(f, **{k: np.asarray(model_output[k], dtype=np.float16) for k in OUTPUT_KEYS})
+
+    def _load(self, path):
+        """{'note', 'onset', 'contour'} float32 활성화"""
+        with np.load(path) as data:
+            return {k: data[k].astype(np.float32) for k in OUTPUT_KEYS}
+
+if __name__ == "__main__":
+    import time
+    from transcription import redecode
+
+    parser = argparse.ArgumentParser(description='캐시된 Basic Pitch 활성화에서 노트 다시 추출')
+    parser.add_argument('input_path', help='이전에 변환한 오디오 파일 경로')
+    parser.add_argument('output_path', help='출력 MIDI 파일 경로')
+    parser.add_argument('--onset-threshold', type=float, default=0.5)
+    parser.add_argument('--frame-threshold', type=float, default=0.3)
+    parser.add_argument('--minimum-note-length', type=float, default=127.70, help='최소 노트 길이 (ms)')
+    parser.add_argument('--variant', default=None,
+                        help='후처리 버전 (tabify_compatible, enhanced_musical, guitar_optimized, basic, monophonic), 없으면 Basic Pitch MIDI 그대로 저장')
+
+    args = parser.parse_args()
+    started = time.time()
+    result = redecode(
+        args.input_path,
+        onset_threshold=args.onset_threshold,
+        frame_threshold=args.frame_threshold,
+        minimum_note_length=args.minimum_note_length,
+    )
+    if result is None:
+        print(f"❌ 캐시된 활성화가 없습니다: {args.input_path}")
+        sys.exit(1)
+
+    _, midi_data, note_events = result
+    print(f"⚡ 캐시에서 다시 추출: {(time.time() - started) * 1000:.1f}ms, 노트 {len(note_events)}개")
+
+    if args.variant is None:
+        midi_data.write(args.output_path)
+        print(f"✅ MIDI 저장: {args.output_path}")
+        sys.exit(0)
+
+    from midi_conversion_multi import VARIANTS, _succeeded
+    if args.variant not in VARIANTS:
+        print(f"❌ 알 수 없는 버전: {args.variant}")
+        sys.exit(1)
+    sys.exit(0 if _succeeded(VARIANTS[args.variant](midi_data, note_events, args.output_path)) else 1)
@@ -2,129 +2,281 @@
 """
 MIDI 파일 분석 도구
 기타 연주 가능성과 Tabify 호환성 검사
+
+사용법:
+  python analyze_midi.py <midi_file.mid>                      # 파일 하나, 텍스트 출력
+  python analyze_midi.py <dir|file> [...] [--list files.txt]  # 일괄 분석, JSON Lines 출력
+                         [--workers 4] [--output results.jsonl]
+일괄 분석은 디렉터리를 재귀적으로 훑어 .mid/.midi를 모으고 프로세스 풀에서 나눠 분석,
+끝나는 대로 한 줄에 파일 하나씩 JSON으로 내보냄 (순서는 완료 순)
 """
 
-import pretty_midi
+import os
 import sys
+import json
+import time
+import argparse
+import multiprocessing
+import numpy as np
+import pretty_midi
+from midi_io import read_midi
 
-def analyze_midi_file(midi_path):
-    """MIDI 파일 분석"""
+# 확장된 기타 연주 가능 범위: E2(40) ~ C4(60) - 15프렛 범위
+PLAYABLE_RANGE = (40, 60)
+LONG_NOTE_SECONDS = 5.0    # 이보다 길면 너무 긴 노트
+SHORT_NOTE_SECONDS = 0.05  # 이보다 짧으면 너무 짧은 노트
+
+# 현별 분포 (확장된 범위, 현마다 겹치는 음역)
+STRING_RANGES = {
+    "E(저음현)": (40, 55),   # E2-G3 (0-15프렛)
+    "A현": (45, 60),         # A2-C4 (0-15프렛)
+    "D현": (50, 60),         # D3-C4 (0-10프렛)
+    "G현": (55, 60),         # G3-C4 (0-5프렛)
+}
+
+MIDI_EXTENSIONS = (".mid", ".midi")
+
+def max_polyphony(start, end):
+    """
+    동시에 울리는 노트 수의 최댓값과 그 시각 (시작 +1 / 끝 -1 이벤트 스윕)
+    같은 시각에 끝나고 시작하는 노트는 겹치지 않는 것으로 봄 (끝 이벤트를 먼저 처리)
+    """
+    if len(start) == 0:
+        return 0, None
+    times = np.concatenate([start, end])
+    steps = np.concatenate([np.ones(len(start), dtype=np.int64), -np.ones(len(end), dtype=np.int64)])
+    order = np.lexsort((steps, times))
+    active = np.cumsum(steps[order])
+    peak = int(np.argmax(active))
+    return int(active[peak]), float(times[order][peak])
+
+def analyze_notes(notes):
+    """NoteArray → 지표 dict (음역, 범위 밖 노트, 길이 이상치, 이웃 겹침, 최대 동시 발음, 현별 분포, 문제 목록)"""
+    pitch = notes.pitch.astype(np.int64)
+    velocity = notes.velocity.astype(np.int64)
+    duration = notes.duration
+
+    out_of_range = (pitch < PLAYABLE_RANGE[0]) | (pitch > PLAYABLE_RANGE[1])
+    long_count = int(np.count_nonzero(duration > LONG_NOTE_SECONDS))
+    short_count = int(np.count_nonzero(duration < SHORT_NOTE_SECONDS))
+
+    # 시작 순으로 이웃한 노트 겹침 (기존 지표), 실제 동시 발음 수는 스윕으로
+    sorted_notes = notes.sorted_by_start()
+    adjacent_overlaps = int(np.count_nonzero(sorted_notes.end[:-1] > sorted_notes.start[1:]))
+    polyphony, polyphony_time = max_polyphony(notes.start, notes.end)
+
+    string_distribution = {
+        name: int(np.count_nonzero((pitch >= low) & (pitch <= high)))
+        for name, (low, high) in STRING_RANGES.items()
+    }
+
+    issues = {}
+    if out_of_range.any():
+        issues["out_of_range"] = int(np.count_nonzero(out_of_range))
+    if long_count:
+        issues["long_notes"] = long_count
+    if short_count:
+        issues["short_notes"] = short_count
+    if adjacent_overlaps:
+        issues["polyphonic_overlaps"] = adjacent_overlaps
+
+    return {
+        "pitch_min": int(pitch.min()),
+        "pitch_max": int(pitch.max()),
+        "velocity_min": int(velocity.min()),
+        "velocity_max": int(velocity.max()),
+        "out_of_range": int(np.count_nonzero(out_of_range)),
+        "out_of_range_pitches": np.unique(pitch[out_of_range]).tolist(),
+        "duration_min": float(duration.min()),
+        "duration_max": float(duration.max()),
+        "duration_mean": float(duration.mean()),
+        "long_notes": long_count,
+        "short_notes": short_count,
+        "adjacent_overlaps": adjacent_overlaps,
+        "max_polyphony": polyphony,
+        "max_polyphony_time": polyphony_time,
+        "string_distribution": string_distribution,
+        "issues": issues,
+    }
+
+def analyze_midi(midi_path):
+    """MIDI 파일 → 분석 결과 dict (첫 번째 악기 트랙 기준, 실패하면 success False와 error)"""
     try:
-        midi_data = pretty_midi.PrettyMIDI(midi_path)
-        
-        print(f"🎵 MIDI 파일 분석: {midi_path}")
-        print(f"📊 총 트랙 수: {len(midi_data.instruments)}")
-        print(f"📊 해상도: {midi_data.resolution} ticks per beat")
-        
+        midi_data = read_midi(midi_path)
+        result = {
+            "path": midi_path,
+            "success": True,
+            "tracks": len(midi_data.instruments),
+            "resolution": midi_data.resolution,
+        }
         if not midi_data.instruments:
-            print("❌ 악기 트랙이 없습니다.")
-            return
-        
+            return result
+
         instrument = midi_data.instruments[0]
-        notes = instrument.notes
-        
-        print(f"📊 총 노트 수: {len(notes)}")
-        print(f"📊 악기: {pretty_midi.program_to_instrument_name(instrument.program)}")
-        print(f"📊 드럼 트랙 여부: {instrument.is_drum}")
-        
-        if not notes:
-            print("❌ 노트가 없습니다.")
-            return
-        
-        # 음역대 분석
-        pitches = [note.pitch for note in notes]
-        velocities = [note.velocity for note in notes]
-        print(f"📊 음역대: {min(pitches)} - {max(pitches)}")
-        print(f"📊 벨로시티: {min(velocities)} - {max(velocities)}")
-        
-        # 기타 표준 튜닝 범위 확인 (확장된 범위)
-        # 확장된 범위: E2(40) ~ C4(60) - 15프렛 범위
-        min_guitar_pitch = 40  # E2
-        max_guitar_pitch = 60  # C4
-        
-        playable_range = (min_guitar_pitch, max_guitar_pitch)
-        print(f"🎸 확장된 기타 연주 가능 범위: {playable_range[0]} - {playable_range[1]} (E2-C4, 15프렛)")
-        
-        # 범위 밖 노트 확인
-        out_of_range = [p for p in pitches if p < playable_range[0] or p > playable_range[1]]
-        if out_of_range:
-            print(f"❌ 범위 밖 노트 {len(out_of_range)}개: {set(out_of_range)}")
-        else:
-            print("✅ 모든 노트가 기타 연주 가능 범위 내")
-        
-        # 노트 길이 분석
-        durations = [note.end - note.start for note in notes]
-        long_notes = [d for d in durations if d > 5.0]  # 5초 이상
-        very_short_notes = [d for d in durations if d < 0.05]  # 50ms 이하
-        
-        print(f"📊 노트 길이 - 최소: {min(durations):.3f}초, 최대: {max(durations):.3f}초, 평균: {sum(durations)/len(durations):.3f}초")
-        
-        if long_notes:
-            print(f"⚠️ 너무 긴 노트 {len(long_notes)}개 (5초 이상)")
-        
-        if very_short_notes:
-            print(f"⚠️ 너무 짧은 노트 {len(very_short_notes)}개 (50ms 이하)")
-        
-        # 동시 발음 확인 (모노포닉인지)
-        time_overlaps = 0
-        sorted_notes = sorted(notes, key=lambda x: x.start)
-        
-        for i in range(len(sorted_notes) - 1):
-            current = sorted_notes[i]
-            next_note = sorted_notes[i + 1]
-            
-            if current.end > next_note.start:  # 겹침
-                time_overlaps += 1
-        
-        if time_overlaps > 0:
-            print(f"⚠️ 동시 발음(폴리포닉) 감지: {time_overlaps}개 겹침")
-        else:
-            print("✅ 모노포닉 (동시 발음 없음)")
-        
-        # 현별 분포 (확장된 범위)
-        print("\n🎸 현별 분포 (확장된 범위):")
-        string_ranges = {
-            "E(저음현)": (40, 55),   # E2-G3 (0-15프렛)
-            "A현": (45, 60),         # A2-C4 (0-15프렛)
-            "D현": (50, 60),         # D3-C4 (0-10프렛)
-            "G현": (55, 60),         # G3-C4 (0-5프렛)
-        }
-        
-        for string_name, (low, high) in string_ranges.items():
-            count = len([p for p in pitches if low <= p <= high])
-            if count > 0:
-                percentage = (count / len(pitches)) * 100
-                print(f"  {string_name}: {count}개 ({percentage:.1f}%)")
-        
-        # 문제점 요약
-        print("\n🔍 문제점 요약:")
-        issues = []
-        
-        if out_of_range:
-            issues.append(f"범위 밖 노트 {len(out_of_range)}개")
-        
-        if long_notes:
-            issues.append(f"너무 긴 노트 {len(long_notes)}개")
-        
-        if very_short_notes:
-            issues.append(f"너무 짧은 노트 {len(very_short_notes)}개")
-        
-        if time_overlaps > 0:
-            issues.append(f"폴리포닉 겹침 {time_overlaps}개")
-        
-        if issues:
-            for issue in issues:
-                print(f"  ❌ {issue}")
-        else:
-            print("  ✅ 문제 없음")
-            
+        result.update(
+            notes=len(instrument.notes),
+            program=int(instrument.program),
+            instrument=pretty_midi.program_to_instrument_name(instrument.program),
+            is_drum=bool(instrument.is_drum),
+        )
+        if len(instrument.notes) > 0:
+            result.update(analyze_notes(instrument.notes))
+        return result
     except Exception as e:
-        print(f"❌ 분석 에러: {e}")
+        return {"path": midi_path, "success": False, "error": str(e)}
 
-if __name__ == "__main__":
-    if len(sys.argv) != 2:
+def analyze_midi_file(midi_path):
+    """MIDI 파일 분석 (텍스트 출력)"""
+    result = analyze_midi(midi_path)
+    if not result["success"]:
+        print(f"❌ 분석 에러: {result['error']}")
+        return result
+
+    print(f"🎵 MIDI 파일 분석: {midi_path}")
+    print(f"📊 총 트랙 수: {result['tracks']}")
+    print(f"📊 해상도: {result['resolution']} ticks per beat")
+
+    if result["tracks"] == 0:
+        print("❌ 악기 트랙이 없습니다.")
+        return result
+
+    print(f"📊 총 노트 수: {result['notes']}")
+    print(f"📊 악기: {result['instrument']}")
+    print(f"📊 드럼 트랙 여부: {result['is_drum']}")
+
+    if result["notes"] == 0:
+        print("❌ 노트가 없습니다.")
+        return result
+
+    # 음역대 분석
+    print(f"📊 음역대: {result['pitch_min']} - {result['pitch_max']}")
+    print(f"📊 벨로시티: {result['velocity_min']} - {result['velocity_max']}")
+    print(f"🎸 확장된 기타 연주 가능 범위: {PLAYABLE_RANGE[0]} - {PLAYABLE_RANGE[1]} (E2-C4, 15프렛)")
+
+    # 범위 밖 노트 확인
+    if result["out_of_range"]:
+        print(f"❌ 범위 밖 노트 {result['out_of_range']}개: {set(result['out_of_range_pitches'])}")
+    else:
+        print("✅ 모든 노트가 기타 연주 가능 범위 내")
+
+    # 노트 길이 분석
+    print(f"📊 노트 길이 - 최소: {result['duration_min']:.3f}초, 최대: {result['duration_max']:.3f}초, 평균: {result['duration_mean']:.3f}초")
+    if result["long_notes"]:
+        print(f"⚠️ 너무 긴 노트 {result['long_notes']}개 (5초 이상)")
+    if result["short_notes"]:
+        print(f"⚠️ 너무 짧은 노트 {result['short_notes']}개 (50ms 이하)")
+
+    # 동시 발음 확인 (모노포닉인지)
+    if result["adjacent_overlaps"] > 0:
+        print(f"⚠️ 동시 발음(폴리포닉) 감지: {result['adjacent_overlaps']}개 겹침")
+    else:
+        print("✅ 모노포닉 (동시 발음 없음)")
+    print(f"📊 최대 동시 발음 수: {result['max_polyphony']}")
+
+    # 현별 분포 (확장된 범위)
+    print("\n🎸 현별 분포 (확장된 범위):")
+    for string_name, count in result["string_distribution"].items():
+        if count > 0:
+            percentage = (count / result["notes"]) * 100
+            print(f"  {string_name}: {count}개 ({percentage:.1f}%)")
+
+    # 문제점 요약
+    print("\n🔍 문제점 요약:")
+    labels = {
+        "out_of_range": "범위 밖 노트",
+        "long_notes": "너무 긴 노트",
+        "short_notes": "너무 짧은 노트",
+        "polyphonic_overlaps": "폴리포닉 겹침",
+    }
+    if result["issues"]:
+        for issue, count in result["issues"].items():
+            print(f"  ❌ {labels[issue]} {count}개")
+    else:
+        print("  ✅ 문제 없음")
+    return result
+
+def collect_midi_paths(paths, list_file=None):
+    """파일/디렉터리(재귀) 목록과 파일 목록(한 줄에 경로 하나, '-'면 표준 입력) → MIDI 경로 목록"""
+    collected = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                collected.extend(os.path.join(root, name) for name in sorted(files)
+                                 if name.lower().endswith(MIDI_EXTENSIONS))
+        else:
+            collected.append(path)
+
+    if list_file:
+        stream = sys.stdin if list_file == "-" else open(list_file, encoding="utf-8")
+        try:
+            collected.extend(line.strip() for line in stream if line.strip())
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+    return collected
+
+def analyze_batch(paths, output, workers=None, chunksize=8):
+    """
+    MIDI 파일들을 프로세스 풀에서 분석해서 끝나는 대로 output에 JSON Lines로 씀
+    반환: (분석한 파일 수, 실패 수)
+    """
+    workers = workers or os.cpu_count() or 1
+    count = failed = 0
+
+    def emit(result):
+        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+        output.flush()
+
+    if workers == 1 or len(paths) <= 1:
+        results = map(analyze_midi, paths)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers)
+        results = pool.imap_unordered(analyze_midi, paths, chunksize=chunksize)
+
+    try:
+        for result in results:
+            emit(result)
+            count += 1
+            failed += not result["success"]
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return count, failed
+
+def main():
+    parser = argparse.ArgumentParser(description='MIDI 파일 분석 (파일 하나는 텍스트, 여러 개/디렉터리는 JSON Lines)')
+    parser.add_argument('paths', nargs='*', help='MIDI 파일 또는 디렉터리')
+    parser.add_argument('--list', help='분석할 파일 목록 (한 줄에 경로 하나, -면 표준 입력)')
+    parser.add_argument('--workers', type=int, default=None, help='워커 프로세스 수 (기본: CPU 수)')
+    parser.add_argument('--output', help='JSON Lines 출력 파일 (기본: 표준 출력)')
+    parser.add_argument('--jsonl', action='store_true', help='파일 하나도 JSON Lines로 출력')
+
+    args = parser.parse_args()
+    if not args.paths and not args.list:
         print("사용법: python analyze_midi.py <midi_file.mid>")
-        sys.exit(1)
-    
-    midi_path = sys.argv[1]
-    analyze_midi_file(midi_path)
+        return 1
+
+    # 기존 사용법: 파일 하나 → 텍스트
+    single_file = len(args.paths) == 1 and not args.list and os.path.isfile(args.paths[0])
+    if single_file and not args.jsonl and not args.output:
+        result = analyze_midi_file(args.paths[0])
+        return 0 if result["success"] else 1
+
+    paths = collect_midi_paths(args.paths, args.list)
+    started = time.perf_counter()
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        count, failed = analyze_batch(paths, output, args.workers)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    elapsed = time.perf_counter() - started
+    print(f"📊 {count}개 파일 분석 ({failed}개 실패), {elapsed:.2f}초"
+          f" ({count / elapsed if elapsed > 0 else 0:.1f} files/s)", file=sys.stderr)
+    return 0 if failed == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+겹치는 윈도우 스트리밍 도구 (torch/demucs 없이 numpy + soundfile만 사용)
+- read_windows: 오디오 파일을 겹치는 윈도우로 순서대로 읽기
+- OverlapCrossfader: 윈도우별 처리 결과를 선형 크로스페이드로 이어 붙이기
+Demucs 스트리밍 분리와 빠른 분리(guitar_separation_fast)가 함께 사용
+"""
+
+import numpy as np
+import soundfile as sf
+
+def read_windows(input_path, window_frames, overlap_frames):
+    """
+    오디오 파일을 겹치는 윈도우로 순서대로 읽기 (파일 전체를 메모리에 올리지 않음)
+    yield: (시작 프레임, (2, n) float32 스테레오 블록, 마지막 윈도우 여부)
+    """
+    hop = window_frames - overlap_frames
+    if hop <= 0:
+        raise ValueError("윈도우 길이는 겹침 길이보다 길어야 합니다")
+
+    with sf.SoundFile(input_path) as f:
+        total = f.frames
+        start = 0
+        while start < total:
+            f.seek(start)
+            block = f.read(window_frames, dtype='float32', always_2d=True).T
+
+            # 모노 → 스테레오
+            if block.shape[0] == 1:
+                block = np.repeat(block, 2, axis=0)
+
+            last = start + window_frames >= total
+            yield start, block, last
+            if last:
+                break
+            start += hop
+
+class OverlapCrossfader:
+    """겹치는 윈도우 출력을 선형 크로스페이드로 이어 붙여 확정된 구간만 내보냄"""
+
+    def __init__(self, overlap_frames):
+        self.overlap_frames = overlap_frames
+        self.tail = None
+
+    def push(self, block, last=False):
+        """(channels, n) 블록 입력 → 더 이상 바뀌지 않는 (channels, m) 구간 반환"""
+        if self.tail is not None:
+            n = min(self.tail.shape[1], block.shape[1])
+            ramp = ((np.arange(n) + 0.5) / n).astype(block.dtype)
+            block = block.copy()
+            block[:, :n] = self.tail[:, :n] * (1.0 - ramp) + block[:, :n] * ramp
+            self.tail = None
+
+        if last:
+            return block
+
+        # 다음 윈도우와 겹칠 꼬리 부분은 보류
+        keep = min(self.overlap_frames, block.shape[1])
+        self.tail = block[:, block.shape[1] - keep:].copy()
+        return block[:, :block.shape[1] - keep]
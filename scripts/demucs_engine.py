@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Demucs 공용 모듈
+- 같은 프로세스 안에서는 htdemucs 가중치를 한 번만 로드해서 재사용
+- 긴 곡을 겹치는 윈도우 단위로 읽고 분리해서 메모리 사용량을 곡 길이와 무관하게 유지
+- CPU에서는 곡을 겹치는 구간으로 나눠 여러 워커 프로세스에서 동시에 분리
+  (워커는 forkserver로 시작해서 공유 메모리 가중치에 연결, 스레드가 있는 서버 프로세스를 fork하지 않음)
+- CPU 가중치는 공유 메모리(/dev/shm)에 한 벌만 두고 모든 프로세스가 연결해서 사용
+  (모델 구조는 manifest의 생성 인자로 meta 디바이스에 다시 만들어서 워커는 체크포인트를 읽지 않음)
+- 선택적으로 CPU 저정밀도 추론 (int8 동적 양자화 / bfloat16 autocast)
+  int8은 양자화된 가중치를 공유 파일로 내보낼 수 없어서 워커 풀에서는 부모가 한 번 양자화한 모델을
+  워커마다 한 벌씩 전달 (공유 가중치 대신 프로세스별 가중치)
+"""
+
+import os
+import sys
+import atexit
+import copy
+import time
+import pickle
+import importlib
+from fractions import Fraction
+import hashlib
+import argparse
+import multiprocessing
+import numpy as np
+import yaml
+import torch
+import demucs
+from demucs.pretrained import get_model, REMOTE_ROOT, _parse_remote_files
+from demucs.apply import apply_model, BagOfModels
+from shared_weights import load_shared_model, is_attached
+from audio_windows import OverlapCrossfader
+
+# (모델 이름, 디바이스) → 로드된 모델
+_MODEL_CACHE = {}
+
+# 1이면 CPU 모델 가중치를 공유 메모리에서 사용 (프로세스마다 따로 로드하지 않음)
+SHARED_WEIGHTS = os.environ.get("DEMUCS_SHARED_WEIGHTS", "1") == "1"
+
+# 추론 정밀도: fp32(기본) / int8(Linear 동적 양자화) / bf16(CPU autocast)
+PRECISIONS = ("fp32", "int8", "bf16")
+DEFAULT_PRECISION = os.environ.get("DEMUCS_PRECISION", "fp32")
+
+# id(원본 모델) → (원본 모델, int8 양자화 모델)
+_QUANTIZED = {}
+
+# 병렬 분리 워커 수 (1이면 기존처럼 한 프로세스에서 분리)
+DEFAULT_WORKERS = int(os.environ.get("DEMUCS_WORKERS", "1"))
+PARALLEL_OVERLAP_SECONDS = 5.0  # 병렬 구간 사이 크로스페이드 길이
+
+# (모델 이름 또는 id(모델), 워커 수) → (모델, 프로세스 풀), 요청마다 워커를 새로 띄우지 않도록 재사용
+_POOLS = {}
+# id(모델) → 모델 이름 (공유 가중치 모델이면 워커가 이름으로 같은 가중치에 연결)
+_MODEL_NAMES = {}
+# 워커 프로세스 안에서 사용할 모델
+_WORKER_MODEL = None
+
+def get_device():
+    """사용할 torch 디바이스 선택"""
+    return torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+def load_separation_model(model_name="htdemucs", device=None):
+    """Demucs 모델을 로드 (이미 로드된 모델이 있으면 재사용)"""
+    device = device or get_device()
+    key = (model_name, str(device))
+
+    if key not in _MODEL_CACHE:
+        print(f"📥 Demucs 모델 로딩: {model_name} ({device})")
+        if SHARED_WEIGHTS and torch.device(device).type == "cpu":
+            model = load_shared_model(f"demucs_{model_name}", lambda: get_model(model_name),
+                                      checkpoint_version(model_name), describe=model_spec, skeleton=model_from_spec)
+        else:
+            model = get_model(model_name)
+            model.to(device)
+        model.eval()
+        _MODEL_CACHE[key] = model
+        _MODEL_NAMES[id(model)] = model_name
+
+    return _MODEL_CACHE[key]
+
+def checkpoint_version(model_name):
+    """
+    공유 가중치 키: demucs 버전 + 체크포인트 파일 이름 (이름에 sha256 접두어가 들어 있어 torch hub가 다운로드 시 검증)
+    모음 모델(yaml)은 yaml 내용 해시도 포함, 원격 저장소에 없는 모델이면 None (공유하지 않음)
+    """
+    try:
+        checkpoints = _parse_remote_files(REMOTE_ROOT / "files.txt")
+        bag_path = REMOTE_ROOT / f"{model_name}.yaml"
+        if model_name in checkpoints:
+            signatures, bag_hash = [model_name], "-"
+        elif bag_path.exists():
+            bag_text = bag_path.read_bytes()
+            signatures = yaml.safe_load(bag_text)["models"]
+            bag_hash = hashlib.sha256(bag_text).hexdigest()[:16]
+        else:
+            return None
+        files = ",".join(os.path.basename(checkpoints[signature]) for signature in signatures)
+    except (OSError, KeyError, TypeError, yaml.YAMLError):
+        return None
+    return f"demucs={demucs.__version__};bag={bag_hash};checkpoints={files}"
+
+def _plain(value):
+    """생성 인자 → JSON 값 (Fraction은 {"fraction": [분자, 분모]}), 다른 타입이면 TypeError"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, Fraction):
+        return {"fraction": [value.numerator, value.denominator]}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    if isinstance(value, dict) and all(isinstance(key, str) for key in value):
+        return {"dict": {key: _plain(item) for key, item in value.items()}}
+    raise TypeError(f"JSON으로 저장할 수 없는 생성 인자: {type(value).__name__}")
+
+def _restore(value):
+    if isinstance(value, list):
+        return [_restore(item) for item in value]
+    if isinstance(value, dict):
+        if "fraction" in value:
+            return Fraction(*value["fraction"])
+        return {key: _restore(item) for key, item in value["dict"].items()}
+    return value
+
+def model_spec(model):
+    """
+    공유 가중치 manifest에 저장할 모델 구조: 모음 모델의 가중치와 각 모델의 클래스 경로 / 생성 인자 / segment
+    demucs 모델은 생성 인자를 _init_args_kwargs에 보관 (capture_init), 없거나 JSON으로 저장할 수 없으면 None
+    """
+    models = model.models if isinstance(model, BagOfModels) else [model]
+    try:
+        entries = []
+        for sub in models:
+            args, kwargs = sub._init_args_kwargs
+            entries.append({
+                "class": [type(sub).__module__, type(sub).__qualname__],
+                "args": _plain(list(args)),
+                "kwargs": _plain(dict(kwargs)),
+                "segment": _plain(getattr(sub, "segment", None)),
+            })
+        weights = _plain(model.weights) if isinstance(model, BagOfModels) else None
+    except (AttributeError, TypeError, ValueError):
+        return None
+    return {"bag": isinstance(model, BagOfModels), "weights": weights, "models": entries}
+
+def model_from_spec(spec):
+    """model_spec → 같은 구조의 모델 (체크포인트를 읽지 않음, build_skeleton 안에서는 meta 디바이스에 생성)"""
+    models = []
+    for entry in spec["models"]:
+        module_name, class_name = entry["class"]
+        klass = importlib.import_module(module_name)
+        for part in class_name.split("."):
+            klass = getattr(klass, part)
+        sub = klass(*_restore(entry["args"]), **_restore(entry["kwargs"]))
+        if entry["segment"] is not None:
+            sub.segment = _restore(entry["segment"])
+        models.append(sub)
+    if not spec["bag"]:
+        return models[0]
+    return BagOfModels(models, _restore(spec["weights"]))
+
+def model_device(model):
+    """모델 파라미터가 올라가 있는 디바이스"""
+    return next(model.parameters()).device
+
+def cpu_supports_bf16():
+    """CPU가 bfloat16 연산을 하드웨어로 지원하는지 (AVX512-BF16 / AMX)"""
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+def resolve_precision(model, precision=None):
+    """
+    요청한 정밀도를 실제로 사용할 수 있는 값으로 정리
+    CPU가 아니거나 지원하지 않으면 fp32로 대체
+    """
+    precision = precision or DEFAULT_PRECISION
+    if precision not in PRECISIONS:
+        raise ValueError(f"지원하지 않는 정밀도입니다: {precision} ({', '.join(PRECISIONS)})")
+    if precision == "fp32":
+        return precision
+
+    if model_device(model).type != "cpu":
+        print(f"⚠️ {precision} 추론은 CPU 전용입니다, fp32 사용")
+        return "fp32"
+    if precision == "bf16" and not cpu_supports_bf16():
+        print("⚠️ 이 CPU는 bfloat16을 지원하지 않습니다, fp32 사용")
+        return "fp32"
+    return precision
+
+def with_precision(model, precision):
+    """정밀도에 맞는 모델 반환 (int8은 Linear 레이어를 동적 양자화한 복사본을 한 번만 생성)"""
+    if precision != "int8":
+        return model
+
+    key = id(model)
+    if key not in _QUANTIZED:
+        print("🗜️ Demucs int8 동적 양자화 (Linear 레이어)")
+        quantized = torch.quantization.quantize_dynamic(
+            copy.deepcopy(model), {torch.nn.Linear}, dtype=torch.qint8
+        )
+        _QUANTIZED[key] = (model, quantized.eval())
+    return _QUANTIZED[key][1]
+
+def separate_stems(model, waveform, overlap=0.25, workers=None, precision=None):
+    """
+    (channels, samples) 오디오 → (4, channels, samples) 스템 (drums, bass, other, vocals)
+    workers: 2 이상이면 CPU에서 구간 병렬 분리 (None이면 DEMUCS_WORKERS 환경변수)
+    precision: fp32 / int8 / bf16 (None이면 DEMUCS_PRECISION 환경변수)
+    """
+    precision = resolve_precision(model, precision)
+
+    workers = DEFAULT_WORKERS if workers is None else workers
+    if workers > 1 and model_device(model).type == "cpu":
+        # int8은 부모에서 한 번 양자화한 모델을 워커에 전달 (separate_stems_parallel)
+        return separate_stems_parallel(model, waveform, workers, overlap=overlap, precision=precision)
+    return _apply(with_precision(model, precision), waveform, overlap, precision)
+
+def _apply(model, waveform, overlap, precision="fp32"):
+    waveform_tensor = torch.as_tensor(waveform, dtype=torch.float32).unsqueeze(0)
+    waveform_tensor = waveform_tensor.to(model_device(model))
+    with torch.no_grad(), torch.autocast("cpu", dtype=torch.bfloat16, enabled=precision == "bf16"):
+        sources = apply_model(model, waveform_tensor, split=True, overlap=overlap)
+    return sources[0].float().cpu().numpy()
+
+def _init_worker(model_name, model, threads):
+    global _WORKER_MODEL
+    torch.set_num_threads(threads)
+    # 이름이 있으면 공유 가중치(/dev/shm)에 연결, 없으면 부모가 넘긴 pickle 바이트에서 모델 복원
+    _WORKER_MODEL = load_separation_model(model_name, torch.device("cpu")) if model_name else pickle.loads(model)
+
+def _separate_span(task):
+    # int8이면 _WORKER_MODEL이 이미 부모에서 양자화된 모델 (워커에서 다시 양자화하지 않음)
+    block, overlap, precision = task
+    return _apply(_WORKER_MODEL, block, overlap, precision)
+
+def _pool_context():
+    """
+    워커 시작 방식: forkserver (없으면 spawn)
+    스테이지 서버는 executor 스레드와 torch 스레드 풀이 있는 큰 프로세스라 fork하면 교착/메모리 복제 위험
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        # forkserver가 torch/demucs를 한 번만 임포트해 두고 워커는 거기서 fork
+        context.set_forkserver_preload(["demucs_engine"])
+        return context
+    return multiprocessing.get_context("spawn")
+
+def start_pool(model, workers):
+    """
+    모델별 워커 풀 (처음 한 번 만들고 재사용, close_pools로 정리)
+    공유 가중치에 연결된 모델이면 워커도 이름으로 같은 공유 파일에 연결 (가중치는 물리 메모리에 한 벌)
+    아니면 모델을 pickle해서 워커마다 한 벌씩 전달
+    """
+    model_name = _MODEL_NAMES.get(id(model)) if is_attached(model) else None
+    key = (model_name or id(model), workers)
+    if key not in _POOLS:
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        context = _pool_context()
+        print(f"🧵 Demucs 워커 {workers}개 시작 ({context.get_start_method()}, 워커당 스레드 {threads}개)")
+        # 모델은 일반 pickle 바이트로 전달 (torch의 공유 메모리 전달은 int8 양자화 텐서를 지원하지 않음)
+        pool = context.Pool(workers, initializer=_init_worker,
+                            initargs=(model_name, None if model_name else pickle.dumps(model), threads))
+        _POOLS[key] = (model, pool)
+    return _POOLS[key][1]
+
+def close_pools():
+    """모든 워커 풀 종료 (스테이지 서버 종료 시, 그 외에는 프로세스 종료 시 atexit)"""
+    while _POOLS:
+        _, (_, pool) = _POOLS.popitem()
+        pool.close()
+        pool.join()
+
+atexit.register(close_pools)
+
+def plan_spans(length, workers, overlap_frames):
+    """
+    [0, length)를 워커 수만큼의 겹치는 구간으로 분할 (read_windows와 같은 윈도우/홉 구조)
+    반환: (시작, 끝) 목록, 구간이 너무 짧으면 하나만 반환
+    """
+    count = int(min(workers, length // (3 * overlap_frames))) if overlap_frames else workers
+    if count <= 1:
+        return [(0, length)]
+
+    window = -(-(length + (count - 1) * overlap_frames) // count)
+    hop = window - overlap_frames
+    return [(start, min(start + window, length)) for start in range(0, hop * count, hop)]
+
+def separate_stems_parallel(model, waveform, workers, overlap=0.25, sr=None,
+                            overlap_seconds=PARALLEL_OVERLAP_SECONDS, precision="fp32"):
+    """
+    곡을 겹치는 구간으로 나눠 워커 프로세스에서 동시에 분리한 뒤
+    스트리밍 분리와 같은 선형 크로스페이드(overlap-add)로 다시 이어 붙임
+    """
+    waveform = np.asarray(waveform, dtype=np.float32)
+    sr = sr or getattr(model, "samplerate", 44100)
+    spans = plan_spans(waveform.shape[-1], workers, int(overlap_seconds * sr))
+    if len(spans) == 1:
+        return _apply(with_precision(model, precision), waveform, overlap, precision)
+
+    if precision == "int8":
+        # 동적 양자화된 Linear 가중치는 공유 파일로 내보낼 수 없음 (packed 형식)
+        # → 부모에서 한 번 양자화하고 그 모델을 워커마다 한 벌씩 전달 (공유 가중치 대신 프로세스별 가중치)
+        if is_attached(model):
+            print("⚠️ int8 워커는 공유 가중치를 사용할 수 없어 양자화된 모델을 워커마다 따로 전달합니다")
+        model = with_precision(model, precision)
+
+    pool = start_pool(model, workers)
+    tasks = [(waveform[:, start:stop], overlap, precision) for start, stop in spans]
+
+    # (4, C, n) 스템을 (4*C, n)으로 펴서 채널처럼 크로스페이드
+    crossfader = OverlapCrossfader(int(overlap_seconds * sr))
+    pieces = []
+    for index, stems in enumerate(pool.imap(_separate_span, tasks)):
+        flat = stems.reshape(-1, stems.shape[-1])
+        pieces.append(crossfader.push(flat, last=index == len(tasks) - 1))
+
+    merged = np.concatenate(pieces, axis=1)
+    return merged.reshape(stems.shape[0], stems.shape[1], -1)
+
+def separate_stems_cached(model, waveform, sr, cache=None, model_name="htdemucs", overlap=0.25,
+                          workers=None, precision=None):
+    """
+    스템 캐시를 먼저 확인하고, 없을 때만 Demucs 실행
+    model이 None이면 캐시 미스일 때만 로드 (캐시 적중 시 모델 로딩도 생략)
+    """
+    precision = precision or DEFAULT_PRECISION
+    key = None
+    if cache is not None and cache.enabled:
+        settings = {"split": True, "overlap": overlap}
+        if precision != "fp32":
+            # 저정밀도 결과는 fp32 캐시와 섞이지 않도록 (fp32 키는 기존과 동일)
+            settings["precision"] = precision
+        key = cache.make_key(waveform, sr, model_name, settings)
+        stems = cache.get(key)
+        if stems is not None:
+            print(f"♻️ 스템 캐시 적중: {key[:12]}")
+            return stems
+
+    if model is None:
+        model = load_separation_model(model_name)
+    stems = separate_stems(model, waveform, overlap=overlap, workers=workers, precision=precision)
+
+    if key is not None:
+        cache.put(key, stems)
+    return stems
+
+def benchmark(worker_counts, seconds, model_name="htdemucs"):
+    """워커 수별 분리 시간 비교 (합성 스테레오 신호)"""
+    model = load_separation_model(model_name, torch.device("cpu"))
+    sr = model.samplerate
+    t = np.arange(int(seconds * sr)) / sr
+    waveform = np.stack([np.sin(2 * np.pi * 196.0 * t), np.sin(2 * np.pi * 329.6 * t)])
+    waveform = (0.3 * waveform).astype(np.float32)
+
+    baseline = None
+    for workers in worker_counts:
+        started = time.time()
+        separate_stems(model, waveform, workers=workers)
+        elapsed = time.time() - started
+        baseline = baseline or elapsed
+        print(f"📊 워커 {workers}개: {elapsed:.2f}초 ({baseline / elapsed:.2f}배)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Demucs 구간 병렬 분리 벤치마크')
+    parser.add_argument('--benchmark', action='store_true', help='워커 수별 분리 시간 측정')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='비교할 워커 수')
+    parser.add_argument('--seconds', type=float, default=120.0, help='합성 신호 길이(초)')
+
+    args = parser.parse_args()
+    if not args.benchmark:
+        parser.print_help()
+        sys.exit(1)
+
+    benchmark(args.workers, args.seconds)
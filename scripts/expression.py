@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+음악적 표현 엔진 (배열 연산)
+벨로시티 곡선, 프레이즈 다이내믹, 강박 악센트, 타이밍 흔들림을 노트 배열 전체에 한 번에 적용
+- 난수는 카운터 기반 (splitmix64 해시): 노트 키(시작 ms × 128 + 음높이)와 용도별 스트림 번호로
+  값이 정해지므로 random.seed()로 노트마다 다시 시드를 주지 않아도 같은 입력이면 항상 같은 결과
+- 노트 순서나 나눠서 처리하는지(스트리밍)와 무관하게 노트마다 같은 값
+"""
+
+import numpy as np
+
+# 용도별 난수 스트림 (같은 노트라도 용도가 다르면 서로 독립)
+STREAM_VELOCITY = 1
+STREAM_TIMING = 2
+STREAM_DYNAMICS = 3
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+def _splitmix64(x):
+    x = x + _GOLDEN
+    x = (x ^ (x >> np.uint64(30))) * _MIX_1
+    x = (x ^ (x >> np.uint64(27))) * _MIX_2
+    return x ^ (x >> np.uint64(31))
+
+def note_keys(start, pitch):
+    """노트별 난수 키: 시작 시각(ms, 내림) × 128 + 음높이"""
+    start_ms = np.floor(np.asarray(start, dtype=np.float64) * 1000).astype(np.int64)
+    return start_ms * 128 + np.asarray(pitch, dtype=np.int64)
+
+def note_random(keys, stream=0):
+    """키 배열 → [0, 1) 균등 난수 배열 (키와 스트림이 같으면 항상 같은 값)"""
+    with np.errstate(over="ignore"):
+        counter = np.asarray(keys, dtype=np.int64).view(np.uint64) ^ _splitmix64(np.uint64(stream))
+        bits = _splitmix64(_splitmix64(counter))
+    return (bits >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+def note_uniform(keys, low, high, stream=0):
+    """[low, high) 균등 난수 (random.uniform 대체)"""
+    return low + (high - low) * note_random(keys, stream)
+
+def note_randint(keys, low, high, stream=0):
+    """[low, high] 정수 난수 (random.randint 대체, 양 끝 포함)"""
+    return low + np.floor(note_random(keys, stream) * (high - low + 1)).astype(np.int64)
+
+def phrase_swell(index, phrase_length=8):
+    """8음 프레이즈 크레셴도/정점/디미누엔도 배율 (0-2번째 0.85→0.95, 3-5번째 1.0, 6-7번째 0.9→0.85)"""
+    position = np.asarray(index) % phrase_length
+    return np.where(position < 3, 0.85 + position * 0.05,
+                    np.where(position < 6, 1.0, 0.95 - (position - 5) * 0.05))
+
+def phrase_arc(count, phrase_length=6):
+    """phrase_length음 단위 프레이즈마다 가운데가 가장 강한 사인 곡선 배율 (0.95 - 1.05)"""
+    index = np.arange(count)
+    phrase_start = index - index % phrase_length
+    length = np.minimum(phrase_length, count - phrase_start)
+    position = (index - phrase_start) / np.maximum(length - 1, 1)
+    return 0.95 + 0.1 * np.sin(position * np.pi)
+
+def section_dynamics(count):
+    """곡 전체 위치에 따른 배율: 앞 10% 도입부 0.8, 뒤 10% 결말부 0.85, 나머지 1.0"""
+    position_ratio = np.arange(count) / max(count - 1, 1)
+    return np.where(position_ratio < 0.1, 0.8, np.where(position_ratio > 0.9, 0.85, 1.0))
+
+def duration_dynamics(duration):
+    """노트 길이에 따른 배율: 1.5초 넘는 긴 노트 0.9, 0.2초 미만 짧은 노트 1.1"""
+    return np.where(duration > 1.5, 0.9, np.where(duration < 0.2, 1.1, 1.0))
+
+def beat_accents(start, duration, velocity):
+    """
+    평균 노트 길이로 박 길이를 추정해서 마디 첫 박은 ×1.15 (최대 115), 셋째 박은 ×1.08 (최대 110)
+    노트가 4개 미만이면 그대로
+    """
+    velocity = np.asarray(velocity, dtype=np.int64)
+    if len(velocity) < 4:
+        return velocity
+    beat_duration = max(0.5, float(np.mean(duration)) * 2)
+    beat_position = np.mod(start, beat_duration * 4) / beat_duration
+    downbeat = (beat_position < 0.1) | (beat_position > 3.9)
+    third_beat = ~downbeat & (np.abs(beat_position - 2) < 0.1)
+    return np.where(downbeat, np.minimum(115, (velocity * 1.15).astype(np.int64)),
+                    np.where(third_beat, np.minimum(110, (velocity * 1.08).astype(np.int64)), velocity))
+
+def jitter_timing(start, end, keys, max_shift, min_length, overlap_gap):
+    """
+    타이밍 흔들림 ±max_shift (노트 길이는 최소 min_length)
+    흔들린 노트가 직전 노트(조정 후)와 겹치면 직전 끝 + overlap_gap으로 밀어냄
+    직전 노트에 의존하는 순차 규칙을 배열 연산 반복으로 풀고 (보통 2-3회), 연쇄가 길면 남은 구간만 순서대로 처리
+    """
+    shift = note_uniform(keys, -max_shift, max_shift, STREAM_TIMING)
+    jittered_start = np.maximum(0, start + shift)
+    jittered_end = np.maximum(jittered_start + min_length, end + shift)
+
+    def resolve(prev_end):
+        overlap = jittered_start < prev_end
+        new_start = np.where(overlap, prev_end + overlap_gap, jittered_start)
+        return new_start, np.where(overlap, np.maximum(new_start + min_length, jittered_end), jittered_end)
+
+    new_start, new_end = jittered_start, jittered_end
+    for _ in range(8):
+        next_start, next_end = resolve(np.concatenate([[-np.inf], new_end[:-1]]))
+        changed = next_end != new_end
+        new_start, new_end = next_start, next_end
+        if not changed.any():
+            return new_start, new_end
+
+    # 겹침 연쇄가 긴 경우: 아직 바뀌는 첫 노트 앞은 이미 확정, 그 노트부터 순서대로 처리
+    first = int(np.flatnonzero(changed)[0])
+    for i in range(max(first, 1), len(new_end)):
+        if jittered_start[i] < new_end[i - 1]:
+            new_start[i] = new_end[i - 1] + overlap_gap
+            new_end[i] = max(new_start[i] + min_length, jittered_end[i])
+        else:
+            new_start[i], new_end[i] = jittered_start[i], jittered_end[i]
+    return new_start, new_end
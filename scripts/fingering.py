@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+동적 계획법 운지 최적화
+노트마다 가능한 (현, 프렛) 후보 중에서 곡 전체의 손 이동 비용이 가장 작은 조합을 Viterbi로 선택
+- 상태: 현 인덱스 (현마다 프렛은 음높이로 결정되므로 후보 K ≤ 현 수), O(N·K²)
+- 노트 비용: 높은 프렛일수록 조금씩, 12프렛 위는 추가 비용
+- 전이 비용: 같은 화음 안에서는 높은 음이 높은 현, 다음 온셋으로는
+  프렛 이동 거리(간격이 길수록 덜 부담) + 현 건너뛰기
+- 손가락 벌림: 화음 전체에서 누른 프렛의 폭(최대 - 최소), 경로마다 폭을 따라가며 누적
+- 현보다 음이 많거나 두 음이 같은 현에 배정된 화음은 현마다 가장 높은 음만 남기고 제외 (개수 출력)
+"""
+
+import numpy as np
+from fretboard import get_fretboard, STANDARD_TUNING
+from note_array import NoteArray
+
+CHORD_WINDOW = 0.03     # 이 간격 안에 시작하는 노트는 같은 화음
+FRET_HEIGHT_COST = 0.1  # 프렛당 비용 (낮은 포지션 선호)
+HIGH_FRET = 12
+HIGH_FRET_COST = 1.0
+MOVE_COST = 1.0         # 프렛 이동 1칸당 비용
+MOVE_RELAX_SECONDS = 0.5  # 노트 간격이 이만큼이면 이동 비용 절반
+STRING_JUMP_COST = 0.3  # 현 1개 건너뛸 때 비용
+MAX_STRETCH = 4         # 한 화음 안에서 손가락 벌림 허용 프렛 수 (누른 프렛 최대 - 최소)
+STRETCH_COST = 2.0      # 허용 범위를 넘는 프렛당 비용
+CHORD_ORDER_COST = 100.0  # 화음에서 같은 현/역순 현 배정 (사실상 금지, 불가능한 화음도 결과는 냄)
+UNPLAYABLE_COST = 1e9
+
+def chord_ids(start, window=CHORD_WINDOW):
+    """시작 시각 순으로 정렬된 노트 → 화음 번호 (직전 노트와 window 이내면 같은 화음)"""
+    if len(start) == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.concatenate([[0], np.cumsum(np.diff(start) > window)])
+
+def position_costs(frets):
+    """(N, 현) 프렛 행렬 → 노트 비용, 해당 현에서 낼 수 없으면 UNPLAYABLE_COST"""
+    cost = FRET_HEIGHT_COST * frets + HIGH_FRET_COST * (frets > HIGH_FRET)
+    return np.where(frets >= 0, cost, UNPLAYABLE_COST)
+
+def transition_costs(frets, start, chords):
+    """연속한 노트 쌍마다 (이전 현, 다음 현) 전이 비용, (N - 1, 현, 현)"""
+    prev_fret = frets[:-1, :, np.newaxis].astype(np.float64)
+    next_fret = frets[1:, np.newaxis, :].astype(np.float64)
+    strings = np.arange(frets.shape[1])
+    string_jump = np.abs(strings[:, np.newaxis] - strings[np.newaxis, :])
+
+    # 개방현은 손 위치와 무관 (이동 거리 0)
+    fretted = (prev_fret > 0) & (next_fret > 0)
+    distance = np.where(fretted, np.abs(next_fret - prev_fret), 0.0)
+
+    # 다른 온셋으로 이동: 간격이 길수록 이동 부담이 줄어듦
+    gap = np.maximum(np.diff(start), 0.0)[:, np.newaxis, np.newaxis]
+    move = MOVE_COST * distance / (1.0 + gap / MOVE_RELAX_SECONDS) + STRING_JUMP_COST * string_jump
+
+    # 같은 화음 안: 음높이 순서대로 더 높은 현 (손가락 벌림은 viterbi에서 화음 전체 폭으로 계산)
+    order_violation = strings[np.newaxis, :] <= strings[:, np.newaxis]
+    in_chord = np.broadcast_to(CHORD_ORDER_COST * order_violation, move.shape)
+
+    same_chord = (chords[1:] == chords[:-1])[:, np.newaxis, np.newaxis]
+    return np.where(same_chord, in_chord, move)
+
+def stretch_cost(span):
+    """화음에서 누른 프렛 폭 → 손가락 벌림 비용"""
+    return STRETCH_COST * np.maximum(span - MAX_STRETCH, 0.0)
+
+def _span(low, high):
+    return np.where(high >= low, high - low, 0.0)
+
+def viterbi(node_costs, edge_costs, frets=None, chords=None):
+    """
+    노트 비용 (N, K) + 전이 비용 (N - 1, K, K) → 총 비용이 최소인 상태 경로 (N,)
+    frets/chords가 있으면 상태마다 최선 경로의 화음 안 누른 프렛 최소/최대를 따라가며
+    폭이 늘어난 만큼 stretch_cost를 더함 (선택된 경로의 벌림 비용은 화음 전체 폭 기준으로 정확)
+    """
+    count, states = node_costs.shape
+    back = np.zeros(node_costs.shape, dtype=np.int64)
+    total = node_costs[0]
+    track = frets is not None
+    if track:
+        pressed = frets[0] > 0
+        low = np.where(pressed, frets[0], np.inf)
+        high = np.where(pressed, frets[0], -np.inf)
+
+    for i in range(1, count):
+        candidates = total[:, np.newaxis] + edge_costs[i - 1]
+        same_chord = track and chords[i] == chords[i - 1]
+        if same_chord:
+            fret = frets[i].astype(np.float64)
+            pressed = (fret > 0)[np.newaxis, :]
+            new_low = np.where(pressed, np.minimum(low[:, np.newaxis], fret[np.newaxis, :]), low[:, np.newaxis])
+            new_high = np.where(pressed, np.maximum(high[:, np.newaxis], fret[np.newaxis, :]), high[:, np.newaxis])
+            candidates = candidates + stretch_cost(_span(new_low, new_high)) - stretch_cost(_span(low, high))[:, np.newaxis]
+
+        back[i] = np.argmin(candidates, axis=0)
+        total = candidates[back[i], np.arange(states)] + node_costs[i]
+
+        if same_chord:
+            low = new_low[back[i], np.arange(states)]
+            high = new_high[back[i], np.arange(states)]
+        elif track:
+            pressed = frets[i] > 0
+            low = np.where(pressed, frets[i], np.inf)
+            high = np.where(pressed, frets[i], -np.inf)
+
+    path = np.zeros(count, dtype=np.int64)
+    path[-1] = int(np.argmin(total))
+    for i in range(count - 1, 0, -1):
+        path[i - 1] = back[i, path[i]]
+    return path
+
+def drop_string_collisions(notes):
+    """
+    화음 안에서 같은 현에 배정된 음은 가장 높은 음만 남김 (현보다 음이 많은 화음 등)
+    반환: (남은 NoteArray, 제외한 음 수)
+    """
+    if len(notes) == 0:
+        return notes, 0
+    chords = chord_ids(notes.start)
+    # 같은 (화음, 현) 안에서 마지막 = 가장 높은 음
+    order = np.lexsort((notes.pitch, notes.string, chords))
+    key = np.stack([chords[order], notes.string[order].astype(np.int64)])
+    last = np.ones(len(order), dtype=bool)
+    last[:-1] = np.any(key[:, 1:] != key[:, :-1], axis=0)
+    keep = np.zeros(len(notes), dtype=bool)
+    keep[order[last]] = True
+    dropped = int(len(notes) - keep.sum())
+    return (NoteArray(notes.data[keep]) if dropped else notes), dropped
+
+def optimize_fingering(notes, tuning=STANDARD_TUNING, capo=0, max_fret=15):
+    """
+    NoteArray → string/fret이 채워진 NoteArray (시작 시각, 같은 화음 안에서는 음높이 순)
+    연주할 수 없는 음은 옥타브 조정 후 가장 가까운 연주 가능한 음으로 바꿔서 배정
+    한 화음에서 같은 현에 겹치는 음은 drop_string_collisions로 제외
+    """
+    fretboard = get_fretboard(tuning, capo=capo, max_fret=max_fret)
+    if len(notes) == 0:
+        return NoteArray()
+
+    notes = notes.sorted_by_start()
+    chords = chord_ids(notes.start)
+    notes = NoteArray(notes.data[np.lexsort((notes.pitch, chords))])
+    notes.pitch[:] = fretboard.nearest_pitch(notes.pitch)
+
+    frets = fretboard.string_frets[notes.pitch].astype(np.int64)
+    path = viterbi(position_costs(frets), transition_costs(frets, notes.start, chords), frets, chords)
+
+    notes.string[:] = path
+    notes.fret[:] = frets[np.arange(len(notes)), path]
+    notes, dropped = drop_string_collisions(notes)
+    if dropped:
+        print(f"⚠️ 현 수를 넘거나 같은 현에 겹친 화음 음 {dropped}개 제외")
+    return notes
+
+def greedy_fingering(notes, tuning=STANDARD_TUNING, capo=0, max_fret=15):
+    """비교용: 노트마다 가장 낮은 프렛 (GuitarTabGenerator 방식)"""
+    fretboard = get_fretboard(tuning, capo=capo, max_fret=max_fret)
+    notes = notes.sorted_by_start()
+    notes = NoteArray(notes.data[np.lexsort((notes.pitch, chord_ids(notes.start)))])
+    notes.pitch[:] = fretboard.nearest_pitch(notes.pitch)
+    notes.string[:] = fretboard.best_string[notes.pitch]
+    notes.fret[:] = fretboard.best_fret[notes.pitch]
+    return notes
+
+def fingering_cost(notes):
+    """배정된 운지의 총 비용 (optimize_fingering이 최소화하는 값)"""
+    if len(notes) == 0:
+        return 0.0
+    strings = notes.string.astype(np.int64)
+    frets = np.full((len(notes), int(strings.max()) + 1), -1, dtype=np.int64)
+    frets[np.arange(len(notes)), strings] = notes.fret
+    chords = chord_ids(notes.start)
+    node = position_costs(frets)[np.arange(len(notes)), strings].sum()
+    edge = transition_costs(frets, notes.start, chords)[np.arange(len(notes) - 1), strings[:-1], strings[1:]].sum()
+
+    # 화음마다 누른 프렛 폭
+    pressed = notes.fret > 0
+    stretch = 0.0
+    for chord in np.unique(chords[pressed]):
+        chord_frets = notes.fret[pressed & (chords == chord)]
+        stretch += float(stretch_cost(float(chord_frets.max() - chord_frets.min())))
+    return float(node + edge + stretch)
+
+def format_ascii_tab(notes, string_names=("E", "A", "D", "G", "B", "e"), columns_per_line=24):
+    """
+    운지가 배정된 NoteArray → 6줄 ASCII TAB (고음현이 위, 화음은 한 열, columns_per_line열마다 줄바꿈)
+    한 열에서 같은 현에 겹치는 음은 덮어쓰지 않고 가장 높은 음만 표시 (제외 개수 출력)
+    """
+    if len(notes) == 0:
+        return ""
+    notes, dropped = drop_string_collisions(notes)
+    if dropped:
+        print(f"⚠️ TAB 한 열에서 같은 현에 겹친 음 {dropped}개 생략")
+    chords = chord_ids(notes.start)
+    string_count = len(string_names)
+    blocks = []
+    bounds = np.concatenate([[0], np.flatnonzero(np.diff(chords)) + 1, [len(notes)]])
+
+    for line_start in range(0, len(bounds) - 1, columns_per_line):
+        lines = [f"{string_names[string]}|" for string in reversed(range(string_count))]
+        for begin, end in zip(bounds[line_start:line_start + columns_per_line], bounds[line_start + 1:line_start + columns_per_line + 1]):
+            column = ["-"] * string_count
+            for string, fret in zip(notes.string[begin:end].tolist(), notes.fret[begin:end].tolist()):
+                column[string_count - 1 - string] = str(fret)
+            width = max(len(text) for text in column)
+            for row, text in enumerate(column):
+                lines[row] += "-" + text.rjust(width, "-")
+        blocks.append("\n".join(line + "-|" for line in lines))
+
+    return "\n\n".join(blocks) + "\n"
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+지판 인덱스
+튜닝 / 카포 / 최대 프렛 설정마다 MIDI 0-127 전체에 대한 조회 테이블을 한 번만 만들어 재사용
+- 음높이 → 가능한 (현, 프렛) 목록, 가장 낮은 프렛 위치
+- 옥타브 접기 (연주 가능 범위 안으로), 가장 가까운 연주 가능 음높이
+현 인덱스는 튜닝 순서 (표준 튜닝이면 0 = 6번 저음 E현), 프렛은 카포 기준
+"""
+
+from functools import lru_cache
+import numpy as np
+from note_array import fold_octaves
+
+# 저음현 → 고음현 (MIDI 노트 번호)
+TUNINGS = {
+    "standard": (40, 45, 50, 55, 59, 64),        # E A D G B E
+    "drop_d": (38, 45, 50, 55, 59, 64),          # D A D G B E
+    "half_step_down": (39, 44, 49, 54, 58, 63),  # Eb Ab Db Gb Bb Eb
+    "open_g": (38, 43, 50, 55, 59, 62),          # D G D G B D
+    "dadgad": (38, 45, 50, 55, 57, 62),          # D A D G A D
+}
+STANDARD_TUNING = TUNINGS["standard"]
+DEFAULT_MAX_FRET = 15  # 실용적인 15프렛까지
+NO_FRET = -1
+
+class FretboardIndex:
+    """한 가지 튜닝/카포/최대 프렛 설정의 조회 테이블 (get_fretboard로 공유해서 사용)"""
+
+    def __init__(self, tuning=STANDARD_TUNING, capo=0, max_fret=DEFAULT_MAX_FRET):
+        if isinstance(tuning, str):
+            tuning = TUNINGS[tuning]
+        if not 0 <= capo <= max_fret:
+            raise ValueError(f"카포 위치가 프렛 범위를 벗어났습니다: {capo}")
+
+        self.tuning = tuple(int(pitch) for pitch in tuning)
+        self.capo = capo
+        self.max_fret = max_fret
+        self.open_pitches = np.asarray(self.tuning, dtype=np.int64) + capo
+
+        # (128, 현) 프렛 행렬, 카포 위에서 max_fret - capo 프렛까지만 연주 가능
+        frets = np.arange(128)[:, np.newaxis] - self.open_pitches[np.newaxis, :]
+        playable = (frets >= 0) & (frets <= max_fret - capo)
+        self.string_frets = np.where(playable, frets, NO_FRET).astype(np.int16)
+        self.playable = playable.any(axis=1)
+        if not self.playable.any():
+            raise ValueError("연주 가능한 음이 없습니다")
+
+        # 가장 낮은 프렛 위치 (같은 프렛이면 앞쪽 현)
+        masked = np.where(playable, frets, np.iinfo(np.int64).max)
+        self.best_string = np.where(self.playable, np.argmin(masked, axis=1), NO_FRET).astype(np.int8)
+        self.best_fret = np.where(self.playable, masked.min(axis=1), NO_FRET).astype(np.int16)
+
+        playable_pitches = np.flatnonzero(self.playable)
+        self.min_pitch = int(playable_pitches[0])
+        self.max_pitch = int(playable_pitches[-1])
+
+        # 옥타브 접기 후 가장 가까운 연주 가능 음 (거리가 같으면 낮은 음)
+        pitches = np.arange(128)
+        right = np.clip(np.searchsorted(playable_pitches, pitches), 0, len(playable_pitches) - 1)
+        left = np.clip(right - 1, 0, len(playable_pitches) - 1)
+        use_left = np.abs(pitches - playable_pitches[left]) <= np.abs(playable_pitches[right] - pitches)
+        self._nearest_table = np.where(use_left, playable_pitches[left], playable_pitches[right])
+
+    @property
+    def playable_pitches(self):
+        return np.flatnonzero(self.playable)
+
+    def fold(self, pitch):
+        """옥타브 단위로 연주 가능 범위 [min_pitch, max_pitch] 안으로 이동"""
+        return fold_octaves(pitch, self.min_pitch, self.max_pitch)
+
+    def nearest_pitch(self, pitch):
+        """연주 가능하면 그대로, 아니면 옥타브 접기 후 가장 가까운 연주 가능 음 (스칼라/배열)"""
+        pitch = np.asarray(pitch, dtype=np.int64)
+        in_table = (pitch >= 0) & (pitch < 128)
+        playable = in_table & self.playable[np.clip(pitch, 0, 127)]
+        nearest = np.where(playable, pitch, self._nearest_table[self.fold(pitch)])
+        return int(nearest) if nearest.ndim == 0 else nearest
+
+    def positions(self, pitch):
+        """이 음을 낼 수 있는 (현, 프렛) 목록 (현 순서)"""
+        if not 0 <= pitch < 128:
+            return []
+        frets = self.string_frets[pitch]
+        return [(string, int(frets[string])) for string in np.flatnonzero(frets >= 0).tolist()]
+
+    def lowest_position(self, pitch):
+        """가장 낮은 프렛 (현, 프렛), 연주할 수 없으면 None"""
+        if not 0 <= pitch < 128 or not self.playable[pitch]:
+            return None
+        return int(self.best_string[pitch]), int(self.best_fret[pitch])
+
+@lru_cache(maxsize=None)
+def _cached_fretboard(tuning, capo, max_fret):
+    return FretboardIndex(tuning, capo, max_fret)
+
+def get_fretboard(tuning=STANDARD_TUNING, capo=0, max_fret=DEFAULT_MAX_FRET):
+    """설정별로 한 번만 만든 FretboardIndex 반환 (tuning은 MIDI 음높이 목록 또는 TUNINGS 이름)"""
+    if isinstance(tuning, str):
+        tuning = TUNINGS[tuning]
+    return _cached_fretboard(tuple(int(pitch) for pitch in tuning), int(capo), int(max_fret))
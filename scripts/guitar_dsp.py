@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+기타 스템 후처리 DSP
+- low_cut: 극저주파 감쇠 (HPSS 전에 적용, 기존 STFT 마스크 stft[freqs < 50] *= 0.1 대신)
+  신호 - (1 - low_gain) × 저역통과(신호), 영위상(sosfiltfilt)이라 차단 주파수 위는 그대로 통과
+- GuitarPostChain: 보컬 감산 → 노이즈 게이트 → 게인을 고정 크기 블록 단위로 한 번에 처리
+  두 채널을 동시에 처리하므로 스트리밍(윈도우 단위) 분리 결과에도 그대로 이어서 적용 가능
+- 게이트 기준은 기존처럼 파일 전체 최대값: 스트리밍은 process_stream으로 게이트 전 신호를
+  임시 파일에 쌓았다가 최대값이 정해진 뒤 게이트 (일괄 처리와 같은 결과)
+"""
+
+import tempfile
+import numpy as np
+from scipy import signal
+
+BLOCK_FRAMES = 65536  # 블록 크기 (약 1.5초 @ 44.1kHz)
+LOWCUT_HZ = 50.0      # 극저주파 기준 (베이스 기본음)
+LOW_GAIN = 0.1        # 기준 아래 성분 배율
+
+def low_cut(audio, sr, cutoff_hz=LOWCUT_HZ, low_gain=LOW_GAIN):
+    """
+    (channels, n) 신호의 cutoff_hz 아래 성분만 low_gain배 (6차 버터워스 저역통과를 앞뒤로 한 번씩, 위상 왜곡 없음)
+    6차: 기존 STFT 마스크(2048점, 빈 사이 누설 포함)의 경계 기울기와 가장 가까움
+    윈도우 단위로 처리할 때는 윈도우마다 호출 (양 끝의 과도 응답은 크로스페이드 구간 안에 들어감)
+    """
+    sos = signal.butter(6, cutoff_hz, btype='low', fs=sr, output='sos')
+    low = signal.sosfiltfilt(sos, audio, axis=-1)
+    return (audio - (1.0 - low_gain) * low).astype(np.float32)
+
+class GuitarPostChain:
+    """블록 단위 기타 후처리 체인 (채널 × 샘플 배열 입력)"""
+
+    def __init__(self, sr, channels=2, vocal_reduction=0.1,
+                 gate_ratio=0.005, gate_floor=0.1, gain=1.0, block_frames=BLOCK_FRAMES):
+        self.vocal_reduction = vocal_reduction  # 보컬 감산 비율
+        self.gate_ratio = gate_ratio            # 게이트 기준: 전체 최대값의 0.5%
+        self.gate_floor = gate_floor            # 게이트 아래 신호 배율
+        self.gain = gain
+        self.block_frames = block_frames
+
+        # 채널별 누적 최대값 (게이트 기준, 파일 전체를 다 본 뒤의 값을 사용)
+        self.peak = np.zeros(channels)
+
+    def filter_block(self, guitar, vocals=None):
+        """(channels, n) 블록의 게이트 전 단계 (보컬 감산), 채널별 최대값은 다음 블록으로 이어짐"""
+        audio = np.array(guitar, dtype=np.float64)
+        if vocals is not None:
+            audio -= self.vocal_reduction * vocals
+        audio = audio.astype(np.float32)
+
+        if audio.shape[1]:
+            self.peak = np.maximum(self.peak, np.max(np.abs(audio), axis=1))
+        return audio
+
+    def gate(self, audio):
+        """노이즈 게이트 (파일 전체 최대값의 0.5% 미만은 0.1배) + 게인, 모든 블록을 filter_block에 통과시킨 뒤 호출"""
+        threshold = (self.gate_ratio * self.peak)[:, np.newaxis]
+        audio = np.where(np.abs(audio) < threshold, audio * self.gate_floor, audio)
+        return (audio * self.gain).astype(np.float32)
+
+    def process(self, guitar, vocals=None):
+        """(channels, n) 신호 전체를 고정 크기 블록으로 나눠 처리 (게이트 기준은 신호 전체 최대값)"""
+        output = np.empty(guitar.shape, dtype=np.float32)
+        for start in range(0, guitar.shape[1], self.block_frames):
+            block = slice(start, start + self.block_frames)
+            output[:, block] = self.filter_block(guitar[:, block], None if vocals is None else vocals[:, block])
+        for start in range(0, guitar.shape[1], self.block_frames):
+            block = slice(start, start + self.block_frames)
+            output[:, block] = self.gate(output[:, block])
+        return output
+
+    def process_stream(self, blocks, out, spool_dir=None):
+        """
+        (guitar, vocals) 블록들을 순서대로 처리해서 out.write로 기록, 반환: 기록한 프레임 수
+        게이트 기준(전체 최대값)은 끝까지 봐야 정해지므로 1차로 게이트 전 신호를 임시 파일(float32)에 쌓고
+        2차로 게이트를 적용해서 기록 → 메모리는 블록 크기에만 비례하고 결과는 process()와 같음
+        spool_dir: 임시 파일 위치 (/tmp가 메모리 tmpfs일 수 있으므로 보통 출력 파일 디렉터리)
+        """
+        channels = len(self.peak)
+        frames = 0
+        with tempfile.TemporaryFile(dir=spool_dir, prefix="guitar_chain_") as spool:
+            for guitar, vocals in blocks:
+                for start in range(0, guitar.shape[1], self.block_frames):
+                    block = slice(start, start + self.block_frames)
+                    audio = self.filter_block(guitar[:, block], None if vocals is None else vocals[:, block])
+                    spool.write(np.ascontiguousarray(audio.T).tobytes())
+                    frames += audio.shape[1]
+            spool.flush()
+
+            if frames:
+                pre_gate = np.memmap(spool, dtype=np.float32, mode="r", shape=(frames, channels))
+                for start in range(0, frames, self.block_frames):
+                    out.write(self.gate(pre_gate[start:start + self.block_frames].T))
+                del pre_gate
+        return frames
@@ -8,15 +8,17 @@ import sys
 import os
 import argparse
 import torch
-import soundfile as sf
-from demucs.pretrained import get_model
-from demucs.apply import apply_model
+from demucs_engine import load_separation_model, separate_stems, PRECISIONS
+from stem_format import save_audio
 import librosa
 import numpy as np
 
-def separate_guitar(input_path, output_path):
+def separate_guitar(input_path, output_path, model=None, workers=None, precision=None):
     """
     Demucs v4를 사용하여 기타 음원 분리
+    model: 미리 로드된 Demucs 모델 (스테이지 서버에서 전달, 없으면 새로 로드)
+    workers: CPU 구간 병렬 분리 워커 수 (None이면 DEMUCS_WORKERS 환경변수)
+    precision: fp32 / int8 / bf16 CPU 추론 정밀도 (None이면 DEMUCS_PRECISION 환경변수)
     """
     try:
         print(f"🎸 기타 분리 시작: {input_path}")
@@ -27,10 +29,8 @@ def separate_guitar(input_path, output_path):
         
         # Demucs 모델 로드 (htdemucs는 4-stem separation: drums, bass, other, vocals)
         # 하지만 기타는 주로 'other' 채널에 들어감
-        print("📥 Demucs 모델 로딩...")
-        model = get_model('htdemucs')
-        model.to(device)
-        model.eval()
+        if model is None:
+            model = load_separation_model('htdemucs', device)
         
         # 오디오 로드
         print("📥 오디오 로딩...")
@@ -44,18 +44,14 @@ def separate_guitar(input_path, output_path):
             
         print(f"📊 오디오 형태: {waveform.shape}, 샘플링 레이트: {sr}")
         
-        # PyTorch 텐서로 변환
-        waveform_tensor = torch.from_numpy(waveform).float().unsqueeze(0).to(device)
-        
-        # Demucs 적용
+        # Demucs 적용 (workers가 2 이상이면 구간을 나눠 여러 프로세스에서 동시에 분리)
         print("🔄 Demucs로 음원 분리 중...")
-        with torch.no_grad():
-            # apply_model returns: drums, bass, other, vocals
-            sources = apply_model(model, waveform_tensor, split=True, overlap=0.25)
         
         # 기타는 주로 'other' 스템에 포함됨 (인덱스 2)
         # 하지만 더 나은 기타 추출을 위해 'other' + 일부 'vocals' 조합 시도
-        drums, bass, other, vocals = sources[0].cpu().numpy()
+        drums, bass, other, vocals = separate_stems(
+            model, waveform, overlap=0.25, workers=workers, precision=precision
+        )
         
         print("🎸 기타 음원 추출 중...")
         
@@ -83,8 +79,8 @@ def separate_guitar(input_path, output_path):
         # 스테레오 형태로 저장
         guitar_stereo = guitar_final.T  # (time, channels)
         
-        # WAV 파일로 저장
-        sf.write(output_path, guitar_stereo, sr)
+        # WAV 파일로 저장 (.stem 경로면 float16 memmap 스템)
+        save_audio(output_path, guitar_final, sr)
         
         # 결과 정보
         duration = len(guitar_stereo) / sr
@@ -115,6 +111,10 @@ def main():
     parser = argparse.ArgumentParser(description='기타 음원 분리')
     parser.add_argument('input_path', help='입력 오디오 파일 경로')
     parser.add_argument('output_path', help='출력 기타 오디오 파일 경로')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='CPU 구간 병렬 분리 워커 수 (기본: DEMUCS_WORKERS 환경변수 또는 1)')
+    parser.add_argument('--precision', choices=PRECISIONS, default=None,
+                        help='CPU 추론 정밀도 (기본: DEMUCS_PRECISION 환경변수 또는 fp32)')
     
     args = parser.parse_args()
     
@@ -125,7 +125,8 @@ def main():
     # 출력 디렉토리 생성
     os.makedirs(os.path.dirname(args.output_path), exist_ok=True)
     
-    result = separate_guitar(args.input_path, args.output_path)
+    result = separate_guitar(args.input_path, args.output_path, workers=args.workers,
+                             precision=args.precision)
     
     if result["success"]:
         print("🎉 기타 분리 성공!")
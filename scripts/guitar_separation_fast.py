@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+빠른 기타 분리 (신경망 없음)
+대기열이 밀렸을 때/미리보기용으로 Demucs 대신 사용하는 가벼운 분리기
+- HPSS 하모닉 마스크로 드럼 억제
+- 기타 음역대(약 70Hz ~ 6kHz) 스펙트럼 마스크로 베이스/심벌 억제
+- Mid/Side 비율로 가운데 정위 성분(보컬, 킥, 베이스) 감쇠
+출력 형식은 separate_guitar_enhanced와 동일 (스테레오, 원본 샘플링 레이트, .stem 또는 PCM_16 WAV)
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import librosa
+import soundfile as sf
+from audio_windows import read_windows, OverlapCrossfader
+from fast_hpss import harmonic_mask
+from guitar_dsp import GuitarPostChain, low_cut
+from stem_format import open_audio_writer
+
+SEGMENT_SECONDS = 30.0  # 윈도우 길이
+OVERLAP_SECONDS = 1.0   # 윈도우 간 크로스페이드 길이 (HPSS 필터 폭보다 충분히 김)
+N_FFT = 2048
+HOP_LENGTH = 512
+
+GUITAR_LOW_HZ = 70.0     # 저음 E(82Hz) 바로 아래
+GUITAR_HIGH_HZ = 6000.0  # 배음 상한
+HARMONIC_WEIGHT = 1.0
+PERCUSSIVE_WEIGHT = 0.1
+CENTER_REDUCTION = 0.4   # 완전히 가운데 정위된 성분 감쇠 비율
+
+def band_mask(sr, n_fft=N_FFT, low_hz=GUITAR_LOW_HZ, high_hz=GUITAR_HIGH_HZ):
+    """기타 음역대 주파수 가중치 (2차 버터워스 HP × LP 크기 응답), (freq, 1) 형태"""
+    freqs = np.maximum(librosa.fft_frequencies(sr=sr, n_fft=n_fft), 1e-3)
+    highpass = 1.0 / np.sqrt(1.0 + (low_hz / freqs) ** 4)
+    lowpass = 1.0 / np.sqrt(1.0 + (freqs / high_hz) ** 4)
+    return (highpass * lowpass).astype(np.float32)[:, np.newaxis]
+
+def center_mask(stft, center_reduction=CENTER_REDUCTION):
+    """
+    Mid/Side 에너지 비율로 가운데 정위 성분 감쇠, (freq, time) 형태
+    가운데(L=R) → 1 - center_reduction, 한쪽으로 완전히 패닝 → 1
+    """
+    mid = np.abs(stft[0] + stft[1]) ** 2
+    side = np.abs(stft[0] - stft[1]) ** 2
+    centered = mid / (mid + side + 1e-12)  # 가운데 1, 한쪽 패닝 0.5
+    centered = np.clip(2.0 * centered - 1.0, 0.0, 1.0)
+    return 1.0 - center_reduction * centered
+
+def separate_block(block, sr, band=None):
+    """(2, n) 스테레오 블록 → 기타 성분 (2, n)"""
+    stft = librosa.stft(block, n_fft=N_FFT, hop_length=HOP_LENGTH)
+    if band is None:
+        band = band_mask(sr)
+
+    harmonic = harmonic_mask(np.abs(stft))
+    mask = PERCUSSIVE_WEIGHT + (HARMONIC_WEIGHT - PERCUSSIVE_WEIGHT) * harmonic
+    mask *= band
+    mask *= center_mask(stft)
+    return librosa.istft(stft * mask, hop_length=HOP_LENGTH, length=block.shape[1])
+
+def open_windows(input_path, segment_seconds=SEGMENT_SECONDS, overlap_seconds=OVERLAP_SECONDS):
+    """(샘플링 레이트, 윈도우 generator), soundfile로 못 읽는 포맷은 librosa로 전체 로드 후 분할"""
+    try:
+        sr = sf.info(input_path).samplerate
+    except RuntimeError:
+        audio, sr = librosa.load(input_path, sr=None, mono=False)
+        return sr, _array_windows(audio, int(segment_seconds * sr), int(overlap_seconds * sr))
+    return sr, read_windows(input_path, int(segment_seconds * sr), int(overlap_seconds * sr))
+
+def _array_windows(audio, window_frames, overlap_frames):
+    """메모리에 있는 오디오를 read_windows와 같은 형식으로 분할"""
+    if audio.ndim == 1:
+        audio = np.stack([audio, audio])
+    total = audio.shape[1]
+    hop = window_frames - overlap_frames
+    for start in range(0, total, hop):
+        last = start + window_frames >= total
+        yield start, audio[:, start:start + window_frames], last
+        if last:
+            break
+
+def separate_guitar_fast(input_path, output_path):
+    """
+    신경망 없이 기타 성분 추출 (윈도우 단위로 처리해서 메모리 사용량 일정)
+    반환: 처리 정보 dict
+    """
+    try:
+        print("⚡ 빠른 기타 분리 시작 (Demucs 없음)...")
+        started = time.time()
+
+        sr, windows = open_windows(input_path)
+        band = band_mask(sr)
+        crossfader = OverlapCrossfader(int(OVERLAP_SECONDS * sr))
+        chain = GuitarPostChain(sr, channels=2, vocal_reduction=0.0)
+        # 극저주파 감쇠는 Demucs 경로와 같이 HPSS 전에 윈도우 단위로
+        finished_blocks = ((crossfader.push(separate_block(low_cut(block, sr), sr, band), last), None)
+                           for start, block, last in windows)
+
+        # 게이트는 곡 전체 최대값 기준 (게이트 전 신호를 출력 옆 임시 파일에 쌓았다가 기록)
+        with open_audio_writer(output_path, sr, channels=2) as out:
+            written = chain.process_stream(finished_blocks, out,
+                                           spool_dir=os.path.dirname(os.path.abspath(output_path)))
+
+        elapsed = time.time() - started
+        duration = written / sr
+        print(f"✅ 빠른 기타 파일 저장: {output_path}")
+        print(f"📊 길이 {duration:.2f}초, 처리 {elapsed:.2f}초 (실시간의 {duration / max(elapsed, 1e-6):.1f}배)")
+        return {"success": True, "output_path": output_path, "duration": duration, "elapsed": elapsed}
+
+    except Exception as e:
+        print(f"❌ 빠른 기타 분리 오류: {e}")
+        return {"success": False, "error": str(e)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='빠른 기타 음원 분리 (신경망 없음)')
+    parser.add_argument('input_path', help='입력 오디오 파일 경로')
+    parser.add_argument('output_path', help='출력 기타 오디오 파일 경로')
+
+    args = parser.parse_args()
+    result = separate_guitar_fast(args.input_path, args.output_path)
+    sys.exit(0 if result["success"] else 1)
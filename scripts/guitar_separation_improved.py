@@ -1,28 +1,48 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import torch
 import torchaudio
 import numpy as np
-import librosa
 import soundfile as sf
-from demucs.pretrained import get_model
-from demucs.apply import apply_model
+from demucs_engine import get_device, separate_stems_cached, PRECISIONS
+from audio_windows import read_windows, OverlapCrossfader
+from stem_cache import StemCache
+from stem_format import save_audio, open_audio_writer
+from guitar_dsp import GuitarPostChain, low_cut
+from fast_hpss import hpss_mix
+import argparse
+import os
 import sys
 
-def separate_guitar_enhanced(input_path, output_path):
+# 이 길이(초) 이상인 곡은 윈도우 단위 스트리밍 분리 사용 (4GB 컨테이너 OOM 방지)
+STREAMING_MIN_SECONDS = 360
+SEGMENT_SECONDS = 30.0  # 스트리밍 윈도우 길이
+OVERLAP_SECONDS = 5.0   # 윈도우 간 크로스페이드 길이
+MODEL_NAME = "htdemucs"  # 더 정확한 High-quality 모델
+
+def separate_guitar_enhanced(input_path, output_path, model=None, streaming=None, cache=None,
+                             workers=None, precision=None):
+    """
+    streaming: True/False로 강제, None이면 곡 길이로 자동 선택
+    cache: 스템 캐시 (None이면 기본 캐시 사용, 모델은 캐시 미스일 때만 로드), 스트리밍 분리는 캐시하지 않음
+    workers: CPU 구간 병렬 분리 워커 수 (None이면 DEMUCS_WORKERS 환경변수)
+    precision: fp32 / int8 / bf16 CPU 추론 정밀도 (None이면 DEMUCS_PRECISION 환경변수)
+    """
     try:
         print("🎸 향상된 기타 분리 시작...")
         
-        # 더 정확한 모델 사용
-        model_name = "htdemucs"  # High-quality 모델
-        model = get_model(model_name)
-        model.eval()
-        
-        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        model.to(device)
+        device = get_device()
         print(f"📱 사용 장치: {device}")
         
+        if streaming is None:
+            streaming = should_stream(input_path)
+        if streaming:
+            separate_guitar_streaming(input_path, output_path, model, workers=workers, precision=precision)
+            return
+        
+        if cache is None:
+            cache = StemCache()
+        
         # 오디오 로드 (높은 샘플링 레이트 유지)
         waveform, sr = torchaudio.load(input_path)
         print(f"📊 원본 오디오 형태: {waveform.shape}, 샘플링 레이트: {sr}")
@@ -32,19 +52,19 @@ def separate_guitar_enhanced(input_path, output_path):
             waveform = waveform.repeat(2, 1)
             print("🔄 모노에서 스테레오로 변환")
         
-        # Demucs 적용 (더 높은 품질 설정)
-        waveform_tensor = waveform.unsqueeze(0).to(device)
-        with torch.no_grad():
-            sources = apply_model(model, waveform_tensor, split=True, overlap=0.25)
-        
-        drums, bass, other, vocals = sources[0].cpu().numpy()
+        # Demucs 적용 (더 높은 품질 설정, 같은 오디오는 캐시에서 바로 사용)
+        drums, bass, other, vocals = separate_stems_cached(
+            model, waveform.numpy(), sr, cache=cache, model_name=MODEL_NAME, overlap=0.25,
+            workers=workers, precision=precision
+        )
         print("✅ Demucs 스템 분리 완료")
         
         # 기타 전용 후처리
         guitar_audio = extract_guitar_only(drums, bass, other, vocals, sr)
         
         # 저장
-        sf.write(output_path, guitar_audio.T, sr, format='WAV', subtype='PCM_16')
+        # .stem 경로면 float16 memmap 스템, 그 외는 PCM_16 WAV
+        save_audio(output_path, guitar_audio, sr)
         print(f"✅ 향상된 기타 파일 저장: {output_path}")
         print(f"📊 최종 기타 오디오 형태: {guitar_audio.shape}")
         
@@ -52,61 +72,94 @@ def separate_guitar_enhanced(input_path, output_path):
         print(f"❌ 에러: {e}")
         sys.exit(1)
 
-def extract_guitar_only(drums, bass, other, vocals, sr):
+def should_stream(input_path):
+    """곡 길이가 길면 스트리밍 분리 사용"""
+    try:
+        return sf.info(input_path).duration >= STREAMING_MIN_SECONDS
+    except RuntimeError:
+        # soundfile이 읽지 못하는 포맷은 기존 방식(torchaudio 전체 로드)
+        return False
+
+def separate_guitar_streaming(input_path, output_path, model=None,
+                              segment_seconds=SEGMENT_SECONDS, overlap_seconds=OVERLAP_SECONDS,
+                              workers=None, precision=None):
+    """
+    겹치는 윈도우 단위로 읽기 → 분리 → 극저주파 감쇠 → 타격음 억제 → 크로스페이드 → 후처리 체인 → 디스크에 바로 기록
+    최대 메모리 사용량은 윈도우 길이에만 비례 (곡 길이와 무관)
+    윈도우 스템은 캐시하지 않음 (긴 곡의 윈도우마다 항목이 생겨 LRU 캐시의 다른 곡들이 밀려나므로)
+    """
+    info = sf.info(input_path)
+    sr = info.samplerate
+    window_frames = int(segment_seconds * sr)
+    overlap_frames = int(overlap_seconds * sr)
+    print(f"🌊 스트리밍 분리: {info.duration:.1f}초, 윈도우 {segment_seconds}초 / 겹침 {overlap_seconds}초")
+
+    crossfader = OverlapCrossfader(overlap_frames)
+    # 채널별 최대값(게이트 기준)이 윈도우 경계를 넘어 이어지도록 체인은 하나만 사용
+    chain = GuitarPostChain(sr, channels=2)
+
+    def finished_blocks():
+        for start, block, last in read_windows(input_path, window_frames, overlap_frames):
+            print(f"🔄 윈도우 분리 중: {start / sr:.1f}초 ~ {(start + block.shape[1]) / sr:.1f}초")
+            drums, bass, other, vocals = separate_stems_cached(
+                model, block, sr, cache=None, model_name=MODEL_NAME, workers=workers,
+                precision=precision
+            )
+            guitar_block = suppress_drum_hits(low_cut(other, sr))
+
+            # 기타(2ch) + 보컬(2ch)을 함께 크로스페이드한 뒤, 확정된 구간만 체인에 통과
+            finished = crossfader.push(np.concatenate([guitar_block, vocals]), last)
+            yield finished[:2], finished[2:]
+
+    # 게이트는 곡 전체 최대값 기준이라 게이트 전 신호를 출력 옆 임시 파일에 쌓았다가 마지막에 기록
+    with open_audio_writer(output_path, sr, channels=2) as out:
+        written = chain.process_stream(finished_blocks(), out,
+                                       spool_dir=os.path.dirname(os.path.abspath(output_path)))
+
+    print(f"✅ 스트리밍 기타 파일 저장: {output_path}")
+    print(f"📊 최종 기타 오디오 길이: {written / sr:.2f}초")
+
+def extract_guitar_only(drums, bass, other, vocals, sr, chain=None):
     """기타만 보수적으로 추출하는 함수 (멜로디 보존 우선)"""
     print("🎯 보수적 기타 추출 시작...")
     
     # 1. 기본적으로 'other' 스템 사용 (기타가 주로 포함됨)
-    guitar_base = other.copy()
-    print("📋 기본 'other' 스템 사용")
-    
-    # 2. 명백한 베이스 주파수만 제거 (매우 보수적)
+    # 2. 명백한 베이스 주파수만 제거 (50Hz 이하만 0.1배, 매우 보수적)
     print("🔊 극저주파 제거 중...")
-    for channel in range(guitar_base.shape[0]):
-        # 50Hz 이하만 제거 (베이스 기본음만)
-        stft = librosa.stft(guitar_base[channel], n_fft=2048, hop_length=512)
-        freqs = librosa.fft_frequencies(sr=sr, n_fft=2048)
-        
-        # 극저주파만 제거
-        very_low_freq_mask = freqs < 50
-        stft[very_low_freq_mask] *= 0.1
-        
-        # 역변환 (길이 맞춤)
-        reconstructed = librosa.istft(stft, hop_length=512, length=guitar_base[channel].shape[0])
-        guitar_base[channel] = reconstructed
+    guitar_base = low_cut(other, sr)
     
     # 3. 극단적인 드럼 타격음만 제거 (보수적)
     print("🥁 극단적 타격음만 제거...")
-    for channel in range(guitar_base.shape[0]):
-        # 매우 약한 HPF 적용
-        harmonic, percussive = librosa.effects.hpss(guitar_base[channel], margin=1.0)
-        # 80% 하모닉 + 20% 퍼커시브 (너무 과하게 제거하지 않음)
-        guitar_base[channel] = harmonic * 0.8 + percussive * 0.2
+    guitar_base = suppress_drum_hits(guitar_base)
     
-    # 4. 매우 약한 보컬 제거
-    print("🎤 약간의 보컬 제거...")
-    vocals_reduced = vocals * 0.1  # 아주 약하게만 빼기
-    guitar_final = guitar_base - vocals_reduced
-    
-    # 5. 최소한의 노이즈 게이트만 적용
-    print("🎛️ 최소한의 노이즈 제거...")
-    for channel in range(guitar_final.shape[0]):
-        audio = guitar_final[channel]
-        
-        # 매우 낮은 노이즈 게이트 (최대값의 0.5%만)
-        threshold = np.max(np.abs(audio)) * 0.005
-        audio = np.where(np.abs(audio) < threshold, audio * 0.1, audio)
-        
-        guitar_final[channel] = audio
+    # 4. 약간의 보컬 제거 + 최소한의 노이즈 게이트 (블록 단위 한 번에)
+    print("🎛️ 보컬 / 노이즈 후처리...")
+    if chain is None:
+        chain = GuitarPostChain(sr, channels=guitar_base.shape[0])
+    guitar_final = chain.process(guitar_base, vocals)
     
     print("✅ 보수적 기타 추출 완료")
     return guitar_final
 
+def suppress_drum_hits(other):
+    """하모닉 80% + 퍼커시브 20% 재조합 (두 채널 동시 처리)"""
+    # 매우 약한 HPSS 적용 (librosa.effects.hpss(margin=1.0)와 같은 결과, 마스크 하나 + ISTFT 한 번)
+    # 80% 하모닉 + 20% 퍼커시브 (너무 과하게 제거하지 않음)
+    return hpss_mix(other, harmonic_weight=0.8, percussive_weight=0.2)
+
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("사용법: python guitar_separation_improved.py <input.wav> <output.wav>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description='향상된 기타 음원 분리')
+    parser.add_argument('input_path', help='입력 오디오 파일 경로')
+    parser.add_argument('output_path', help='출력 기타 오디오 파일 경로')
+    parser.add_argument('--streaming', action='store_true', default=None,
+                        help=f'윈도우 단위 스트리밍 분리 강제 (기본: {STREAMING_MIN_SECONDS}초 이상이면 자동)')
+    parser.add_argument('--no-cache', action='store_true', help='스템 캐시 사용 안 함')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='CPU 구간 병렬 분리 워커 수 (기본: DEMUCS_WORKERS 환경변수 또는 1)')
+    parser.add_argument('--precision', choices=PRECISIONS, default=None,
+                        help='CPU 추론 정밀도 (기본: DEMUCS_PRECISION 환경변수 또는 fp32)')
     
-    input_path = sys.argv[1]
-    output_path = sys.argv[2]
-    separate_guitar_enhanced(input_path, output_path)
+    args = parser.parse_args()
+    cache = StemCache(max_mb=0) if args.no_cache else None
+    separate_guitar_enhanced(args.input_path, args.output_path, streaming=args.streaming, cache=cache,
+                             workers=args.workers, precision=args.precision)
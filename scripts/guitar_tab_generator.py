@@ -1,21 +1,29 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import os
 import sys
-import pretty_midi
-import numpy as np
+import threading
+import multiprocessing
 from PIL import Image, ImageDraw, ImageFont
 import io
+from midi_io import read_midi
+from fretboard import STANDARD_TUNING, get_fretboard
+
+# 페이지 래스터화 워커 수 상한 (코어 수와 페이지 수를 넘지 않음)
+MAX_RENDER_WORKERS = int(os.environ.get("TAB_RENDER_WORKERS", "4"))
 
 class GuitarTabGenerator:
-    def __init__(self):
-        # 기타 표준 튜닝 (6현부터 1현까지, 낮은음부터 높은음)
-        self.standard_tuning = [40, 45, 50, 55, 59, 64]  # E A D G B E (MIDI 노트 번호)
+    def __init__(self, tuning=STANDARD_TUNING, capo=0):
+        # 기타 튜닝 (6현부터 1현까지, 낮은음부터 높은음), 기본은 표준 튜닝 E A D G B E (MIDI 노트 번호)
+        self.fretboard = get_fretboard(tuning, capo=capo, max_fret=15)
+        self.standard_tuning = list(self.fretboard.tuning)
         self.string_names = ['E', 'A', 'D', 'G', 'B', 'e']
         
         # A4 크기 TAB 설정 (300 DPI 기준)
         self.page_width = 2480  # A4 가로 (8.27인치 * 300 DPI)
         self.page_height = 3508  # A4 세로 (11.69인치 * 300 DPI)
+        self.dpi = 300
         
         # TAB 라인 설정
         self.lines_per_page = 10  # 페이지당 줄 수
@@ -37,36 +45,23 @@ class GuitarTabGenerator:
     def midi_to_tab_positions(self, midi_file_path):
         """MIDI 파일을 기타 TAB 위치로 변환"""
         try:
-            midi_data = pretty_midi.PrettyMIDI(midi_file_path)
+            midi_data = read_midi(midi_file_path)
             
             if not midi_data.instruments:
                 print("❌ MIDI 파일에 악기가 없습니다.")
                 return []
             
             notes = midi_data.instruments[0].notes
-            tab_positions = []
             
             print(f"📊 처리할 노트 수: {len(notes)}")
             
-            for note in notes:
-                # MIDI 노트를 기타 프렛 위치로 변환
-                fret_positions = self.find_fret_positions(note.pitch)
-                
-                if fret_positions:
-                    # 가장 적합한 위치 선택 (낮은 프렛 우선)
-                    best_position = min(fret_positions, key=lambda x: x[1])
-                    
-                    tab_positions.append({
-                        'time': note.start,
-                        'string': best_position[0],  # 현 번호 (0-5)
-                        'fret': best_position[1],    # 프렛 번호
-                        'duration': note.end - note.start,
-                        'velocity': note.velocity,
-                        'pitch': note.pitch
-                    })
+            # MIDI 노트를 기타 프렛 위치로 변환, 가장 적합한 위치 선택 (낮은 프렛 우선)
+            playable = notes[self.fretboard.playable[notes.pitch]]
+            playable.string[:] = self.fretboard.best_string[playable.pitch]
+            playable.fret[:] = self.fretboard.best_fret[playable.pitch]
             
             # 시간 순으로 정렬
-            tab_positions.sort(key=lambda x: x['time'])
+            tab_positions = playable.sorted_by_start().to_tab_positions()
             
             print(f"✅ TAB 위치 변환 완료: {len(tab_positions)}개 노트")
             return tab_positions
@@ -76,69 +71,106 @@ class GuitarTabGenerator:
             return []
     
     def find_fret_positions(self, midi_pitch):
-        """MIDI 피치를 기타 프렛 위치들로 변환"""
-        positions = []
-        
-        for string_idx, open_pitch in enumerate(self.standard_tuning):
-            # 이 현에서 해당 음을 낼 수 있는지 확인
-            fret = midi_pitch - open_pitch
-            
-            # 0~15프렛 범위 내에서만 허용
-            if 0 <= fret <= 15:
-                positions.append((string_idx, fret))
-        
-        return positions
+        """MIDI 피치를 기타 프렛 위치들로 변환 (0~15프렛 범위 내에서만 허용)"""
+        return self.fretboard.positions(midi_pitch)
+    
+    def load_fonts(self):
+        """폰트 로드 → (제목, 현 이름, 프렛 번호, 범례), 없으면 기본 폰트"""
+        try:
+            title_font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 28)
+            string_font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 20)
+            fret_font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 16)
+            small_font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 12)
+        except:
+            title_font = ImageFont.load_default()
+            string_font = title_font
+            fret_font = title_font
+            small_font = title_font
+        return title_font, string_font, fret_font, small_font
+    
+    def paginate(self, tab_lines):
+        """라인들을 페이지당 lines_per_page줄씩 나눔 → [(첫 라인 번호, 라인 목록), ...]"""
+        return [(start + 1, tab_lines[start:start + self.lines_per_page])
+                for start in range(0, len(tab_lines), self.lines_per_page)]
+    
+    def page_paths(self, output_path, page_count):
+        """PNG 페이지 경로: 1페이지는 output_path 그대로, 2페이지부터 <이름>_page<N><확장자>"""
+        stem, ext = os.path.splitext(output_path)
+        return [output_path] + [f"{stem}_page{number}{ext or '.png'}" for number in range(2, page_count + 1)]
+    
+    def render_page(self, page_lines, first_line_number=1, page_number=1, page_count=1):
+        """A4 TAB 한 페이지 래스터화 (제목, 최대 lines_per_page줄, 범례, 여러 페이지면 쪽 번호) → PIL 이미지"""
+        img = Image.new('RGB', (self.page_width, self.page_height), 'white')
+        draw = ImageDraw.Draw(img)
+        title_font, string_font, fret_font, small_font = self.load_fonts()
+        
+        # 제목 그리기
+        title = "Guitar Tablature"
+        title_bbox = draw.textbbox((0, 0), title, font=title_font)
+        title_width = title_bbox[2] - title_bbox[0]
+        title_x = (self.page_width - title_width) // 2
+        draw.text((title_x, 50), title, fill='black', font=title_font)
+        
+        # 각 라인 그리기 (라인 번호는 곡 전체 기준)
+        for line_idx, line_positions in enumerate(page_lines):
+            y_offset = self.margin_top + 100 + (line_idx * self.line_height)
+            self.draw_tab_line(draw, line_positions, y_offset, string_font, fret_font, first_line_number + line_idx)
+        
+        # 범례 추가
+        self.draw_legend(draw, small_font)
+        
+        # 쪽 번호 (우측 하단)
+        if page_count > 1:
+            page_label = f"{page_number} / {page_count}"
+            label_bbox = draw.textbbox((0, 0), page_label, font=small_font)
+            draw.text((self.page_width - self.margin_right - (label_bbox[2] - label_bbox[0]), self.page_height - 60),
+                      page_label, fill='gray', font=small_font)
+        return img
+    
+    def render_pages(self, tab_positions, output_path, workers=None):
+        """
+        모든 페이지를 프로세스 풀에서 동시에 래스터화해서 저장
+        output_path가 .pdf면 여러 페이지 PDF 하나, 아니면 페이지마다 PNG (page_paths 규칙)
+        workers가 없으면 MAX_RENDER_WORKERS까지, 메인 스레드가 아니면(스테이지 서버 executor 등) 현재 프로세스에서 그림
+        반환: 저장한 파일 경로 목록
+        """
+        tab_lines = self.split_tab_into_lines(tab_positions)
+        pages = self.paginate(tab_lines)
+        print(f"📊 총 {len(tab_lines)}개 라인으로 분할, {len(pages)}페이지")
+        
+        as_pdf = output_path.lower().endswith(".pdf")
+        paths = [None] * len(pages) if as_pdf else self.page_paths(output_path, len(pages))
+        tasks = [(self, page_lines, first_line_number, page_number, len(pages), path)
+                 for page_number, ((first_line_number, page_lines), path) in enumerate(zip(pages, paths), 1)]
+        
+        # 페이지마다 그리기 + 인코딩(PNG 저장 / JPEG)까지 워커에서, 메인 프로세스는 PDF 조립만
+        if workers is None:
+            in_main_thread = threading.current_thread() is threading.main_thread()
+            workers = min(MAX_RENDER_WORKERS, os.cpu_count() or 1) if in_main_thread else 1
+        workers = min(workers, len(tasks))
+        if workers <= 1:
+            results = [_rasterize_page(task) for task in tasks]
+        else:
+            # 스레드가 있는 프로세스를 fork하지 않도록 forkserver (없으면 spawn)
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            with multiprocessing.get_context(method).Pool(workers) as pool:
+                results = pool.map(_rasterize_page, tasks)
+        
+        if as_pdf:
+            with open(output_path, 'wb') as f:
+                f.write(jpeg_pages_to_pdf(results, self.page_width, self.page_height, self.dpi))
+            return [output_path]
+        return results
     
-    def generate_tab_image(self, tab_positions, output_path):
-        """A4 크기 다중 라인 TAB 악보 이미지 생성"""
+    def generate_tab_image(self, tab_positions, output_path, workers=None):
+        """A4 크기 다중 라인 TAB 악보 생성 (모든 페이지, .pdf면 PDF 하나 아니면 페이지별 PNG)"""
         try:
             if not tab_positions:
                 print("❌ TAB 위치가 없습니다.")
                 return False
             
-            # A4 이미지 생성
-            img = Image.new('RGB', (self.page_width, self.page_height), 'white')
-            draw = ImageDraw.Draw(img)
-            
-            # 폰트 설정
-            try:
-                title_font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 28)
-                string_font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 20)
-                fret_font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 16)
-                small_font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 12)
-            except:
-                title_font = ImageFont.load_default()
-                string_font = title_font
-                fret_font = title_font
-                small_font = title_font
-            
-            # 제목 그리기
-            title = "Guitar Tablature"
-            title_bbox = draw.textbbox((0, 0), title, font=title_font)
-            title_width = title_bbox[2] - title_bbox[0]
-            title_x = (self.page_width - title_width) // 2
-            draw.text((title_x, 50), title, fill='black', font=title_font)
-            
-            # TAB 위치를 라인별로 분할
-            tab_lines = self.split_tab_into_lines(tab_positions)
-            
-            print(f"📊 총 {len(tab_lines)}개 라인으로 분할")
-            
-            # 각 라인 그리기
-            for line_idx, line_positions in enumerate(tab_lines):
-                if line_idx >= self.lines_per_page:
-                    print(f"⚠️ 페이지 용량 초과, {self.lines_per_page}줄까지만 표시")
-                    break
-                
-                y_offset = self.margin_top + 100 + (line_idx * self.line_height)
-                self.draw_tab_line(draw, line_positions, y_offset, string_font, fret_font, line_idx + 1)
-            
-            # 범례 추가
-            self.draw_legend(draw, small_font)
-            
-            # 이미지 저장
-            img.save(output_path, 'PNG', quality=95, dpi=(300, 300))
-            print(f"✅ A4 TAB 이미지 저장: {output_path}")
+            for path in self.render_pages(tab_positions, output_path, workers):
+                print(f"✅ A4 TAB 저장: {path}")
             
             return True
             
@@ -415,8 +447,52 @@ class GuitarTabGenerator:
             percentage = (count / len(tab_positions)) * 100
             print(f"   {fret}프렛: {count}개 ({percentage:.1f}%)")
 
-def generate_guitar_tab(midi_file_path, output_image_path, output_text_path=None):
-    """메인 함수: MIDI 파일을 기타 TAB으로 변환"""
+def _rasterize_page(task):
+    """워커: 페이지 하나를 그려서 PNG로 저장(경로 반환)하거나 PDF용 JPEG 바이트로 반환"""
+    generator, page_lines, first_line_number, page_number, page_count, path = task
+    img = generator.render_page(page_lines, first_line_number, page_number, page_count)
+    if path is not None:
+        img.save(path, 'PNG', quality=95, dpi=(generator.dpi, generator.dpi))
+        return path
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', quality=95, dpi=(generator.dpi, generator.dpi))
+    return buffer.getvalue()
+
+def jpeg_pages_to_pdf(jpeg_pages, width, height, dpi=300):
+    """
+    JPEG 페이지들 → 여러 페이지 PDF 바이트
+    PIL의 PDF 저장은 메인 프로세스에서 페이지마다 다시 JPEG 인코딩하므로,
+    워커가 만든 JPEG 스트림을 DCTDecode 이미지로 그대로 넣음 (객체: 1 카탈로그, 2 페이지 트리, 페이지마다 페이지/내용/이미지)
+    """
+    page_width, page_height = width * 72 / dpi, height * 72 / dpi
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None]
+    kids = []
+    for index, jpeg in enumerate(jpeg_pages):
+        page_id = 3 + index * 3
+        kids.append(f"{page_id} 0 R")
+        content = f"q {page_width:.2f} 0 0 {page_height:.2f} 0 0 cm /Im0 Do Q".encode()
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {page_width:.2f} {page_height:.2f}] "
+                       f"/Resources << /XObject << /Im0 {page_id + 2} 0 R >> /ProcSet [/PDF /ImageC] >> "
+                       f"/Contents {page_id + 1} 0 R >>".encode())
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        objects.append(f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} /ColorSpace /DeviceRGB "
+                       f"/BitsPerComponent 8 /Filter /DCTDecode /Length {len(jpeg)} >>\nstream\n".encode()
+                       + jpeg + b"\nendstream")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+    
+    pdf = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(pdf)
+
+def generate_guitar_tab(midi_file_path, output_image_path, output_text_path=None, workers=None):
+    """메인 함수: MIDI 파일을 기타 TAB으로 변환 (output_image_path가 .pdf면 여러 페이지 PDF)"""
     print("🎸 기타 TAB 생성 시작...")
     
     generator = GuitarTabGenerator()
@@ -432,7 +508,7 @@ def generate_guitar_tab(midi_file_path, output_image_path, output_text_path=None
     generator.print_statistics(tab_positions)
     
     # 이미지 TAB 생성
-    image_success = generator.generate_tab_image(tab_positions, output_image_path)
+    image_success = generator.generate_tab_image(tab_positions, output_image_path, workers)
     
     # 텍스트 TAB 생성 (옵션)
     text_success = True
@@ -447,13 +523,20 @@ def generate_guitar_tab(midi_file_path, output_image_path, output_text_path=None
         return False
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("사용법: python guitar_tab_generator.py <input.mid> <output.png> [output.txt]")
+    args = sys.argv[1:]
+    workers = None
+    if "--workers" in args:
+        index = args.index("--workers")
+        workers = int(args[index + 1])
+        del args[index:index + 2]
+    
+    if len(args) < 2:
+        print("사용법: python guitar_tab_generator.py <input.mid> <output.png|output.pdf> [output.txt] [--workers N]")
         sys.exit(1)
     
-    midi_file = sys.argv[1]
-    output_image = sys.argv[2]
-    output_text = sys.argv[3] if len(sys.argv) > 3 else None
+    midi_file = args[0]
+    output_image = args[1]
+    output_text = args[2] if len(args) > 2 else None
     
-    success = generate_guitar_tab(midi_file, output_image, output_text)
+    success = generate_guitar_tab(midi_file, output_image, output_text, workers)
     sys.exit(0 if success else 1)
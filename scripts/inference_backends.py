@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Basic Pitch 추론 런타임 선택
+같은 ICASSP 2022 모델을 TensorFlow SavedModel / TFLite / ONNX Runtime 중 하나로 실행
+- BASIC_PITCH_BACKEND=auto|tensorflow|tflite|onnx (auto는 basic_pitch 기본값과 같은 우선순위)
+- 경량 런타임을 고르면 basic_pitch 패키지를 임포트할 때 TensorFlow를 같이 불러오지 않음
+  (basic_pitch/__init__이 설치된 TensorFlow를 무조건 임포트하므로 transcription보다 먼저 임포트해야 함)
+- 모델 파일은 basic_pitch 패키지에 들어 있는 saved_models/icassp_2022 (nmp, nmp.tflite, nmp.onnx)
+
+비교: python inference_backends.py <audio> [--backends tensorflow tflite onnx]
+  백엔드마다 새 프로세스에서 콜드 스타트(임포트 + 모델 로드), 최대 RSS, 초당 처리량을 재고
+  첫 번째 백엔드 결과와 활성화 / 노트가 같은지 확인
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+import importlib.util
+import numpy as np
+
+BACKENDS = ("tensorflow", "tflite", "onnx")
+MODEL_FILES = {"tensorflow": "nmp", "tflite": "nmp.tflite", "onnx": "nmp.onnx"}
+
+# basic_pitch.inference.Model과 같은 ONNX 입출력 이름
+ONNX_INPUT = "serving_default_input_2:0"
+ONNX_OUTPUTS = {
+    "note": "StatefulPartitionedCall:1",
+    "onset": "StatefulPartitionedCall:2",
+    "contour": "StatefulPartitionedCall:0",
+}
+
+def _installed(module_name):
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
+
+def _tflite_interpreter_class():
+    """TensorFlow 없이 쓸 수 있는 TFLite 인터프리터 (없으면 tf.lite)"""
+    for module_name in ("ai_edge_litert.interpreter", "tflite_runtime.interpreter"):
+        if _installed(module_name.split(".")[0]):
+            return importlib.import_module(module_name).Interpreter
+    try:
+        import tensorflow as tf
+    except ImportError:
+        raise ImportError("TFLite 런타임이 없습니다 (ai-edge-litert, tflite-runtime 또는 tensorflow 설치 필요)")
+    return tf.lite.Interpreter
+
+def available_backends():
+    """이 환경에서 실행할 수 있는 백엔드 목록 (BACKENDS 순서)"""
+    tensorflow = _installed("tensorflow")
+    present = {
+        "tensorflow": tensorflow,
+        "tflite": tensorflow or _installed("ai_edge_litert") or _installed("tflite_runtime"),
+        "onnx": _installed("onnxruntime"),
+    }
+    return [backend for backend in BACKENDS if present[backend]]
+
+def selected_backend():
+    """BASIC_PITCH_BACKEND 환경 변수 → 백엔드 이름 (auto면 basic_pitch 기본값: TensorFlow → TFLite → ONNX)"""
+    backend = os.environ.get("BASIC_PITCH_BACKEND", "auto").lower()
+    if backend == "auto":
+        available = available_backends()
+        if not available:
+            raise RuntimeError("TensorFlow / TFLite / ONNX Runtime 중 설치된 런타임이 없습니다")
+        return available[0]
+    if backend not in BACKENDS:
+        raise ValueError(f"알 수 없는 Basic Pitch 백엔드: {backend} (auto, {', '.join(BACKENDS)})")
+    return backend
+
+def model_path(backend=None):
+    """백엔드별 ICASSP 2022 모델 경로 (basic_pitch 패키지를 임포트하지 않고 찾음)"""
+    spec = importlib.util.find_spec("basic_pitch")
+    if spec is None or not spec.submodule_search_locations:
+        raise ImportError("basic-pitch가 설치되어 있지 않습니다")
+    package_dir = list(spec.submodule_search_locations)[0]
+    return os.path.join(package_dir, "saved_models", "icassp_2022", MODEL_FILES[backend or selected_backend()])
+
+def backend_for_path(path):
+    """모델 경로 → 백엔드 이름 (확장자 기준)"""
+    path = os.fsdecode(path)
+    if path.endswith(".onnx"):
+        return "onnx"
+    if path.endswith(".tflite"):
+        return "tflite"
+    return "tensorflow"
+
+def import_basic_pitch(backend=None):
+    """
+    basic_pitch 패키지 임포트, 경량 백엔드면 그동안만 TensorFlow 임포트를 막음
+    (이미 TensorFlow가 로드된 프로세스에서는 그대로 둠, 나중에 다른 모듈이 임포트하는 것은 막지 않음)
+    """
+    block = (backend or selected_backend()) != "tensorflow" and "tensorflow" not in sys.modules
+    if block:
+        sys.modules["tensorflow"] = None  # import tensorflow → ImportError
+    try:
+        import basic_pitch
+    finally:
+        if block:
+            del sys.modules["tensorflow"]
+    return basic_pitch
+
+class OnnxModel:
+    """ONNX Runtime으로 실행하는 Basic Pitch 모델 (predict(batch) → {'note', 'onset', 'contour'})"""
+
+    def __init__(self, path):
+        import onnxruntime as ort
+        self.path = os.fsdecode(path)
+        self.session = ort.InferenceSession(self.path, providers=["CPUExecutionProvider"])
+
+    def predict(self, batch):
+        outputs = self.session.run(list(ONNX_OUTPUTS.values()), {ONNX_INPUT: np.asarray(batch, dtype=np.float32)})
+        return dict(zip(ONNX_OUTPUTS, outputs))
+
+class TFLiteModel:
+    """TFLite 인터프리터로 실행하는 Basic Pitch 모델 (배치 크기가 바뀌면 시그니처 러너가 입력 크기를 조정)"""
+
+    def __init__(self, path):
+        self.path = os.fsdecode(path)
+        self.interpreter = _tflite_interpreter_class()(model_path=self.path)
+        self.runner = self.interpreter.get_signature_runner()
+
+    def predict(self, batch):
+        output = self.runner(input_2=np.asarray(batch, dtype=np.float32))
+        return {k: np.asarray(output[k]) for k in ("note", "onset", "contour")}
+
+def load_model(path):
+    """모델 경로 → 런타임별 모델 객체, TensorFlow SavedModel은 basic_pitch의 Model로 로드"""
+    backend = backend_for_path(path)
+    if backend == "onnx":
+        return OnnxModel(path)
+    if backend == "tflite":
+        return TFLiteModel(path)
+    try:
+        # basic-pitch 0.3+: 런타임을 감싼 Model 클래스
+        from basic_pitch.inference import Model
+        return Model(path)
+    except ImportError:
+        # basic-pitch 0.2.x: TensorFlow SavedModel 직접 로드
+        import tensorflow as tf
+        return tf.saved_model.load(os.fsdecode(path))
+
+def _peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _measure(audio_path, output_path):
+    """(자식 프로세스) 현재 백엔드로 콜드 스타트 / 처리량 측정, 활성화와 노트를 output_path에 저장"""
+    started = time.perf_counter()
+    import transcription
+    imported = time.perf_counter()
+    model = transcription.load_basic_pitch_model()
+    loaded = time.perf_counter()
+
+    audio = transcription.load_audio(audio_path)
+    inference_started = time.perf_counter()
+    model_output = transcription.run_inference_on_audio(audio, model)
+    inference_seconds = time.perf_counter() - inference_started
+    _, note_events = transcription.decode_notes(model_output)
+
+    audio_seconds = audio.shape[0] / transcription.AUDIO_SAMPLE_RATE
+    np.savez(output_path, notes=np.array([event[:4] for event in note_events], dtype=np.float64).reshape(-1, 4), **model_output)
+    return {
+        "backend": transcription.BACKEND,
+        "import_seconds": round(imported - started, 3),
+        "load_seconds": round(loaded - imported, 3),
+        "cold_start_seconds": round(loaded - started, 3),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "audio_seconds": round(audio_seconds, 2),
+        "inference_seconds": round(inference_seconds, 3),
+        "audio_seconds_per_second": round(audio_seconds / inference_seconds, 2),
+        "tensorflow_imported": "tensorflow" in sys.modules,
+    }
+
+def compare_backends(audio_path, backends=None, tolerance=1e-3):
+    """백엔드마다 새 프로세스에서 측정하고, 첫 번째 백엔드와 활성화 최대 차이 / 노트 일치 여부 비교"""
+    backends = backends or available_backends()
+    results = []
+    reference = None
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for backend in backends:
+            output_path = os.path.join(temp_dir, f"{backend}.npz")
+            env = dict(os.environ, BASIC_PITCH_BACKEND=backend)
+            completed = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), audio_path, "--measure", output_path],
+                env=env, capture_output=True, text=True,
+            )
+            if completed.returncode != 0:
+                print(f"❌ {backend}: 실행 실패\n{completed.stderr[-2000:]}")
+                results.append({"backend": backend, "success": False})
+                continue
+
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            result["success"] = True
+            with np.load(output_path) as data:
+                outputs = {k: data[k] for k in data.files}
+
+            if reference is None:
+                reference = (backend, outputs)
+            else:
+                reference_name, reference_outputs = reference
+                diff = max(float(np.max(np.abs(outputs[k] - reference_outputs[k]))) for k in ("note", "onset", "contour"))
+                same_notes = (outputs["notes"].shape == reference_outputs["notes"].shape and
+                              np.allclose(outputs["notes"][:, :3], reference_outputs["notes"][:, :3]))
+                result.update(reference=reference_name, max_activation_diff=diff, same_notes=bool(same_notes),
+                              equivalent=bool(diff <= tolerance))
+            results.append(result)
+
+            line = (f"{backend:>10}: 콜드 스타트 {result['cold_start_seconds']:.2f}초 "
+                    f"(임포트 {result['import_seconds']:.2f} + 로드 {result['load_seconds']:.2f}), "
+                    f"RSS {result['peak_rss_mb']:.0f}MB, {result['audio_seconds_per_second']:.1f}× 실시간")
+            if "max_activation_diff" in result:
+                line += (f", {result['reference']} 대비 최대 차이 {result['max_activation_diff']:.1e}"
+                         f" {'✅' if result['equivalent'] else '❌'}, 노트 {'일치' if result['same_notes'] else '불일치'}")
+            print(line)
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Basic Pitch 추론 백엔드 비교 (콜드 스타트 / 처리량 / 출력 일치)')
+    parser.add_argument('audio', help='비교에 사용할 오디오 파일')
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, help='비교할 백엔드 (첫 번째가 기준, 기본: 설치된 전부)')
+    parser.add_argument('--tolerance', type=float, default=1e-3, help='활성화 최대 차이 허용치')
+    parser.add_argument('--json', help='결과를 저장할 JSON 경로')
+    parser.add_argument('--measure', help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(_measure(args.audio, args.measure)))
+        return 0
+
+    results = compare_backends(args.audio, args.backends, args.tolerance)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    ok = all(result["success"] and result.get("equivalent", True) for result in results)
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
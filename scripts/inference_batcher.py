@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Basic Pitch 교차 요청 배칭
+스테이지 서버에서 여러 변환 작업이 동시에 돌 때, 작업마다 윈도우를 배치 크기 1로 따로 추론하지 않고
+짧은 대기 시간 안에 모인 윈도우를 한 배치로 묶어 한 번에 추론한 뒤 작업별로 결과를 나눠 돌려줌
+- 모델은 프로세스에 하나만 로드, 추론은 전용 스레드 하나에서만 실행
+- 설정: 배치 크기(윈도우 수), 첫 요청 이후 최대 대기 시간(ms)
+- stats()로 실제 배치 크기 / 처리량 / 대기 시간 보고
+
+벤치마크: python inference_batcher.py --jobs 4 --windows 20 --batch-size 8 --wait-ms 10
+"""
+
+import os
+import sys
+import time
+import queue
+import argparse
+import threading
+from concurrent.futures import Future
+import numpy as np
+
+DEFAULT_BATCH_SIZE = int(os.environ.get("BASIC_PITCH_BATCH_SIZE", "8"))
+DEFAULT_BATCH_WAIT_MS = float(os.environ.get("BASIC_PITCH_BATCH_WAIT_MS", "10"))
+
+class BatchingModel:
+    """
+    run_model()에 그대로 넘길 수 있는 모델 래퍼 (predict(batch) → {'note', 'onset', 'contour'})
+    여러 스레드가 동시에 predict를 호출하면 윈도우를 모아서 한 번의 forward pass로 처리
+    """
+
+    def __init__(self, base_model, batch_size=DEFAULT_BATCH_SIZE, wait_ms=DEFAULT_BATCH_WAIT_MS):
+        from transcription import run_model
+
+        self.base_model = base_model
+        self.batch_size = max(1, int(batch_size))
+        self.wait_seconds = max(0.0, float(wait_ms)) / 1000
+        self._run_model = run_model
+        self._queue = queue.Queue()
+        self._carry = None  # 배치 크기를 넘어서 다음 배치로 미룬 요청
+        self._outstanding = 0  # 제출됐지만 아직 결과가 나오지 않은 요청 수
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._counters = {"forward_passes": 0, "windows": 0, "requests": 0, "busy_seconds": 0.0, "wait_seconds": 0.0}
+        self._thread = threading.Thread(target=self._loop, name="basic-pitch-batcher", daemon=True)
+        self._thread.start()
+
+    def predict(self, batch):
+        """(n, AUDIO_N_SAMPLES, 1) 윈도우 → 활성화 dict (배치 크기보다 크면 나눠서 제출)"""
+        batch = np.asarray(batch, dtype=np.float32)
+        futures = []
+        for start in range(0, batch.shape[0], self.batch_size):
+            future = Future()
+            with self._lock:
+                self._outstanding += 1
+            self._queue.put((batch[start:start + self.batch_size], future, time.perf_counter()))
+            futures.append(future)
+
+        results = [future.result() for future in futures]
+        if len(results) == 1:
+            return results[0]
+        return {k: np.concatenate([result[k] for result in results]) for k in results[0]}
+
+    def _collect(self):
+        """첫 요청을 기다린 뒤, 배치가 차거나 대기 시간이 끝날 때까지 요청을 더 모음"""
+        if self._carry is not None:
+            first, self._carry = self._carry, None
+        else:
+            first = self._queue.get()
+        if first is None:
+            return None
+
+        requests = [first]
+        size = first[0].shape[0]
+        deadline = time.perf_counter() + self.wait_seconds
+        # 대기 중인 요청을 모두 모았으면 더 기다리지 않음 (다른 작업은 이번 결과를 기다리는 중)
+        while size < self.batch_size and len(requests) < self._outstanding:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # 종료 신호는 이번 배치를 처리한 뒤에 받음
+                break
+            if size + item[0].shape[0] > self.batch_size:
+                self._carry = item  # 다음 배치의 첫 요청
+                break
+            requests.append(item)
+            size += item[0].shape[0]
+        return requests
+
+    def _loop(self):
+        while True:
+            requests = self._collect()
+            if requests is None:
+                break
+
+            batch = np.concatenate([windows for windows, _, _ in requests])
+            started = time.perf_counter()
+            try:
+                output = self._run_model(self.base_model, batch)
+            except Exception as e:
+                with self._lock:
+                    self._outstanding -= len(requests)
+                for _, future, _ in requests:
+                    future.set_exception(e)
+                continue
+            elapsed = time.perf_counter() - started
+
+            offset = 0
+            for windows, future, _ in requests:
+                count = windows.shape[0]
+                future.set_result({k: v[offset:offset + count] for k, v in output.items()})
+                offset += count
+
+            with self._lock:
+                self._outstanding -= len(requests)
+                self._counters["forward_passes"] += 1
+                self._counters["windows"] += batch.shape[0]
+                self._counters["requests"] += len(requests)
+                self._counters["busy_seconds"] += elapsed
+                self._counters["wait_seconds"] += sum(started - queued for _, _, queued in requests)
+
+    def stats(self):
+        """지금까지의 배칭 통계 (평균 배치 크기, 모델 처리량 windows/s, 평균 대기 ms, 추론 스레드 점유율)"""
+        with self._lock:
+            counters = dict(self._counters)
+        uptime = time.perf_counter() - self._started
+        passes = counters["forward_passes"]
+        return {
+            "batch_size": self.batch_size,
+            "wait_ms": self.wait_seconds * 1000,
+            "forward_passes": passes,
+            "windows": counters["windows"],
+            "requests": counters["requests"],
+            "mean_batch": round(counters["windows"] / passes, 2) if passes else 0.0,
+            "windows_per_second": round(counters["windows"] / counters["busy_seconds"], 2) if counters["busy_seconds"] else 0.0,
+            "mean_wait_ms": round(1000 * counters["wait_seconds"] / counters["requests"], 2) if counters["requests"] else 0.0,
+            "utilization": round(counters["busy_seconds"] / uptime, 3) if uptime > 0 else 0.0,
+        }
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+def _run_jobs(model, jobs, windows_per_job, windows):
+    """작업 jobs개가 동시에 윈도우를 하나씩 순서대로 추론 → (경과 초, 작업별 출력)"""
+    from transcription import run_model
+
+    outputs = [None] * jobs
+
+    def job(index):
+        outputs[index] = [run_model(model, windows[i:i + 1])["note"] for i in range(windows_per_job)]
+
+    threads = [threading.Thread(target=job, args=(index,)) for index in range(jobs)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, outputs
+
+def benchmark(jobs=4, windows_per_job=20, batch_size=DEFAULT_BATCH_SIZE, wait_ms=DEFAULT_BATCH_WAIT_MS):
+    """동시 작업을 배칭 없이 / 배칭으로 실행해서 처리량 비교, 결과가 같은지 확인"""
+    from basic_pitch.constants import AUDIO_N_SAMPLES
+    from transcription import load_basic_pitch_model, run_model
+
+    base_model = load_basic_pitch_model()
+    rng = np.random.default_rng(0)
+    windows = (0.1 * rng.standard_normal((windows_per_job, AUDIO_N_SAMPLES, 1))).astype(np.float32)
+    run_model(base_model, windows[:1])  # 워밍업
+    total = jobs * windows_per_job
+
+    direct_seconds, direct = _run_jobs(base_model, jobs, windows_per_job, windows)
+    print(f"⏱️ 배칭 없음: {total}개 윈도우 {direct_seconds:.2f}초 ({total / direct_seconds:.1f} windows/s)")
+
+    batcher = BatchingModel(base_model, batch_size=batch_size, wait_ms=wait_ms)
+    batched_seconds, batched = _run_jobs(batcher, jobs, windows_per_job, windows)
+    stats = batcher.stats()
+    batcher.close()
+    print(f"⏱️ 배칭 (최대 {batch_size}개, 대기 {wait_ms:g}ms): {batched_seconds:.2f}초 ({total / batched_seconds:.1f} windows/s)")
+    print(f"📊 forward pass {stats['forward_passes']}회, 평균 배치 {stats['mean_batch']}, "
+          f"모델 처리량 {stats['windows_per_second']} windows/s, 평균 대기 {stats['mean_wait_ms']}ms")
+
+    max_diff = max(
+        float(np.max(np.abs(a - b)))
+        for job_direct, job_batched in zip(direct, batched)
+        for a, b in zip(job_direct, job_batched)
+    )
+    print(f"🔍 배칭 전후 note 활성화 최대 차이: {max_diff:.2e}")
+    return {"direct_seconds": direct_seconds, "batched_seconds": batched_seconds, "max_diff": max_diff, **stats}
+
+def main():
+    parser = argparse.ArgumentParser(description='Basic Pitch 교차 요청 배칭 벤치마크')
+    parser.add_argument('--jobs', type=int, default=4, help='동시 작업 수')
+    parser.add_argument('--windows', type=int, default=20, help='작업당 윈도우 수')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='최대 배치 크기 (윈도우 수)')
+    parser.add_argument('--wait-ms', type=float, default=DEFAULT_BATCH_WAIT_MS, help='배치를 모으는 최대 대기 시간')
+
+    args = parser.parse_args()
+    benchmark(args.jobs, args.windows, args.batch_size, args.wait_ms)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+크기 상한이 있는 파일 기반 LRU 캐시
+- 항목 하나 = 캐시 디렉터리의 파일 하나 (키.확장자)
+- 저장: 임시 파일에 쓴 뒤 rename (다른 프로세스가 읽는 중에도 깨진 파일이 보이지 않음)
+- LRU: 파일 mtime을 최근 사용 시각으로 사용, 용량을 넘으면 오래된 것부터 삭제
+하위 클래스는 SUFFIX / LABEL과 직렬화(_save, _load)만 정의
+"""
+
+import os
+
+class LruFileCache:
+    SUFFIX = ".bin"
+    LABEL = "캐시"
+
+    def __init__(self, cache_dir, max_mb):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_mb * 1024 * 1024)
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}{self.SUFFIX}")
+
+    def _save(self, f, value):
+        raise NotImplementedError
+
+    def _load(self, path):
+        raise NotImplementedError
+
+    def get(self, key):
+        """저장된 값 반환, 없거나 읽을 수 없으면 None"""
+        if not self.enabled:
+            return None
+
+        path = self.entry_path(key)
+        try:
+            value = self._load(path)
+        except (OSError, ValueError, KeyError):
+            return None
+
+        # LRU: 사용 시각 갱신
+        os.utime(path, None)
+        return value
+
+    def put(self, key, value):
+        """값 저장 후 용량 초과분 정리"""
+        if not self.enabled:
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.entry_path(key)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+
+        # 다른 프로세스가 읽는 중에도 깨진 파일이 보이지 않도록 임시 파일 → rename
+        with open(temp_path, "wb") as f:
+            self._save(f, value)
+        os.replace(temp_path, path)
+
+        self.evict()
+
+    def evict(self):
+        """가장 오래 사용하지 않은 항목부터 삭제해서 용량 상한 유지"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(self.SUFFIX):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                print(f"🧹 {self.LABEL} 정리: {os.path.basename(path)}")
+            except FileNotFoundError:
+                pass
+            total -= size
@@ -8,22 +8,37 @@ import sys
 import os
 import argparse
 import numpy as np
-from basic_pitch.inference import predict
-from basic_pitch import ICASSP_2022_MODEL_PATH
+from transcription import predict, ICASSP_2022_MODEL_PATH
 import pretty_midi
 import librosa
+from midi_io import save_pretty_midi
 
-def audio_to_midi(input_audio_path, output_midi_path):
+def audio_to_midi(input_audio_path, output_midi_path, model=None):
     """
     Basic Pitch를 사용하여 오디오를 MIDI로 변환
+    model: 미리 로드된 Basic Pitch 모델 (스테이지 서버에서 전달, 없으면 새로 로드)
     """
     try:
         print(f"🎼 MIDI 변환 시작: {input_audio_path}")
         
         # Basic Pitch로 오디오 분석
         print("🔍 Basic Pitch로 오디오 분석 중...")
-        model_output, midi_data, note_events = predict(input_audio_path)
+        model_output, midi_data, note_events = predict(
+            input_audio_path, model if model is not None else ICASSP_2022_MODEL_PATH
+        )
         
+        return basic_from_prediction(midi_data, note_events, output_midi_path)
+        
+    except Exception as e:
+        print(f"❌ MIDI 변환 오류: {str(e)}")
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+def basic_from_prediction(midi_data, note_events, output_midi_path):
+    """이미 실행된 Basic Pitch 결과(note_events)로 기타 음역대 MIDI 생성"""
+    try:
         print(f"✅ 기본 분석 완료!")
         print(f"📊 감지된 노트 개수: {len(note_events)}")
         
@@ -86,7 +101,7 @@ def audio_to_midi(input_audio_path, output_midi_path):
         guitar_midi.instruments.append(guitar_instrument)
         
         # MIDI 파일 저장
-        guitar_midi.write(output_midi_path)
+        save_pretty_midi(guitar_midi, output_midi_path)
         
         # 결과 분석
         total_duration = max([note.end for note in guitar_instrument.notes]) if guitar_instrument.notes else 0
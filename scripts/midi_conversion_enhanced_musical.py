@@ -6,50 +6,54 @@ Optimized for natural guitar sound and musical expression
 
 import sys
 import os
+import heapq
 import pretty_midi
 import numpy as np
 import librosa
-from basic_pitch.inference import predict_and_save
-from basic_pitch import ICASSP_2022_MODEL_PATH
-import tempfile
-import random
+from transcription import predict, ICASSP_2022_MODEL_PATH
 import math
+from note_array import NoteArray, fold_octaves
+from midi_io import reload_notes, save_pretty_midi
+from note_cleanup import keep_pitch_range, merge_and_trim
+from expression import (
+    STREAM_VELOCITY, note_keys, note_randint, phrase_swell, jitter_timing, beat_accents
+)
 
-def convert_audio_to_midi_enhanced(audio_file_path, output_midi_path):
+def convert_audio_to_midi_enhanced(audio_file_path, output_midi_path, model=None):
     """
     Convert audio to MIDI with enhanced musical quality and guitar optimization
+    model: preloaded Basic Pitch model (passed by the stage server), loaded from disk if None
     """
     try:
         print(f"Converting {audio_file_path} to enhanced musical MIDI...")
         
-        # Create temporary directory for basic-pitch output
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Use basic-pitch for initial conversion
-            predict_and_save(
-                [audio_file_path],
-                temp_dir,
-                save_midi=True,
-                sonify_midi=False,
-                save_model_outputs=False,
-                save_notes=False,
-                model_path=ICASSP_2022_MODEL_PATH,
-                midi_tempo=120  # Set standard tempo
-            )
-            
-            # Find the generated MIDI file
-            midi_files = [f for f in os.listdir(temp_dir) if f.endswith('.mid')]
-            if not midi_files:
-                raise Exception("No MIDI file generated by basic-pitch")
-            
-            temp_midi_path = os.path.join(temp_dir, midi_files[0])
-            
-            # Load and enhance the MIDI
-            midi_data = pretty_midi.PrettyMIDI(temp_midi_path)
-            enhanced_midi = enhance_musical_quality(midi_data)
-            
-            # Save the enhanced MIDI
-            enhanced_midi.write(output_midi_path)
-            
+        # Use basic-pitch for initial conversion (accepts WAV or .stem input)
+        _, basic_pitch_midi, note_events = predict(
+            audio_file_path,
+            model if model is not None else ICASSP_2022_MODEL_PATH,
+            midi_tempo=120  # Set standard tempo
+        )
+        
+        return enhanced_from_prediction(basic_pitch_midi, note_events, output_midi_path)
+        
+    except Exception as e:
+        print(f"Error converting audio to enhanced MIDI: {str(e)}")
+        return False
+
+def enhanced_from_prediction(basic_pitch_midi, note_events, output_midi_path):
+    """
+    Build the enhanced MIDI from an existing Basic Pitch prediction
+    (lets several variants share a single model run)
+    """
+    try:
+        # Quantize the notes exactly as saving and reloading the basic-pitch MIDI
+        # (predict_and_save(save_midi=True)) would, without a temporary file
+        midi_data = reload_notes(basic_pitch_midi)
+        enhanced_midi = enhance_musical_quality(midi_data)
+        
+        # Save the enhanced MIDI
+        save_pretty_midi(enhanced_midi, output_midi_path)
+        
         print(f"Enhanced MIDI conversion completed: {output_midi_path}")
         return True
         
@@ -65,14 +69,14 @@ def enhance_musical_quality(midi_data):
     new_midi = pretty_midi.PrettyMIDI()
     guitar_program = 25  # Acoustic Guitar (steel) - warmer, more natural sound
     
-    # Extract and analyze all notes
+    # Extract and analyze all notes (pretty_midi note lists or midi_io NoteArrays)
     all_notes = []
     for instrument in midi_data.instruments:
-        for note in instrument.notes:
-            all_notes.append(note)
+        notes = instrument.notes
+        all_notes.extend(notes.to_notes() if isinstance(notes, NoteArray) else notes)
     
     if not all_notes:
-        return midi_data
+        return new_midi
     
     # Sort notes by start time
     all_notes.sort(key=lambda x: x.start)
@@ -82,6 +86,7 @@ def enhance_musical_quality(midi_data):
     
     # Apply musical intelligence processing
     processed_notes = apply_musical_intelligence(all_notes)
+    apply_musical_velocity(processed_notes)
     
     # Apply guitar-specific optimizations
     guitar_optimized_notes = optimize_for_guitar(processed_notes)
@@ -97,54 +102,92 @@ def enhance_musical_quality(midi_data):
 def apply_musical_intelligence(all_notes):
     """
     Apply advanced musical intelligence for melody extraction and note selection
+
+    Sweep-line version of the 20ms grid scan: notes enter the active set from
+    a start-sorted pointer and leave through an end-time heap, and silent
+    stretches are skipped, so the cost is O(N log N + steps x polyphony).
+    Selection is evaluated at exactly the same grid times as the original scan.
     """
     processed_notes = []
     
     # Musical parameters
     time_resolution = 0.02  # 20ms resolution for precise control
-    min_note_duration = 0.15  # Minimum 150ms for musical clarity
-    max_note_duration = 2.5   # Maximum 2.5s for natural phrasing
-    melody_weight = 1.5       # Prefer melodic range notes
+    
+    if not all_notes:
+        return processed_notes
     
     # Analyze musical structure
-    total_duration = all_notes[-1].end if all_notes else 0
-    current_time = 0
+    total_duration = all_notes[-1].end
+    grid = _time_grid(time_resolution, total_duration + 1.0)
     
     # Track musical context
     last_pitch = None
-    phrase_start_time = 0
     note_density = calculate_note_density(all_notes)
     
-    while current_time < total_duration + 1.0:
-        # Find notes active at current time
-        active_notes = [n for n in all_notes 
-                       if n.start <= current_time < n.end]
+    # Sweep-line state: notes in start order, active set ordered by end time
+    start_order = sorted(range(len(all_notes)), key=lambda i: all_notes[i].start)
+    next_start = 0
+    ending = []
+    active = set()
+    
+    step = 0
+    while step < len(grid):
+        current_time = float(grid[step])
+        
+        # Notes that started by now enter the active set
+        while next_start < len(start_order) and all_notes[start_order[next_start]].start <= current_time:
+            index = start_order[next_start]
+            heapq.heappush(ending, (all_notes[index].end, index))
+            active.add(index)
+            next_start += 1
         
-        if active_notes:
-            # Select best note using musical intelligence
-            selected_note = select_best_musical_note(
-                active_notes, current_time, last_pitch, note_density
+        # Notes that ended by now leave it
+        while ending and ending[0][0] <= current_time:
+            active.discard(heapq.heappop(ending)[1])
+        
+        if not active:
+            if next_start == len(start_order):
+                break
+            # Jump straight to the first grid step at or after the next note start
+            step = int(np.searchsorted(grid, all_notes[start_order[next_start]].start, side="left"))
+            continue
+        
+        # Same order as the original list scan (ties in scoring go to the earlier note)
+        active_notes = [all_notes[i] for i in sorted(active)]
+        
+        # Select best note using musical intelligence
+        selected_note = select_best_musical_note(
+            active_notes, current_time, last_pitch, note_density
+        )
+        
+        if selected_note:
+            # Check if we should add this note
+            should_add = should_add_note(
+                selected_note, processed_notes, current_time
             )
             
-            if selected_note:
-                # Check if we should add this note
-                should_add = should_add_note(
-                    selected_note, processed_notes, current_time
+            if should_add:
+                # Create musically enhanced note
+                enhanced_note = create_enhanced_note(
+                    selected_note, current_time, processed_notes
                 )
                 
-                if should_add:
-                    # Create musically enhanced note
-                    enhanced_note = create_enhanced_note(
-                        selected_note, current_time, processed_notes
-                    )
-                    
-                    processed_notes.append(enhanced_note)
-                    last_pitch = enhanced_note.pitch
+                processed_notes.append(enhanced_note)
+                last_pitch = enhanced_note.pitch
         
-        current_time += time_resolution
+        step += 1
     
     return processed_notes
 
+def _time_grid(time_resolution, end_time):
+    """
+    Grid times below end_time, accumulated one step at a time exactly like
+    `current_time += time_resolution` so every step is bit-identical to the original loop
+    """
+    count = int(math.ceil(max(end_time, 0) / time_resolution)) + 10
+    grid = np.concatenate([[0.0], np.add.accumulate(np.full(count, time_resolution))])
+    return grid[grid < end_time]
+
 def calculate_note_density(notes):
     """Calculate note density for musical context"""
     if len(notes) < 2:
@@ -237,8 +280,8 @@ def create_enhanced_note(original_note, start_time, processed_notes):
     base_duration = original_note.end - start_time
     duration = max(0.15, min(base_duration, 2.0))  # 150ms to 2s range
     
-    # Calculate velocity with musical expression
-    velocity = calculate_musical_velocity(original_note, start_time, processed_notes)
+    # Musical velocity range; phrase dynamics and variation come later (apply_musical_velocity)
+    velocity = min(max(original_note.velocity, 35), 105)
     
     # Ensure playable pitch
     pitch = constrain_to_guitar_range(original_note.pitch)
@@ -250,133 +293,75 @@ def create_enhanced_note(original_note, start_time, processed_notes):
         end=start_time + duration
     )
 
-def calculate_musical_velocity(original_note, start_time, processed_notes):
-    """Calculate musically expressive velocity"""
-    base_velocity = min(max(original_note.velocity, 35), 105)  # Musical range
-    
-    # Add musical dynamics
-    if processed_notes:
-        # Phrase dynamics - create natural crescendo/diminuendo
-        phrase_position = len(processed_notes) % 8  # 8-note phrases
-        if phrase_position < 3:  # Building up
-            multiplier = 0.85 + (phrase_position * 0.05)
-        elif phrase_position < 6:  # Peak
-            multiplier = 1.0
-        else:  # Winding down
-            multiplier = 0.95 - ((phrase_position - 5) * 0.05)
-        
-        base_velocity = int(base_velocity * multiplier)
+def apply_musical_velocity(notes):
+    """
+    Calculate musically expressive velocity for the whole selected line at once:
+    8-note phrase swell (crescendo, peak, diminuendo) from the second note on,
+    plus a deterministic -6..+6 variation keyed per note, clamped to 30-115
+    """
+    if not notes:
+        return notes
+    
+    array = NoteArray.from_notes(notes)
+    multiplier = phrase_swell(np.arange(len(array)), phrase_length=8)
+    multiplier[0] = 1.0  # First note has no phrase context yet
+    velocity = (array.velocity * multiplier).astype(np.int64)
     
-    # Add subtle variation for natural feel
-    random.seed(int(start_time * 1000 + original_note.pitch))
-    variation = random.randint(-6, 6)
+    # Subtle variation for natural feel
+    velocity += note_randint(note_keys(array.start, array.pitch), -6, 6, STREAM_VELOCITY)
     
-    return max(30, min(115, base_velocity + variation))
+    for note, value in zip(notes, np.clip(velocity, 30, 115).tolist()):
+        note.velocity = value
+    return notes
 
 def constrain_to_guitar_range(pitch):
     """Constrain pitch to playable guitar range"""
     # Standard guitar range: E2 (40) to high E on 24th fret (~88)
-    # But we'll use a more conservative range for better playability
-    min_pitch = 40  # E2 (low E string)
-    max_pitch = 81  # A5 (high E string, 17th fret)
-    
-    if pitch < min_pitch:
-        # Transpose up by octaves
-        while pitch < min_pitch:
-            pitch += 12
-    elif pitch > max_pitch:
-        # Transpose down by octaves
-        while pitch > max_pitch:
-            pitch -= 12
-    
-    return pitch
+    # But we'll use a more conservative range for better playability:
+    # E2 (40, low E string) to A5 (81, high E string, 17th fret), transposing by octaves
+    return int(fold_octaves(pitch, 40, 81))
 
 def optimize_for_guitar(notes):
-    """Apply guitar-specific optimizations"""
+    """
+    Apply guitar-specific optimizations in one linear pass (note_cleanup.merge_and_trim):
+    keep the guitar range, merge near-simultaneous overlaps into the previous note,
+    trim other overlaps, normalize 1-2s phrase breaks to 0.2s, clamp to 0.12-2s
+    """
     if not notes:
         return notes
     
-    optimized = []
-    
-    for i, note in enumerate(notes):
-        # Ensure note is in guitar range
-        if not (40 <= note.pitch <= 84):
-            continue
-        
-        # Fix timing issues
-        if i > 0:
-            prev_note = optimized[-1]
-            
-            # Prevent overlaps
-            if note.start < prev_note.end:
-                if note.start - prev_note.start < 0.15:
-                    # Very close - extend previous note
-                    prev_note.end = max(prev_note.end, note.end)
-                    continue
-                else:
-                    # Adjust previous note end
-                    prev_note.end = note.start - 0.01
-            
-            # Add natural phrasing gaps
-            gap = note.start - prev_note.end
-            if 1.0 < gap < 2.0:  # Natural phrase break
-                note.start = prev_note.end + 0.2  # Consistent phrase gap
-                note.end += 0.2
-        
-        # Ensure musical durations
-        duration = note.end - note.start
-        if duration < 0.12:
-            note.end = note.start + 0.12
-        elif duration > 2.0:
-            note.end = note.start + 2.0
-        
-        optimized.append(note)
-    
-    return optimized
+    array = keep_pitch_range(NoteArray.from_notes(notes), 40, 84)
+    optimized = merge_and_trim(
+        array, merge_window=0.15, gap=0.01, min_duration=0.12, max_duration=2.0,
+        phrase_break=(1.0, 2.0), phrase_rest=0.2
+    )
+    return optimized.to_notes()
 
 def apply_musical_expression(notes):
-    """Apply final musical expression touches"""
+    """
+    Apply final musical expression touches as array operations:
+    deterministic timing humanization (+-8ms, keyed per note, overlaps pushed 5ms
+    past the previous note) followed by downbeat accents
+    """
     if not notes:
         return notes
     
-    # Add subtle timing humanization
-    for i, note in enumerate(notes):
-        # Deterministic "humanization" based on note properties
-        random.seed(int(note.pitch * 100 + note.start * 1000))
-        
-        # Very subtle timing adjustment (±8ms max)
-        timing_adjust = random.uniform(-0.008, 0.008)
-        note.start = max(0, note.start + timing_adjust)
-        note.end = max(note.start + 0.1, note.end + timing_adjust)
-        
-        # Ensure no overlaps after adjustment
-        if i > 0 and note.start < notes[i-1].end:
-            note.start = notes[i-1].end + 0.005
-            note.end = max(note.start + 0.1, note.end)
+    array = NoteArray.from_notes(notes)
+    start, end = jitter_timing(
+        array.start, array.end, note_keys(array.start, array.pitch),
+        max_shift=0.008, min_length=0.1, overlap_gap=0.005
+    )
     
     # Add musical accents on downbeats
-    add_musical_accents(notes)
+    velocity = beat_accents(start, end - start, array.velocity)
+    
+    for note, note_start, note_end, note_velocity in zip(notes, start.tolist(), end.tolist(), velocity.tolist()):
+        note.start = note_start
+        note.end = note_end
+        note.velocity = note_velocity
     
     return notes
 
-def add_musical_accents(notes):
-    """Add musical accents for better rhythmic feel"""
-    if len(notes) < 4:
-        return
-    
-    # Estimate tempo and add accents on strong beats
-    avg_note_duration = sum(n.end - n.start for n in notes) / len(notes)
-    beat_duration = max(0.5, avg_note_duration * 2)  # Estimate beat length
-    
-    for i, note in enumerate(notes):
-        # Check if this note falls on a strong beat
-        beat_position = (note.start % (beat_duration * 4)) / beat_duration
-        
-        if beat_position < 0.1 or beat_position > 3.9:  # Downbeat
-            note.velocity = min(115, int(note.velocity * 1.15))
-        elif abs(beat_position - 2) < 0.1:  # Beat 3 (secondary accent)
-            note.velocity = min(110, int(note.velocity * 1.08))
-
 if __name__ == "__main__":
     if len(sys.argv) != 3:
         print("Usage: python midi_conversion_enhanced_musical.py <input_audio> <output_midi>")
@@ -4,41 +4,56 @@
 import sys
 import librosa
 import numpy as np
-from basic_pitch.inference import predict
-from basic_pitch import ICASSP_2022_MODEL_PATH
+from transcription import predict, ICASSP_2022_MODEL_PATH
 import pretty_midi
+from note_array import NoteArray
+from midi_io import save_pretty_midi
+from note_cleanup import drop_short, clamp_durations, trim_overlaps
+from onset_groups import select_melody_line
+from fretboard import STANDARD_TUNING, get_fretboard
+from expression import (
+    STREAM_TIMING, note_keys, note_random, section_dynamics, duration_dynamics, phrase_arc
+)
 
-def convert_to_guitar_optimized_midi(audio_path, output_path):
-    """기타 연주 가능하고 듣기 좋은 MIDI로 최적화"""
+def convert_to_guitar_optimized_midi(audio_path, output_path, model=None):
+    """기타 연주 가능하고 듣기 좋은 MIDI로 최적화 (model: 미리 로드된 Basic Pitch 모델)"""
     try:
         print("🎸 기타 최적화 MIDI 변환 시작...")
         
         # Basic Pitch로 예측
         print("🤖 Basic Pitch 모델 실행...")
-        model_output, midi_data, note_events = predict(audio_path, ICASSP_2022_MODEL_PATH)
+        model_output, midi_data, note_events = predict(
+            audio_path, model if model is not None else ICASSP_2022_MODEL_PATH
+        )
         
-        if not midi_data.instruments:
-            print("❌ MIDI 데이터에 악기가 없습니다.")
+        if not guitar_optimized_from_prediction(midi_data, note_events, output_path):
             sys.exit(1)
         
-        print(f"📊 원본 노트 수: {len(midi_data.instruments[0].notes)}")
-        
-        # 기타 연주 가능하도록 최적화
-        guitar_midi = optimize_for_guitar_playability(midi_data)
-        
-        # 저장
-        guitar_midi.write(output_path)
-        print(f"✅ 기타 최적화 MIDI 저장: {output_path}")
-        
-        # 통계 출력
-        print_guitar_midi_stats(guitar_midi)
-        
     except Exception as e:
         print(f"❌ MIDI 변환 에러: {e}")
         sys.exit(1)
 
-def optimize_for_guitar_playability(midi_data):
-    """기타 연주 가능성과 음악성을 위한 최적화"""
+def guitar_optimized_from_prediction(midi_data, note_events, output_path):
+    """이미 실행된 Basic Pitch 결과(midi_data)로 기타 최적화 MIDI 생성, 성공 여부 반환"""
+    if not midi_data.instruments:
+        print("❌ MIDI 데이터에 악기가 없습니다.")
+        return False
+    
+    print(f"📊 원본 노트 수: {len(midi_data.instruments[0].notes)}")
+    
+    # 기타 연주 가능하도록 최적화
+    guitar_midi = optimize_for_guitar_playability(midi_data)
+    
+    # 저장
+    save_pretty_midi(guitar_midi, output_path)
+    print(f"✅ 기타 최적화 MIDI 저장: {output_path}")
+    
+    # 통계 출력
+    print_guitar_midi_stats(guitar_midi)
+    return True
+
+def optimize_for_guitar_playability(midi_data, tuning=STANDARD_TUNING, capo=0):
+    """기타 연주 가능성과 음악성을 위한 최적화 (tuning: 개방현 MIDI 음높이 또는 fretboard.TUNINGS 이름)"""
     
     # 새로운 MIDI 객체 생성 (480 틱 = 고해상도)
     new_midi = pretty_midi.PrettyMIDI(resolution=480, initial_tempo=120.0)
@@ -47,25 +62,11 @@ def optimize_for_guitar_playability(midi_data):
     guitar_program = pretty_midi.instrument_name_to_program('Acoustic Guitar (steel)')
     guitar_track = pretty_midi.Instrument(program=guitar_program, name="Guitar", is_drum=False)
     
-    # 기타 표준 튜닝 (개방현 음높이) - 실용적인 15프렛까지
-    # E2(40), A2(45), D3(50), G3(55), B3(59), E4(64)
-    open_strings = [40, 45, 50, 55, 59, 64]
-    max_fret = 15  # 15프렛까지 (실용적 범위)
-    
-    # 연주 가능한 음역대 계산
-    playable_notes = set()
-    string_fret_map = {}  # 각 음에 대한 현-프렛 조합 저장
+    # 기타 튜닝 (기본: 표준 튜닝 E2 A2 D3 G3 B3 E4) - 실용적인 15프렛까지
+    fretboard = get_fretboard(tuning, capo=capo, max_fret=15)
     
-    for string_idx, string_note in enumerate(open_strings):
-        for fret in range(max_fret + 1):
-            pitch = string_note + fret
-            playable_notes.add(pitch)
-            if pitch not in string_fret_map:
-                string_fret_map[pitch] = []
-            string_fret_map[pitch].append((string_idx, fret))
-    
-    print(f"🎸 연주 가능한 음역대: {min(playable_notes)} - {max(playable_notes)} (MIDI)")
-    print(f"🎸 총 연주 가능한 음: {len(playable_notes)}개")
+    print(f"🎸 연주 가능한 음역대: {fretboard.min_pitch} - {fretboard.max_pitch} (MIDI)")
+    print(f"🎸 총 연주 가능한 음: {len(fretboard.playable_pitches)}개")
     
     # 원본 노트들 처리
     original_notes = midi_data.instruments[0].notes
@@ -84,7 +85,7 @@ def optimize_for_guitar_playability(midi_data):
     
     # 2. 기타 연주 가능한 노트로 변환
     print("🎸 기타 연주 가능 범위로 조정...")
-    playable_notes_list = process_for_guitar_playability(monophonic_notes, playable_notes, string_fret_map)
+    playable_notes_list = process_for_guitar_playability(monophonic_notes, fretboard)
     
     # 3. 음악적 후처리 (듣기 좋게)
     print("🎼 음악적 후처리...")
@@ -101,273 +102,82 @@ def optimize_for_guitar_playability(midi_data):
     return new_midi
 
 def convert_to_musical_monophonic(notes):
-    """음악적으로 자연스러운 모노포닉 변환"""
+    """음악적으로 자연스러운 모노포닉 변환 (20ms 단위 그룹마다 멜로디 라인에 가장 적합한 노트 선택)"""
     if not notes:
         return []
     
-    # 시간 해상도 (20ms - 더 정밀하게)
-    time_resolution = 0.02
-    time_groups = {}
-    
-    for note in notes:
-        time_key = round(note.start / time_resolution) * time_resolution
-        if time_key not in time_groups:
-            time_groups[time_key] = []
-        time_groups[time_key].append(note)
-    
-    monophonic_notes = []
-    prev_pitch = None
-    
-    for time_key in sorted(time_groups.keys()):
-        group_notes = time_groups[time_key]
-        
-        if len(group_notes) == 1:
-            selected_note = group_notes[0]
-        else:
-            # 멜로디 라인 선택 (이전 음과의 연결성 고려)
-            selected_note = select_melodic_note(group_notes, prev_pitch)
-        
-        monophonic_notes.append(selected_note)
-        prev_pitch = selected_note.pitch
-    
-    return monophonic_notes
+    # 음역대/벨로시티/길이/이전 음과의 연결성 점수로 선택 (onset_groups.select_melody_line)
+    selected = select_melody_line(NoteArray.from_notes(notes), time_resolution=0.02)
+    return [notes[i] for i in selected.tolist()]
 
-def select_melodic_note(notes, prev_pitch):
-    """멜로디 라인에 가장 적합한 노트 선택 (음악적 연결성 고려)"""
+def process_for_guitar_playability(notes, fretboard=None):
+    """기타 연주 가능성을 위한 처리 (NoteArray 배열 연산)"""
     
-    # 기타 멜로디에 적합한 음역대 (C3-E5: MIDI 48-76)
-    sweet_spot = (48, 76)
+    notes = NoteArray.from_notes(notes)
+    original_pitch = notes.pitch.copy()
     
-    scored_notes = []
+    # 연주 가능한 음역대로 조정
+    notes.pitch[:] = find_best_guitar_pitch(notes.pitch, fretboard)
+    transposed_count = int(np.count_nonzero(notes.pitch != original_pitch))
     
-    for note in notes:
-        score = 0
-        
-        # 1. 음역대 점수 (기타 스위트 스팟)
-        if sweet_spot[0] <= note.pitch <= sweet_spot[1]:
-            score += 100
-        else:
-            distance = min(abs(note.pitch - sweet_spot[0]), abs(note.pitch - sweet_spot[1]))
-            score += max(0, 100 - distance * 2)
-        
-        # 2. 벨로시티 점수 (강한 소리가 주 멜로디)
-        score += note.velocity * 0.8
-        
-        # 3. 노트 길이 점수 (적절한 길이 선호)
-        duration = note.end - note.start
-        if 0.1 <= duration <= 3.0:
-            score += 50
-        elif duration > 3.0:
-            score -= 20
-        
-        # 4. 이전 음과의 연결성 (큰 점프 피하기)
-        if prev_pitch is not None:
-            interval = abs(note.pitch - prev_pitch)
-            if interval <= 7:  # 완전5도 이내 (자연스러운 멜로디)
-                score += 30
-            elif interval <= 12:  # 옥타브 이내
-                score += 10
-            else:  # 큰 점프는 감점
-                score -= (interval - 12) * 2
-        
-        scored_notes.append((score, note))
-    
-    # 최고 점수 노트 선택
-    scored_notes.sort(key=lambda x: x[0], reverse=True)
-    return scored_notes[0][1]
-
-def process_for_guitar_playability(notes, playable_notes, string_fret_map):
-    """기타 연주 가능성을 위한 처리"""
+    # 너무 짧은 노트 제거 (32분음표 이하)
+    min_duration = 0.0625
+    kept = drop_short(notes, min_duration)
+    removed_count = len(notes) - len(kept)
     
-    playable_filtered = []
-    transposed_count = 0
-    removed_count = 0
+    # 노트 길이 조정: 최소 길이 보장 (16분음표), 최대 길이 제한 (4박자)
+    notes = clamp_durations(kept, min_duration=0.125, max_duration=4.0)
     
-    for note in notes:
-        original_pitch = note.pitch
-        
-        # 연주 가능한 음역대로 조정
-        adjusted_pitch = find_best_guitar_pitch(original_pitch, playable_notes, string_fret_map)
-        
-        if adjusted_pitch != original_pitch:
-            transposed_count += 1
-        
-        # 너무 짧은 노트 제거 (32분음표 이하)
-        min_duration = 0.0625
-        if note.end - note.start < min_duration:
-            removed_count += 1
-            continue
-        
-        # 노트 길이 조정
-        duration = note.end - note.start
-        
-        # 최소 길이 보장 (16분음표)
-        if duration < 0.125:
-            note.end = note.start + 0.125
-        
-        # 최대 길이 제한 (4박자)
-        elif duration > 4.0:
-            note.end = note.start + 4.0
-        
-        # 벨로시티 조정 (기타에 적합한 범위)
-        # 70-120 범위로 설정 (너무 약하거나 강하지 않게)
-        original_velocity = note.velocity
-        note.velocity = max(70, min(120, int(original_velocity * 1.1)))  # 약간 강화
-        
-        # 조정된 음높이 적용
-        note.pitch = int(adjusted_pitch)
-        
-        playable_filtered.append(note)
+    # 벨로시티 조정 (기타에 적합한 범위)
+    # 70-120 범위로 설정 (너무 약하거나 강하지 않게), 약간 강화
+    notes.velocity[:] = np.clip((notes.velocity * 1.1).astype(np.int64), 70, 120)
     
     print(f"📊 옥타브 조정: {transposed_count}개")
     print(f"📊 제거된 짧은 노트: {removed_count}개")
     
-    return playable_filtered
+    return notes.to_notes()
 
-def find_best_guitar_pitch(target_pitch, playable_notes, string_fret_map):
-    """기타에서 가장 자연스럽게 연주할 수 있는 음높이 찾기"""
-    
-    # 이미 연주 가능하면 그대로 사용
-    if target_pitch in playable_notes:
-        # 여러 현에서 연주 가능한 경우 가장 적합한 위치 선택
-        return target_pitch
-    
-    # 옥타브 단위로 조정
-    adjusted_pitch = target_pitch
-    
-    # 너무 높으면 옥타브 down
-    while adjusted_pitch > max(playable_notes):
-        adjusted_pitch -= 12
-    
-    # 너무 낮으면 옥타브 up
-    while adjusted_pitch < min(playable_notes):
-        adjusted_pitch += 12
-    
-    # 가장 가까운 연주 가능한 음 찾기
-    if adjusted_pitch not in playable_notes:
-        playable_list = sorted(list(playable_notes))
-        distances = [abs(adjusted_pitch - p) for p in playable_list]
-        closest_idx = distances.index(min(distances))
-        adjusted_pitch = playable_list[closest_idx]
-    
-    return adjusted_pitch
+def find_best_guitar_pitch(target_pitch, fretboard=None):
+    """
+    기타에서 가장 자연스럽게 연주할 수 있는 음높이 찾기 (스칼라/배열)
+    이미 연주 가능하면 그대로, 아니면 옥타브 단위로 조정한 뒤 가장 가까운 연주 가능한 음
+    """
+    fretboard = fretboard or get_fretboard()
+    return fretboard.nearest_pitch(target_pitch)
 
 def apply_musical_post_processing(notes):
-    """음악적 후처리 (듣기 좋게 만들기)"""
+    """
+    음악적 후처리 (듣기 좋게 만들기), 노트 배열 전체에 한 번에 적용
+    1. 다이나믹: 곡 위치(도입부/결말부 약하게) × 노트 길이(긴 노트 약하게, 짧은 노트 강하게), 75-115
+    2. 타이밍 그루브: 노트마다 고정된 ±5ms 흔들림 (길이 유지, 음수 시간 방지)
+    3. 겹치는 노트 방지: 다음 노트 시작 10ms 전에 끝냄
+    4. 프레이징: 6음 단위 프레이즈 가운데가 가장 강하게
+    """
     
     if not notes:
         return notes
     
-    processed_notes = []
-    
-    for i, note in enumerate(notes):
-        # 복사본 생성
-        processed_note = pretty_midi.Note(
-            velocity=note.velocity,
-            pitch=note.pitch,
-            start=note.start,
-            end=note.end
-        )
-        
-        # 1. 다이나믹 처리 (표현력 향상)
-        processed_note.velocity = enhance_dynamics(note, i, len(notes))
-        
-        # 2. 타이밍 미세 조정 (그루브 향상)
-        processed_note.start, processed_note.end = adjust_timing_groove(note)
-        
-        # 3. 노트 간격 최적화
-        if i > 0:
-            prev_note = processed_notes[-1]
-            # 겹치는 노트 방지
-            if processed_note.start < prev_note.end:
-                prev_note.end = processed_note.start - 0.01
-        
-        processed_notes.append(processed_note)
-    
-    # 4. 프레이징 적용 (음악적 구문)
-    processed_notes = apply_musical_phrasing(processed_notes)
-    
-    return processed_notes
-
-def enhance_dynamics(note, position, total_notes):
-    """다이나믹 향상 (자연스러운 강약 처리)"""
-    
-    base_velocity = note.velocity
-    
-    # 위치에 따른 다이나믹 곡선 (곡의 구조 반영)
-    position_ratio = position / max(total_notes - 1, 1)
-    
-    # 곡의 시작과 끝은 약간 약하게, 중간은 강하게
-    if position_ratio < 0.1:  # 도입부
-        dynamic_factor = 0.8
-    elif position_ratio > 0.9:  # 결말부
-        dynamic_factor = 0.85
-    else:  # 중간부
-        dynamic_factor = 1.0
-    
-    # 노트 길이에 따른 조정
-    duration = note.end - note.start
-    if duration > 1.5:  # 긴 노트는 약간 약하게
-        duration_factor = 0.9
-    elif duration < 0.2:  # 짧은 노트는 약간 강하게
-        duration_factor = 1.1
-    else:
-        duration_factor = 1.0
-    
-    # 최종 벨로시티 계산
-    final_velocity = int(base_velocity * dynamic_factor * duration_factor)
-    
-    # 범위 제한 (75-115: 기타에 적합한 범위)
-    return max(75, min(115, final_velocity))
-
-def adjust_timing_groove(note):
-    """타이밍 그루브 조정 (자연스러운 리듬감)"""
-    
-    start_time = note.start
-    end_time = note.end
-    duration = end_time - start_time
+    notes = NoteArray.from_notes(notes)
+    count = len(notes)
+    duration = notes.duration
     
-    # 매우 미세한 타이밍 조정 (인간적인 느낌)
-    # ±5ms 범위에서 랜덤 조정
-    import random
-    random.seed(int(start_time * 1000))  # 일관성 위해 시드 설정
+    # 1. 다이나믹 처리 (표현력 향상)
+    velocity = notes.velocity * section_dynamics(count) * duration_dynamics(duration)
+    velocity = np.clip(velocity.astype(np.int64), 75, 115)
     
-    timing_adjustment = (random.random() - 0.5) * 0.01  # ±5ms
+    # 2. 타이밍 미세 조정 (그루브 향상)
+    shift = (note_random(note_keys(notes.start, notes.pitch), STREAM_TIMING) - 0.5) * 0.01  # ±5ms
+    start = np.maximum(notes.start + shift, 0.0)
+    end = start + duration
     
-    new_start = start_time + timing_adjustment
-    new_end = new_start + duration
-    
-    # 음수 시간 방지
-    if new_start < 0:
-        new_start = 0
-        new_end = duration
-    
-    return new_start, new_end
-
-def apply_musical_phrasing(notes):
-    """음악적 프레이징 적용"""
-    
-    if len(notes) < 3:
-        return notes
+    # 4. 프레이징 적용 (음악적 구문)
+    if count >= 3:
+        velocity = np.clip((velocity * phrase_arc(count, phrase_length=6)).astype(np.int64), 75, 115)
     
-    # 프레이즈 단위로 그룹화 (약 4-8개 노트)
-    phrase_length = 6
+    # 3. 노트 간격 최적화 (겹치는 노트 방지): 다음 노트 시작 10ms 전에 끝냄
+    processed = trim_overlaps(NoteArray.from_columns(start, end, notes.pitch, velocity), gap=0.01)
     
-    for i in range(0, len(notes), phrase_length):
-        phrase_notes = notes[i:i + phrase_length]
-        
-        # 프레이즈 내에서 미세한 다이나믹 조정
-        for j, note in enumerate(phrase_notes):
-            phrase_position = j / max(len(phrase_notes) - 1, 1)
-            
-            # 프레이즈 중간이 가장 강하게
-            phrase_dynamic = 0.95 + 0.1 * np.sin(phrase_position * np.pi)
-            note.velocity = int(note.velocity * phrase_dynamic)
-            
-            # 범위 제한
-            note.velocity = max(75, min(115, note.velocity))
-    
-    return notes
+    return processed.to_notes()
 
 def print_guitar_midi_stats(midi_data):
     """기타 MIDI 통계 출력 (상세)"""
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+멀티 버전 MIDI 변환
+Basic Pitch는 곡마다 한 번만 실행하고, 같은 note_events / midi_data에
+각 변환 스크립트의 후처리만 적용해서 여러 MIDI 버전을 생성
+
+모드:
+  first - 순서대로 시도해서 처음 성공한 버전만 output_midi_path에 저장 (기존 대체 체인과 동일)
+  all   - 모든 버전을 <output>_<버전>.mid로 저장, 처음 성공한 버전은 output_midi_path에도 복사
+
+사용법: python midi_conversion_multi.py <input.wav|.stem> <output.mid> [first|all] [report.json]
+"""
+
+import os
+import sys
+import copy
+import json
+import time
+import shutil
+from transcription import predict, ICASSP_2022_MODEL_PATH
+from midi_conversion import basic_from_prediction
+from midi_conversion_monophonic import monophonic_from_prediction
+from midi_conversion_guitar_optimized import guitar_optimized_from_prediction
+from midi_conversion_enhanced_musical import enhanced_from_prediction
+from midi_conversion_tabify_compatible import tabify_compatible_from_prediction
+
+# 버전 이름 → 후처리 (midi_data, note_events, output_path)
+VARIANTS = {
+    "tabify_compatible": tabify_compatible_from_prediction,
+    "enhanced_musical": enhanced_from_prediction,
+    "guitar_optimized": guitar_optimized_from_prediction,
+    "basic": basic_from_prediction,
+    "monophonic": monophonic_from_prediction,
+}
+# convertYouTube의 대체 순서 (Tabify 호환 → 향상된 → 최적화 → 기본)
+DEFAULT_ORDER = ["tabify_compatible", "enhanced_musical", "guitar_optimized", "basic"]
+
+def _succeeded(result):
+    """후처리마다 다른 반환값(bool / dict)을 성공 여부로 통일"""
+    if isinstance(result, dict):
+        return bool(result.get("success"))
+    return bool(result)
+
+def variant_path(output_midi_path, variant):
+    base, ext = os.path.splitext(output_midi_path)
+    return f"{base}_{variant}{ext or '.mid'}"
+
+def convert_audio_to_midi_variants(audio_path, output_midi_path, mode="first", report_path=None,
+                                   model=None, variants=None):
+    """
+    Basic Pitch 한 번 실행 → 버전별 후처리
+    반환: {"success", "variant"(처음 성공한 버전), "outputs", "timings"(초)}
+    """
+    if mode not in ("first", "all"):
+        raise ValueError(f"지원하지 않는 모드입니다: {mode}")
+    variants = variants or DEFAULT_ORDER
+    report = {"success": False, "variant": None, "outputs": {}, "timings": {}}
+
+    print(f"🎼 멀티 버전 MIDI 변환 시작 ({mode}): {', '.join(variants)}")
+    started = time.time()
+    _, midi_data, note_events = predict(
+        audio_path, model if model is not None else ICASSP_2022_MODEL_PATH
+    )
+    report["timings"]["predict"] = round(time.time() - started, 3)
+    print(f"🤖 Basic Pitch 1회 실행: {report['timings']['predict']:.2f}초, 노트 {len(note_events)}개")
+
+    for variant in variants:
+        path = output_midi_path if mode == "first" else variant_path(output_midi_path, variant)
+        print(f"🔄 [{variant}] 후처리 중...")
+
+        # 후처리들이 노트를 제자리에서 수정하므로 버전마다 복사본 사용
+        started = time.time()
+        try:
+            result = VARIANTS[variant](copy.deepcopy(midi_data), list(note_events), path)
+        except Exception as e:
+            print(f"❌ [{variant}] 실패: {e}")
+            result = False
+        report["timings"][variant] = round(time.time() - started, 3)
+
+        if not _succeeded(result) or not os.path.exists(path):
+            print(f"⚠️ [{variant}] 실패 ({report['timings'][variant]:.3f}초)")
+            continue
+
+        print(f"✅ [{variant}] 완료 ({report['timings'][variant]:.3f}초)")
+        report["outputs"][variant] = path
+        if report["variant"] is None:
+            report["variant"] = variant
+            report["success"] = True
+            if mode == "first":
+                break
+            shutil.copyfile(path, output_midi_path)
+
+    print(f"⏱️ 단계별 시간: {json.dumps(report['timings'], ensure_ascii=False)}")
+    if report_path:
+        with open(report_path, "w") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if not report["success"]:
+        print("❌ 모든 MIDI 버전 변환 실패")
+    return report
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or len(sys.argv) > 5:
+        print("사용법: python midi_conversion_multi.py <input.wav|.stem> <output.mid> [first|all] [report.json]")
+        sys.exit(1)
+
+    result = convert_audio_to_midi_variants(*sys.argv[1:])
+    sys.exit(0 if result["success"] else 1)
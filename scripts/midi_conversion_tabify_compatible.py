@@ -9,135 +9,154 @@ Tabify 호환 기타 MIDI 변환기
 
 import sys
 import numpy as np
-import pretty_midi
 import librosa
-from basic_pitch.inference import predict
-from basic_pitch import ICASSP_2022_MODEL_PATH
+from transcription import predict, stream_note_events, ICASSP_2022_MODEL_PATH
+from note_array import NoteArray, fold_octaves
+from midi_io import write_notes
+from note_cleanup import fold_into_range, clamp_durations, delay_overlaps, merge_same_pitch
+from fretboard import get_fretboard
+from expression import STREAM_DYNAMICS, note_keys, note_uniform
+
+# 확장된 튜닝: E2(40), A2(45), D3(50), G3(55) - 15프렛 범위 (NoteArray.string은 이 목록의 인덱스)
+GUITAR_STRINGS = [
+    (40, "E(저음현)"),  # E2 - 0~15프렛 (40-55)
+    (45, "A현"),       # A2 - 0~15프렛 (45-60)
+    (50, "D현"),       # D3 - 0~10프렛 (50-60)
+    (55, "G현"),       # G3 - 0~5프렛 (55-60)
+]
+GUITAR_MIN_PITCH = 40  # E2 (저음현 개방)
+GUITAR_MAX_PITCH = 60  # C4 (15프렛 정도)
+
+# 4현 (E A D G), 15프렛 범위 지판 인덱스 - NoteArray.string/fret은 이 인덱스의 가장 낮은 프렛 위치
+FRETBOARD = get_fretboard([open_pitch for open_pitch, _ in GUITAR_STRINGS], max_fret=15)
 
 def guitar_string_mapping(pitch):
-    """기타 현별 최적 매핑 (확장된 범위)"""
-    # 확장된 튜닝: E2(40), A2(45), D3(50), G3(55) - 15프렛 범위
-    strings = [
-        (40, "E(저음현)"),  # E2 - 0~15프렛 (40-55)
-        (45, "A현"),       # A2 - 0~15프렛 (45-60)
-        (50, "D현"),       # D3 - 0~10프렛 (50-60)
-        (55, "G현"),       # G3 - 0~5프렛 (55-60)
-    ]
-    
-    # 가장 적합한 현 찾기 (낮은 프렛 우선)
-    best_string = None
-    best_fret = 16  # 최대 프렛 초과값
-    
-    for open_pitch, string_name in strings:
-        fret = pitch - open_pitch
-        max_fret = 15  # 최대 15프렛
-        
-        if 0 <= fret <= max_fret and fret < best_fret:
-            best_fret = fret
-            best_string = (open_pitch, string_name)
-    
-    return best_string, best_fret
+    """기타 현별 최적 매핑 (확장된 범위), 가장 적합한 현 (낮은 프렛 우선)"""
+    position = FRETBOARD.lowest_position(pitch)
+    if position is None:
+        return None, 16  # 최대 프렛 초과값
+    string, fret = position
+    return GUITAR_STRINGS[string], fret
 
 def constrain_to_guitar_range(pitch):
-    """기타 연주 가능 범위로 제한 (확장된 범위)"""
-    # 확장된 기타 범위: E2(40) ~ C4(60) - 20프렛 범위
-    min_pitch = 40  # E2 (저음현 개방)
-    max_pitch = 60  # C4 (15프렛 정도)
-    
-    if pitch < min_pitch:
-        # 낮은 음은 한 옥타브 올림
-        while pitch < min_pitch:
-            pitch += 12
-    elif pitch > max_pitch:
-        # 높은 음은 한 옥타브 내림
-        while pitch > max_pitch:
-            pitch -= 12
-    
-    return max(min_pitch, min(pitch, max_pitch))
+    """기타 연주 가능 범위로 제한 (확장된 범위 E2(40) ~ C4(60), 옥타브 단위로 이동)"""
+    return int(np.clip(fold_octaves(pitch, GUITAR_MIN_PITCH, GUITAR_MAX_PITCH), GUITAR_MIN_PITCH, GUITAR_MAX_PITCH))
+
+MIN_NOTE_GAP = 0.05  # 최소 50ms 간격
 
-def create_monophonic_sequence(notes_data):
-    """폴리포닉을 모노포닉으로 변환"""
-    if not notes_data:
-        return []
+def create_monophonic_sequence(notes, not_before=None):
+    """
+    폴리포닉을 모노포닉으로 변환 (NoteArray → string/fret이 채워진 NoteArray)
+    not_before: 스트리밍에서 이전 조각의 마지막 노트 끝 + 간격 (첫 노트가 이보다 먼저 시작하지 않게 밀어냄)
+    """
+    if len(notes) == 0:
+        return NoteArray()
     
     # 시간 순으로 정렬
-    sorted_notes = sorted(notes_data, key=lambda x: x['onset'])
+    notes = notes.sorted_by_start()
+    
+    # 기타 범위로 옥타브 조정
+    notes, _ = fold_into_range(notes, GUITAR_MIN_PITCH, GUITAR_MAX_PITCH)
+    notes.pitch[:] = np.clip(notes.pitch, GUITAR_MIN_PITCH, GUITAR_MAX_PITCH)
+    
+    # 기타 현별 매핑 검증 - 15프렛 이하만 연주 가능한 노트만 추가
+    notes = notes[FRETBOARD.playable[notes.pitch]]
     
-    # 겹치는 노트 제거 및 간격 조정
-    monophonic_notes = []
-    min_note_gap = 0.05  # 최소 50ms 간격
-    min_duration = 0.125  # 최소 125ms 길이
-    max_duration = 3.0    # 최대 3초 길이
+    # 옥타브 조정 후 같은 음이 겹치면 하나로 합침 (밀어내서 같은 음을 두 번 치지 않게)
+    notes = merge_same_pitch(notes)
     
-    for i, note in enumerate(sorted_notes):
-        pitch = constrain_to_guitar_range(int(round(note['pitch'])))
-        onset = note['onset']
-        offset = note['offset']
-        
-        # 노트 길이 조정
-        duration = offset - onset
-        duration = max(min_duration, min(duration, max_duration))
-        
-        # 이전 노트와 겹치지 않도록 조정
-        if monophonic_notes:
-            prev_note = monophonic_notes[-1]
-            if onset < prev_note['offset'] + min_note_gap:
-                # 이전 노트 종료 후 간격을 두고 시작
-                onset = prev_note['offset'] + min_note_gap
-        
-        offset = onset + duration
-        
-        # 기타 현별 매핑 검증
-        string_info, fret = guitar_string_mapping(pitch)
-        if string_info and fret <= 15:  # 15프렛 이하만 연주 가능한 노트만 추가
-            monophonic_notes.append({
-                'pitch': pitch,
-                'onset': onset,
-                'offset': offset,
-                'duration': duration,
-                'string': string_info[1],
-                'fret': fret
-            })
+    # 노트 길이 조정 (최소 125ms, 최대 3초)
+    notes = clamp_durations(notes, min_duration=0.125, max_duration=3.0)
     
-    return monophonic_notes
+    # 이전 노트와 겹치지 않도록 최소 간격을 두고 뒤 노트를 밀어냄
+    notes = delay_overlaps(notes, gap=MIN_NOTE_GAP, not_before=not_before)
+    
+    notes.string[:] = FRETBOARD.best_string[notes.pitch]
+    notes.fret[:] = FRETBOARD.best_fret[notes.pitch]
+    return notes
 
 def enhance_musical_expression(notes):
-    """음악적 표현력 향상"""
-    if not notes:
+    """음악적 표현력 향상 (벨로시티를 제자리에서 설정)"""
+    if len(notes) == 0:
         return notes
     
-    enhanced_notes = []
+    # 다이내믹스 (벨로시티) 계산
+    base_velocity = 85
     
-    for i, note in enumerate(notes):
-        # 다이내믹스 (벨로시티) 계산
-        base_velocity = 85
-        
-        # 높은 음일수록 약간 작게
-        pitch_factor = max(0.8, 1.0 - (note['pitch'] - 40) / 200)
-        
-        # 긴 노트일수록 약간 작게 (지속음 효과)
-        duration_factor = max(0.85, 1.0 - note['duration'] / 6.0)
-        
-        # 랜덤 변화로 자연스러움 추가
-        random_factor = np.random.uniform(0.9, 1.1)
-        
-        velocity = int(base_velocity * pitch_factor * duration_factor * random_factor)
-        velocity = max(70, min(110, velocity))  # 70-110 범위
-        
-        note['velocity'] = velocity
-        enhanced_notes.append(note)
+    # 높은 음일수록 약간 작게
+    pitch_factor = np.maximum(0.8, 1.0 - (notes.pitch - 40) / 200)
     
-    return enhanced_notes
+    # 긴 노트일수록 약간 작게 (지속음 효과)
+    duration_factor = np.maximum(0.85, 1.0 - notes.duration / 6.0)
+    
+    # 랜덤 변화로 자연스러움 추가 (노트마다 고정된 값이라 스트리밍/일괄 변환 결과가 같음)
+    random_factor = note_uniform(note_keys(notes.start, notes.pitch), 0.9, 1.1, STREAM_DYNAMICS)
+    
+    velocity = (base_velocity * pitch_factor * duration_factor * random_factor).astype(np.int64)
+    notes.velocity[:] = np.clip(velocity, 70, 110)  # 70-110 범위
+    
+    return notes
 
-def convert_to_tabify_compatible_midi(input_audio_path, output_midi_path):
-    """Tabify 호환 기타 MIDI 변환"""
+def convert_to_tabify_compatible_midi(input_audio_path, output_midi_path, model=None):
+    """Tabify 호환 기타 MIDI 변환 (model: 미리 로드된 Basic Pitch 모델)"""
     try:
         print("🎸 Tabify 호환 기타 MIDI 변환 시작...")
         
         # Basic Pitch로 MIDI 변환
         print("🔍 Basic Pitch 음성 인식 중...")
-        model_output, midi_data, note_events = predict(input_audio_path, ICASSP_2022_MODEL_PATH)
+        model_output, midi_data, note_events = predict(
+            input_audio_path, model if model is not None else ICASSP_2022_MODEL_PATH
+        )
         
+        return tabify_compatible_from_prediction(midi_data, note_events, output_midi_path)
+        
+    except Exception as e:
+        print(f"❌ 변환 실패: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def convert_to_tabify_compatible_midi_stream(input_audio_path, output_midi_path, model=None):
+    """
+    스트리밍 Tabify 호환 변환: 확정된 노트 조각마다 바로 모노포닉/기타 범위 필터를 적용
+    (곡 전체 note_events를 모으지 않음, 결과는 일괄 변환과 같은 규칙)
+    """
+    try:
+        print("🎸 Tabify 호환 기타 MIDI 스트리밍 변환 시작...")
+        
+        pieces = []
+        source_count = 0
+        not_before = None
+        for note_events in stream_note_events(input_audio_path, model if model is not None else ICASSP_2022_MODEL_PATH):
+            notes = create_monophonic_sequence(NoteArray.from_note_events(note_events), not_before)
+            source_count += len(note_events)
+            if len(notes) == 0:
+                continue
+            pieces.append(enhance_musical_expression(notes))
+            not_before = float(notes.end[-1]) + MIN_NOTE_GAP
+            print(f"  ⏱️ {notes.end[-1]:.1f}초까지 확정: 노트 {len(note_events)}개 → {len(notes)}개")
+        
+        print(f"📊 원본 노트 수: {source_count}")
+        if not pieces:
+            print("❌ 변환 가능한 노트가 없습니다.")
+            return False
+        
+        enhanced_notes = NoteArray(np.concatenate([piece.data for piece in pieces]))
+        print(f"📊 변환된 노트 수: {len(enhanced_notes)}")
+        
+        write_notes(output_midi_path, enhanced_notes, program=25, name="Acoustic Guitar (steel)")
+        print(f"✅ Tabify 호환 MIDI 저장: {output_midi_path}")
+        return True
+        
+    except Exception as e:
+        print(f"❌ 변환 실패: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def tabify_compatible_from_prediction(midi_data, note_events, output_midi_path):
+    """이미 실행된 Basic Pitch 결과(note_events)로 Tabify 호환 MIDI 생성"""
+    try:
         if not note_events or len(note_events) == 0:
             print("❌ 음표를 찾을 수 없습니다.")
             return False
@@ -145,16 +164,9 @@ def convert_to_tabify_compatible_midi(input_audio_path, output_midi_path):
         print(f"📊 원본 노트 수: {len(note_events)}")
         
         # 노트 데이터 정리
-        notes_data = []
-        for note in note_events:
-            if len(note) >= 3:  # onset, offset, pitch
-                notes_data.append({
-                    'onset': float(note[0]),
-                    'offset': float(note[1]), 
-                    'pitch': float(note[2])
-                })
-        
-        if not notes_data:
+        notes_data = NoteArray.from_note_events(note_events)
+        
+        if len(notes_data) == 0:
             print("❌ 유효한 노트 데이터가 없습니다.")
             return False
         
@@ -162,7 +174,7 @@ def convert_to_tabify_compatible_midi(input_audio_path, output_midi_path):
         print("🎯 모노포닉 변환 및 기타 범위 조정...")
         monophonic_notes = create_monophonic_sequence(notes_data)
         
-        if not monophonic_notes:
+        if len(monophonic_notes) == 0:
             print("❌ 변환 가능한 노트가 없습니다.")
             return False
         
@@ -172,51 +184,29 @@ def convert_to_tabify_compatible_midi(input_audio_path, output_midi_path):
         print("🎵 음악적 표현력 향상...")
         enhanced_notes = enhance_musical_expression(monophonic_notes)
         
-        # MIDI 파일 생성
+        # MIDI 파일 생성 및 저장 (기타 악기: Acoustic Guitar steel, 노트 객체 없이 배열에서 바로 씀)
         print("🎹 MIDI 파일 생성...")
-        midi = pretty_midi.PrettyMIDI()
-        
-        # 기타 악기 설정 (Acoustic Guitar steel)
-        guitar = pretty_midi.Instrument(program=25, name="Acoustic Guitar (steel)")
-        guitar.is_drum = False
-        
-        # 노트 추가
-        for note_data in enhanced_notes:
-            note = pretty_midi.Note(
-                velocity=note_data['velocity'],
-                pitch=note_data['pitch'],
-                start=note_data['onset'],
-                end=note_data['offset']
-            )
-            guitar.notes.append(note)
-        
-        midi.instruments.append(guitar)
-        
-        # 파일 저장
-        midi.write(output_midi_path)
+        write_notes(output_midi_path, enhanced_notes, program=25, name="Acoustic Guitar (steel)")
         print(f"✅ Tabify 호환 MIDI 저장: {output_midi_path}")
         
         # 결과 요약
-        pitches = [n['pitch'] for n in enhanced_notes]
-        velocities = [n['velocity'] for n in enhanced_notes]
-        durations = [n['duration'] for n in enhanced_notes]
+        durations = enhanced_notes.duration
         
         print(f"📊 최종 결과:")
-        print(f"  - 음역대: {min(pitches)} - {max(pitches)} (확장된 기타 범위: 40-60)")
-        print(f"  - 벨로시티: {min(velocities)} - {max(velocities)}")
-        print(f"  - 노트 길이: {min(durations):.3f} - {max(durations):.3f}초")
-        print(f"  - 총 연주 시간: {max([n['offset'] for n in enhanced_notes]):.1f}초")
+        print(f"  - 음역대: {enhanced_notes.pitch.min()} - {enhanced_notes.pitch.max()} (확장된 기타 범위: 40-60)")
+        print(f"  - 벨로시티: {enhanced_notes.velocity.min()} - {enhanced_notes.velocity.max()}")
+        print(f"  - 노트 길이: {durations.min():.3f} - {durations.max():.3f}초")
+        print(f"  - 총 연주 시간: {enhanced_notes.end.max():.1f}초")
         
         # 현별 분포
-        string_distribution = {}
-        for note in enhanced_notes:
-            string_name = note['string']
-            string_distribution[string_name] = string_distribution.get(string_name, 0) + 1
+        string_counts = np.bincount(enhanced_notes.string, minlength=len(GUITAR_STRINGS))
         
         print(f"🎸 현별 분포:")
-        for string, count in string_distribution.items():
+        _, first_seen = np.unique(enhanced_notes.string, return_index=True)
+        for string_index in enhanced_notes.string[np.sort(first_seen)]:
+            count = string_counts[string_index]
             percentage = (count / len(enhanced_notes)) * 100
-            print(f"  - {string}: {count}개 ({percentage:.1f}%)")
+            print(f"  - {GUITAR_STRINGS[string_index][1]}: {count}개 ({percentage:.1f}%)")
         
         return True
         
@@ -227,12 +217,15 @@ def convert_to_tabify_compatible_midi(input_audio_path, output_midi_path):
         return False
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("사용법: python midi_conversion_tabify_compatible.py <input.wav> <output.mid>")
+    args = [arg for arg in sys.argv[1:] if arg != "--stream"]
+    if len(args) != 2:
+        print("사용법: python midi_conversion_tabify_compatible.py <input.wav> <output.mid> [--stream]")
         sys.exit(1)
     
-    input_path = sys.argv[1]
-    output_path = sys.argv[2]
+    input_path, output_path = args
     
-    success = convert_to_tabify_compatible_midi(input_path, output_path)
+    if "--stream" in sys.argv[1:]:
+        success = convert_to_tabify_compatible_midi_stream(input_path, output_path)
+    else:
+        success = convert_to_tabify_compatible_midi(input_path, output_path)
     sys.exit(0 if success else 1)
@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+경량 SMF (타입 0/1) 읽기/쓰기
+pretty_midi / mido처럼 이벤트마다 파이썬 객체를 만들지 않고, 바이트에서 노트 on/off를 바로
+NoteArray (start, end, pitch, velocity)로 읽고 같은 방식으로 다시 씀
+- 읽기: pretty_midi와 같은 규칙 (템포는 0번 트랙, 악기는 (프로그램, 채널, 트랙)별, 노트 off 순서,
+  같은 틱의 on/off 처리, 벨로시티 0 note on = note off), 같은 시각(초) 값
+- 쓰기: 노트만 있는 단일 템포 MIDI를 pretty_midi.write와 같은 바이트로 (러닝 스테이터스 포함)
+- 피치 벤드 / 컨트롤 체인지 / 박자표 등은 읽지 않음, 필요하면 pretty_midi 사용
+
+검증/벤치마크: python midi_io.py <file.mid> [...] [--repeat 5]
+  pretty_midi와 노트가 같은지, 다시 쓴 바이트가 pretty_midi.write와 같은지 확인하고 파싱 속도 비교
+"""
+
+import io
+import os
+import sys
+import time
+import struct
+import argparse
+from collections import namedtuple
+import numpy as np
+from note_array import NoteArray
+
+# 악기 트랙 하나 (notes: NoteArray), 파일 전체 (resolution: 4분음표당 틱)
+SmfInstrument = namedtuple("SmfInstrument", ["program", "is_drum", "name", "notes"])
+SmfData = namedtuple("SmfData", ["resolution", "instruments"])
+
+DEFAULT_RESOLUTION = 220  # pretty_midi.PrettyMIDI() 기본값
+DEFAULT_TEMPO = 120.0
+MAX_TICK = 1e7  # pretty_midi와 같은 손상 파일 기준
+DRUM_CHANNEL = 9
+
+# 시스템 공통 메시지 데이터 길이 (F1-F6, F8-FE)
+_SYSTEM_LENGTHS = {0xf1: 1, 0xf2: 2, 0xf3: 1, 0xf4: 0, 0xf5: 0, 0xf6: 0}
+
+def _read_bytes(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return f.read()
+    return source.read()
+
+def _chunks(data):
+    """(이름, 시작, 끝) 청크 목록"""
+    pos = 0
+    while pos + 8 <= len(data):
+        name = data[pos:pos + 4]
+        size = struct.unpack(">L", data[pos + 4:pos + 8])[0]
+        yield name, pos + 8, min(pos + 8 + size, len(data))
+        pos += 8 + size
+
+def _parse_track(data, pos, end, track_index, instruments, tempo_events):
+    """트랙 하나를 읽어서 노트를 instruments[(program, channel, track)]에 추가, 마지막 틱 반환"""
+    tick = 0
+    running = None
+    program = [0] * 16
+    open_notes = {}
+    name = ""
+
+    while pos < end:
+        byte = data[pos]
+        pos += 1
+        delta = byte & 0x7f
+        while byte & 0x80:
+            byte = data[pos]
+            pos += 1
+            delta = (delta << 7) | (byte & 0x7f)
+        tick += delta
+
+        status = data[pos]
+        if status < 0x80:
+            if running is None:
+                raise ValueError("러닝 스테이터스 앞에 상태 바이트가 없습니다")
+            status = running
+        else:
+            pos += 1
+            if status != 0xff:
+                running = status
+
+        if status == 0xff:
+            meta_type = data[pos]
+            pos += 1
+            byte = data[pos]
+            pos += 1
+            length = byte & 0x7f
+            while byte & 0x80:
+                byte = data[pos]
+                pos += 1
+                length = (length << 7) | (byte & 0x7f)
+            if meta_type == 0x03:
+                name = data[pos:pos + length].decode("latin1")
+            elif meta_type == 0x51 and tempo_events is not None and length == 3:
+                tempo_events.append((tick, (data[pos] << 16) | (data[pos + 1] << 8) | data[pos + 2]))
+            pos += length
+            continue
+
+        if status >= 0xf0:
+            if status in (0xf0, 0xf7):
+                byte = data[pos]
+                pos += 1
+                length = byte & 0x7f
+                while byte & 0x80:
+                    byte = data[pos]
+                    pos += 1
+                    length = (length << 7) | (byte & 0x7f)
+                pos += length
+            else:
+                pos += _SYSTEM_LENGTHS.get(status, 0)
+            continue
+
+        kind = status & 0xf0
+        channel = status & 0x0f
+        if kind == 0xc0:
+            program[channel] = data[pos]
+            pos += 1
+            continue
+        if kind == 0xd0:
+            pos += 1
+            continue
+
+        pitch = data[pos]
+        velocity = data[pos + 1]
+        pos += 2
+        if kind == 0x90 and velocity > 0:
+            key = (channel, pitch)
+            if key in open_notes:
+                open_notes[key].append((tick, velocity))
+            else:
+                open_notes[key] = [(tick, velocity)]
+        elif kind == 0x80 or kind == 0x90:
+            key = (channel, pitch)
+            opened = open_notes.get(key)
+            if opened is None:
+                continue
+            # 노트 off 하나가 이전 틱에 켜진 노트를 모두 끄고, 같은 틱에 켜진 노트는 계속 울림
+            closing = [note for note in opened if note[0] != tick]
+            keeping = [note for note in opened if note[0] == tick] if len(closing) != len(opened) else []
+            if closing:
+                instrument_key = (program[channel], channel, track_index)
+                columns = instruments.get(instrument_key)
+                if columns is None:
+                    columns = instruments[instrument_key] = (name, [], [], [], [])
+                for start_tick, start_velocity in closing:
+                    columns[1].append(start_tick)
+                    columns[2].append(tick)
+                    columns[3].append(pitch)
+                    columns[4].append(start_velocity)
+            if closing and keeping:
+                open_notes[key] = keeping
+            else:
+                del open_notes[key]
+
+    return tick
+
+def _tick_scales(tempo_events, resolution):
+    """0번 트랙 set_tempo → [(틱, 틱당 초)] (pretty_midi._load_tempo_changes와 같은 규칙)"""
+    scales = [(0, 60.0 / (120.0 * resolution))]
+    for tick, tempo in tempo_events:
+        bpm = 6e7 / tempo
+        if tick == 0:
+            scales = [(0, 60.0 / (bpm * resolution))]
+        else:
+            tick_scale = 60.0 / ((6e7 / tempo) * resolution)
+            if tick_scale != scales[-1][1]:
+                scales.append((tick, tick_scale))
+    return scales
+
+def ticks_to_seconds(ticks, scales):
+    """틱 배열 → 초 (템포 구간마다 구간 시작 시각 + 틱당 초 × 구간 안 틱, pretty_midi와 같은 계산)"""
+    ticks = np.asarray(ticks, dtype=np.int64)
+    scale_ticks = np.array([tick for tick, _ in scales], dtype=np.int64)
+    scale_values = np.array([value for _, value in scales])
+    base = np.zeros(len(scales))
+    for i in range(1, len(scales)):
+        base[i] = base[i - 1] + scale_values[i - 1] * (scale_ticks[i] - scale_ticks[i - 1])
+    segment = np.searchsorted(scale_ticks, ticks, side="right") - 1
+    return base[segment] + scale_values[segment] * (ticks - scale_ticks[segment])
+
+def read_midi(source):
+    """
+    MIDI 파일 (경로, 바이트, 파일 객체) → SmfData(resolution, [SmfInstrument(program, is_drum, name, notes)])
+    악기 순서와 악기 안의 노트 순서는 pretty_midi.PrettyMIDI(path).instruments와 같음
+    """
+    data = _read_bytes(source)
+    chunks = list(_chunks(data))
+    if not chunks or chunks[0][0] != b"MThd":
+        raise ValueError("MThd 헤더가 없습니다 (MIDI 파일이 아님)")
+    _, header_start, header_end = chunks[0]
+    if header_end - header_start < 6:
+        raise ValueError("MThd 헤더가 잘렸습니다")
+    file_type, track_count, division = struct.unpack(">hhh", data[header_start:header_start + 6])
+    if file_type not in (0, 1):
+        raise ValueError(f"지원하지 않는 SMF 타입: {file_type}")
+    if division <= 0:
+        raise ValueError("SMPTE 시간 단위는 지원하지 않습니다")
+
+    instruments = {}
+    tempo_events = []
+    max_tick = 0
+    tracks = [(start, end) for name, start, end in chunks[1:] if name == b"MTrk"][:track_count]
+    for track_index, (start, end) in enumerate(tracks):
+        try:
+            last_tick = _parse_track(data, start, end, track_index, instruments,
+                                     tempo_events if track_index == 0 else None)
+        except IndexError:
+            raise ValueError(f"{track_index}번 트랙이 중간에 끝났습니다")
+        max_tick = max(max_tick, last_tick)
+    if max_tick + 1 > MAX_TICK:
+        raise ValueError(f"MIDI 파일의 마지막 틱이 {max_tick}입니다 (손상된 파일)")
+
+    scales = _tick_scales(tempo_events, division)
+    result = []
+    for (program, channel, _), (name, start_ticks, end_ticks, pitches, velocities) in instruments.items():
+        notes = NoteArray.from_columns(
+            ticks_to_seconds(start_ticks, scales), ticks_to_seconds(end_ticks, scales), pitches, velocities
+        )
+        result.append(SmfInstrument(program, channel == DRUM_CHANNEL, name, notes))
+    return SmfData(division, result)
+
+def read_notes(source, instrument_index=0):
+    """MIDI 파일의 한 악기 트랙 노트 → NoteArray (악기가 없으면 빈 배열)"""
+    instruments = read_midi(source).instruments
+    if instrument_index >= len(instruments):
+        return NoteArray()
+    return instruments[instrument_index].notes
+
+def _variable_length(values):
+    """정수 배열 → (N, 4) 가변 길이 바이트 행렬, 바이트 수 (N,)"""
+    values = np.asarray(values, dtype=np.int64)
+    if np.any(values >= 1 << 28):
+        raise ValueError("틱 간격이 너무 큽니다")
+    lengths = 1 + (values >= 1 << 7) + (values >= 1 << 14) + (values >= 1 << 21)
+    columns = np.arange(4)
+    shift = 7 * (lengths[:, np.newaxis] - 1 - columns[np.newaxis, :])
+    matrix = (values[:, np.newaxis] >> np.maximum(shift, 0)) & 0x7f
+    matrix |= np.where(shift > 0, 0x80, 0)
+    return matrix.astype(np.uint8), lengths
+
+def _meta(meta_type, payload):
+    """틱 간격 0 메타 이벤트"""
+    length, size = _variable_length([len(payload)])
+    return bytes([0, 0xff, meta_type]) + length[0, :size[0]].tobytes() + payload
+
+def seconds_to_ticks(seconds, resolution=DEFAULT_RESOLUTION, tempo=DEFAULT_TEMPO):
+    """초 → 틱 (단일 템포 PrettyMIDI.time_to_tick과 같은 반올림, 0 이하는 0)"""
+    seconds = np.asarray(seconds, dtype=np.float64)
+    tick_scale = 60.0 / (tempo * resolution)
+    return np.where(seconds > 0, np.rint(seconds / tick_scale), 0).astype(np.int64)
+
+def _note_track(notes, program, channel, name, resolution, tempo):
+    """노트 트랙 바이트 (이름, 프로그램 체인지, 정렬된 note on/off, 트랙 끝)"""
+    if np.any((notes.pitch < 0) | (notes.pitch > 127) | (notes.velocity < 0) | (notes.velocity > 127)):
+        raise ValueError("음높이/벨로시티는 0-127이어야 합니다")
+    header = _meta(0x03, name.encode("latin1")) if name else b""
+    header += bytes([0, 0xc0 | channel, program])
+
+    count = len(notes)
+    if count == 0:
+        return header + bytes([1, 0xff, 0x2f, 0])
+
+    # note on / note off (벨로시티 0 note on)을 번갈아 놓고 (틱, 음높이, 벨로시티) 순으로 안정 정렬
+    ticks = np.empty(2 * count, dtype=np.int64)
+    ticks[0::2] = seconds_to_ticks(notes.start, resolution, tempo)
+    ticks[1::2] = seconds_to_ticks(notes.end, resolution, tempo)
+    pitch = np.repeat(notes.pitch.astype(np.int64), 2)
+    velocity = np.zeros(2 * count, dtype=np.int64)
+    velocity[0::2] = notes.velocity
+    order = np.lexsort((pitch * 256 + velocity, ticks))
+    ticks, pitch, velocity = ticks[order], pitch[order], velocity[order]
+
+    delta_bytes, delta_lengths = _variable_length(np.diff(ticks, prepend=0))
+    # 이벤트마다 [간격 1-4바이트, 상태(첫 이벤트만, 나머지는 러닝 스테이터스), 음높이, 벨로시티]
+    matrix = np.zeros((2 * count, 7), dtype=np.uint8)
+    matrix[:, :4] = delta_bytes
+    matrix[0, 4] = 0x90 | channel
+    matrix[:, 5] = pitch
+    matrix[:, 6] = velocity
+    valid = np.zeros((2 * count, 7), dtype=bool)
+    valid[:, :4] = np.arange(4)[np.newaxis, :] < delta_lengths[:, np.newaxis]
+    valid[0, 4] = True
+    valid[:, 5:] = True
+    return header + matrix[valid].tobytes() + bytes([1, 0xff, 0x2f, 0])
+
+def midi_bytes(instruments, resolution=DEFAULT_RESOLUTION, tempo=DEFAULT_TEMPO):
+    """
+    악기 목록 → SMF 타입 1 바이트 (pretty_midi.write와 같은 배치: 0번 템포 트랙 + 악기별 트랙)
+    instruments: SmfInstrument 또는 program/is_drum/name/notes 속성이 있는 객체 (pretty_midi.Instrument 포함)
+    """
+    tick_scale = 60.0 / (tempo * resolution)
+    microseconds = int(6e7 / (60. / (tick_scale * resolution)))
+    timing = (bytes([0, 0xff, 0x51, 3]) + microseconds.to_bytes(3, "big") +
+              bytes([0, 0xff, 0x58, 4, 4, 2, 24, 8]) + bytes([1, 0xff, 0x2f, 0]))
+    tracks = [timing]
+
+    channels = [channel for channel in range(16) if channel != DRUM_CHANNEL]
+    for index, instrument in enumerate(instruments):
+        notes = instrument.notes
+        if not isinstance(notes, NoteArray):
+            notes = NoteArray.from_notes(notes)
+        channel = DRUM_CHANNEL if instrument.is_drum else channels[index % len(channels)]
+        tracks.append(_note_track(notes, int(instrument.program), channel, instrument.name,
+                                  resolution, tempo))
+
+    output = io.BytesIO()
+    output.write(b"MThd" + struct.pack(">Lhhh", 6, 1, len(tracks), resolution))
+    for track in tracks:
+        output.write(b"MTrk" + struct.pack(">L", len(track)) + track)
+    return output.getvalue()
+
+def write_midi(destination, instruments, resolution=DEFAULT_RESOLUTION, tempo=DEFAULT_TEMPO):
+    """악기 목록 → MIDI 파일 (경로 또는 파일 객체)"""
+    data = midi_bytes(instruments, resolution, tempo)
+    if isinstance(destination, (str, os.PathLike)):
+        with open(destination, "wb") as f:
+            f.write(data)
+    else:
+        destination.write(data)
+
+def write_notes(destination, notes, program=25, name="", resolution=DEFAULT_RESOLUTION, tempo=DEFAULT_TEMPO):
+    """NoteArray 하나 → 악기 트랙 하나짜리 MIDI 파일"""
+    write_midi(destination, [SmfInstrument(program, False, name, notes)], resolution, tempo)
+
+def _notes_only(midi_data):
+    """노트 외의 이벤트가 없는 단일 템포 PrettyMIDI인지 (빠른 쓰기로 같은 파일이 나오는 경우, 0초의 4/4 박자표는 허용)"""
+    default_signature = all(
+        (signature.numerator, signature.denominator, signature.time) == (4, 4, 0)
+        for signature in midi_data.time_signature_changes
+    )
+    return (len(midi_data.get_tempo_changes()[0]) == 1 and
+            len(midi_data.time_signature_changes) <= 1 and default_signature and not midi_data.key_signature_changes and
+            not midi_data.lyrics and not midi_data.text_events and
+            not any(instrument.pitch_bends or instrument.control_changes for instrument in midi_data.instruments))
+
+def save_pretty_midi(midi_data, destination):
+    """PrettyMIDI 저장: 노트만 있으면 빠른 쓰기, 피치 벤드 등이 있으면 midi_data.write"""
+    if not _notes_only(midi_data):
+        midi_data.write(destination)
+        return
+    tempo = float(midi_data.get_tempo_changes()[1][0])
+    write_midi(destination, midi_data.instruments, midi_data.resolution, tempo)
+
+def reload_notes(midi_data):
+    """PrettyMIDI를 파일로 저장했다가 다시 읽은 것과 같은 노트 (틱 단위로 양자화) → SmfData, 디스크를 거치지 않음"""
+    if len(midi_data.get_tempo_changes()[0]) == 1:
+        tempo = float(midi_data.get_tempo_changes()[1][0])
+        return read_midi(midi_bytes(midi_data.instruments, midi_data.resolution, tempo))
+    buffer = io.BytesIO()
+    midi_data.write(buffer)
+    return read_midi(buffer.getvalue())
+
+def _same_notes(ours, theirs):
+    return (len(ours) == len(theirs) and
+            all(a.program == b.program and a.is_drum == b.is_drum and a.name == b.name and
+                np.array_equal(a.notes.data[["start", "end", "pitch", "velocity"]],
+                               NoteArray.from_notes(b.notes).data[["start", "end", "pitch", "velocity"]])
+                for a, b in zip(ours, theirs)))
+
+def check_file(path, repeat=5):
+    """pretty_midi와 읽은 노트 / 다시 쓴 바이트 비교, 파싱 시간 비교 → 결과 dict"""
+    import pretty_midi
+
+    data = _read_bytes(path)
+    ours = read_midi(data)
+    theirs = pretty_midi.PrettyMIDI(io.BytesIO(data))
+    same_read = _same_notes(ours.instruments, theirs.instruments)
+
+    # 다시 쓰기: 단일 템포 / 노트만 있는 파일이면 pretty_midi.write와 바이트 비교
+    same_write = None
+    if _notes_only(theirs):
+        buffer = io.BytesIO()
+        theirs.write(buffer)
+        rewritten = midi_bytes(ours.instruments, ours.resolution, float(theirs.get_tempo_changes()[1][0]))
+        same_write = rewritten == buffer.getvalue()
+
+    def best_of(function):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    ours_seconds = best_of(lambda: read_midi(data))
+    theirs_seconds = best_of(lambda: pretty_midi.PrettyMIDI(io.BytesIO(data)))
+    note_count = sum(len(instrument.notes) for instrument in ours.instruments)
+    return {
+        "path": os.fsdecode(path) if isinstance(path, (str, os.PathLike)) else "<bytes>",
+        "notes": note_count,
+        "same_read": same_read,
+        "same_write": same_write,
+        "read_ms": round(ours_seconds * 1000, 3),
+        "pretty_midi_ms": round(theirs_seconds * 1000, 3),
+        "notes_per_second": round(note_count / ours_seconds) if ours_seconds > 0 else 0,
+        "speedup": round(theirs_seconds / ours_seconds, 1) if ours_seconds > 0 else 0.0,
+    }
+
+def _synthetic_midi(note_count, seed=0):
+    """벤치마크용 MIDI 바이트 (pretty_midi로 작성, 겹치는 노트/같은 틱 on-off 포함)"""
+    import pretty_midi
+
+    rng = np.random.default_rng(seed)
+    midi = pretty_midi.PrettyMIDI()
+    for program in (25, 33):
+        instrument = pretty_midi.Instrument(program=program, name=f"program {program}")
+        start = np.sort(rng.uniform(0, note_count / 8, note_count // 2))
+        end = start + rng.choice([0.0, 0.05, 0.25, 1.0, 3.0], size=start.shape)
+        for note_start, note_end, pitch, velocity in zip(start.tolist(), end.tolist(),
+                                                         rng.integers(28, 90, start.shape).tolist(),
+                                                         rng.integers(1, 128, start.shape).tolist()):
+            instrument.notes.append(pretty_midi.Note(velocity, pitch, note_start, note_end))
+        midi.instruments.append(instrument)
+    buffer = io.BytesIO()
+    midi.write(buffer)
+    return buffer.getvalue()
+
+def main():
+    parser = argparse.ArgumentParser(description='경량 MIDI 읽기/쓰기 검증 (pretty_midi와 비교) 및 파싱 속도 벤치마크')
+    parser.add_argument('paths', nargs='*', help='검사할 MIDI 파일 (없으면 합성 MIDI)')
+    parser.add_argument('--notes', type=int, default=20000, help='합성 MIDI 노트 수')
+    parser.add_argument('--repeat', type=int, default=5, help='시간 측정 반복 횟수 (최솟값 사용)')
+
+    args = parser.parse_args()
+    sources = args.paths or [io.BytesIO(_synthetic_midi(args.notes))]
+
+    ok = True
+    for source in sources:
+        result = check_file(source, args.repeat)
+        if not args.paths:
+            result["path"] = f"합성 {args.notes}노트"
+        ok = ok and result["same_read"] and result["same_write"] is not False
+        write_text = {True: "일치", False: "불일치", None: "건너뜀 (노트 외 이벤트)"}[result["same_write"]]
+        print(f"{'✅' if result['same_read'] else '❌'} {result['path']}: 노트 {result['notes']}개, "
+              f"읽기 {'일치' if result['same_read'] else '불일치'}, 쓰기 {write_text}")
+        print(f"   ⏱️ {result['read_ms']:.2f}ms (pretty_midi {result['pretty_midi_ms']:.2f}ms, "
+              f"{result['speedup']}배), {result['notes_per_second']:,} notes/s")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
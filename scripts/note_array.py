@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+컬럼형 노트 배열
+MIDI 후처리 스크립트들이 공통으로 쓰는 NumPy 구조화 배열 (start, end, pitch, velocity, string, fret)
+노트마다 파이썬 객체를 만들지 않고 배열 연산으로 후처리
+- Basic Pitch note_events / pretty_midi 노트 / TAB 위치 dict 변환
+- string, fret은 표준 튜닝 기준 (0 = 6번 저음 E현), 아직 배정 전이면 -1
+"""
+
+import numpy as np
+import pretty_midi
+
+NOTE_DTYPE = np.dtype([
+    ("start", np.float64),
+    ("end", np.float64),
+    ("pitch", np.int16),
+    ("velocity", np.int16),
+    ("string", np.int8),
+    ("fret", np.int8),
+])
+
+class NoteArray:
+    """NOTE_DTYPE 구조화 배열을 감싼 노트 목록 (인덱싱/마스크는 새 NoteArray 반환)"""
+
+    def __init__(self, data=None):
+        self.data = np.zeros(0, dtype=NOTE_DTYPE) if data is None else np.asarray(data, dtype=NOTE_DTYPE)
+
+    @classmethod
+    def from_columns(cls, start, end, pitch, velocity=100, string=-1, fret=-1):
+        start = np.asarray(start, dtype=np.float64)
+        data = np.empty(start.shape[0], dtype=NOTE_DTYPE)
+        data["start"] = start
+        data["end"] = end
+        data["pitch"] = pitch
+        data["velocity"] = velocity
+        data["string"] = string
+        data["fret"] = fret
+        return cls(data)
+
+    @classmethod
+    def from_note_events(cls, note_events, default_velocity=100):
+        """
+        Basic Pitch note_events (start, end, pitch[, amplitude, pitch_bends]) → NoteArray
+        벨로시티는 basic_pitch와 같은 round(127 * amplitude), amplitude가 없으면 default_velocity
+        """
+        events = [event for event in note_events if len(event) >= 3]
+        if not events:
+            return cls()
+        start = np.array([float(event[0]) for event in events])
+        end = np.array([float(event[1]) for event in events])
+        pitch = np.round([float(event[2]) for event in events]).astype(np.int16)
+        velocity = np.array([
+            int(np.round(127 * event[3])) if len(event) >= 4 else default_velocity for event in events
+        ])
+        return cls.from_columns(start, end, pitch, velocity)
+
+    @classmethod
+    def from_notes(cls, notes):
+        """pretty_midi.Note 리스트 → NoteArray"""
+        notes = list(notes)
+        return cls.from_columns(
+            [note.start for note in notes],
+            [note.end for note in notes],
+            [note.pitch for note in notes],
+            [note.velocity for note in notes],
+        )
+
+    @classmethod
+    def from_midi(cls, midi_data, instrument_index=0):
+        """PrettyMIDI의 한 악기 트랙 → NoteArray"""
+        if not midi_data.instruments:
+            return cls()
+        return cls.from_notes(midi_data.instruments[instrument_index].notes)
+
+    def to_notes(self):
+        """
+        NoteArray → pretty_midi.Note 리스트
+        겹침 정리로 끝이 시작보다 앞선 노트도 그대로 옮김 (Note 생성자는 거부하므로 생성 후 끝을 설정)
+        """
+        notes = [
+            pretty_midi.Note(velocity=velocity, pitch=pitch, start=start, end=max(start, end))
+            for start, end, pitch, velocity in zip(
+                self.start.tolist(), self.end.tolist(), self.pitch.tolist(), self.velocity.tolist()
+            )
+        ]
+        for index in np.flatnonzero(self.end < self.start).tolist():
+            notes[index].end = float(self.end[index])
+        return notes
+
+    def to_instrument(self, program=25, name="", is_drum=False):
+        instrument = pretty_midi.Instrument(program=program, name=name, is_drum=is_drum)
+        instrument.notes = self.to_notes()
+        return instrument
+
+    def to_tab_positions(self):
+        """GuitarTabGenerator의 TAB 위치 dict 리스트로 변환"""
+        return [
+            {"time": start, "string": string, "fret": fret, "duration": end - start,
+             "velocity": velocity, "pitch": pitch}
+            for start, end, pitch, velocity, string, fret in zip(
+                self.start.tolist(), self.end.tolist(), self.pitch.tolist(),
+                self.velocity.tolist(), self.string.tolist(), self.fret.tolist()
+            )
+        ]
+
+    @property
+    def start(self):
+        return self.data["start"]
+
+    @property
+    def end(self):
+        return self.data["end"]
+
+    @property
+    def pitch(self):
+        return self.data["pitch"]
+
+    @property
+    def velocity(self):
+        return self.data["velocity"]
+
+    @property
+    def string(self):
+        return self.data["string"]
+
+    @property
+    def fret(self):
+        return self.data["fret"]
+
+    @property
+    def duration(self):
+        return self.data["end"] - self.data["start"]
+
+    def sorted_by_start(self):
+        """시작 시각 순 정렬 (같은 시각은 원래 순서 유지, sorted()와 동일)"""
+        return NoteArray(self.data[np.argsort(self.data["start"], kind="stable")])
+
+    def copy(self):
+        return NoteArray(self.data.copy())
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    def __getitem__(self, index):
+        return NoteArray(np.atleast_1d(self.data[index]))
+
+    def __repr__(self):
+        return f"NoteArray({len(self)} notes)"
+
+def fold_octaves(pitch, low, high):
+    """
+    옥타브 단위로 [low, high] 안으로 이동 (while pitch < low: pitch += 12 과 같은 결과)
+    범위 폭이 12 미만이라 들어가지 않는 음은 경계를 넘은 채로 남음
+    """
+    pitch = np.asarray(pitch, dtype=np.int64)
+    up = np.maximum(0, -((pitch - low) // 12))
+    down = np.maximum(0, -((high - pitch) // 12))
+    return pitch + 12 * up - 12 * down
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+노트 정리 라이브러리 (NoteArray)
+MIDI 후처리 스크립트들의 정리 단계를 리스트 중간 삭제(del) 없이 마스크와 배열 연산으로 처리
+- 음역 필터 / 옥타브 접기
+- 최소·최대 길이 정리 (짧은 노트 제거, 길이 범위로 끝 조정)
+- 겹침 정리 (끝 당기기, 심하게 겹치는 짧은 노트 제거, 뒤 노트 밀어내기)
+- 같은 음높이 연속 노트 합치기 (merge_same_pitch)
+- 직전 노트 기준 순차 합치기/끝 조정 (merge_and_trim)
+모든 함수는 새 NoteArray를 반환하고 입력은 바꾸지 않음, 겹침 관련 함수는 시작 시각 순으로 정렬된 입력 기준
+"""
+
+import numpy as np
+from note_array import fold_octaves
+
+def keep_pitch_range(notes, low, high):
+    """low ≤ 음높이 ≤ high 인 노트만 남김"""
+    return notes[(notes.pitch >= low) & (notes.pitch <= high)]
+
+def fold_into_range(notes, low, high):
+    """옥타브 단위로 [low, high] 안으로 이동 → (새 NoteArray, 음높이가 바뀐 노트 마스크)"""
+    folded = notes.copy()
+    folded.pitch[:] = fold_octaves(notes.pitch, low, high)
+    return folded, folded.pitch != notes.pitch
+
+def drop_short(notes, min_duration):
+    """길이가 min_duration보다 짧은 노트 제거"""
+    return notes[notes.duration >= min_duration]
+
+def clamp_durations(notes, min_duration=None, max_duration=None):
+    """길이를 [min_duration, max_duration] 범위로 (시작은 그대로, 범위 안의 노트는 끝도 그대로)"""
+    clamped = notes.copy()
+    duration = notes.duration
+    if min_duration is not None:
+        clamped.end[:] = np.where(duration < min_duration, notes.start + min_duration, clamped.end)
+    if max_duration is not None:
+        clamped.end[:] = np.where(duration > max_duration, notes.start + max_duration, clamped.end)
+    return clamped
+
+def trim_overlaps(notes, gap=0.01):
+    """다음 노트 시작 전에 끝나지 않는 노트는 다음 시작 gap 전에 끝냄 (모든 쌍을 원래 시각 기준으로 한 번에)"""
+    trimmed = notes.copy()
+    if len(notes) < 2:
+        return trimmed
+    next_start = notes.start[1:]
+    trimmed.end[:-1] = np.where(next_start < notes.end[:-1], next_start - gap, notes.end[:-1])
+    return trimmed
+
+def drop_overlapped(notes, ratio=0.9, gap=0.01):
+    """
+    연속한 두 노트가 긴 쪽 길이의 ratio 넘게 겹치면 앞 노트가 더 짧을 때는 앞 노트 제거,
+    아니면 앞 노트를 다음 시작 gap 전에 끝냄 (판단은 모두 원래 시각 기준)
+    """
+    if len(notes) < 2:
+        return notes.copy()
+    start, end = notes.start, notes.end
+    current_duration = end[:-1] - start[:-1]
+    next_duration = end[1:] - start[1:]
+    overlap = np.maximum(0, np.minimum(end[:-1], end[1:]) - np.maximum(start[:-1], start[1:]))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        heavy = overlap / np.maximum(current_duration, next_duration) > ratio
+
+    shorter = heavy & (current_duration < next_duration)
+    trimmed = notes.copy()
+    trimmed.end[:-1] = np.where(heavy & ~shorter, start[1:] - gap, end[:-1])
+    return trimmed[~np.append(shorter, False)]
+
+def merge_same_pitch(notes, max_gap=0.0):
+    """
+    같은 음높이가 연이어 나오고 합쳐진 앞 노트 끝 + max_gap 전에 시작하면 앞 노트로 합침 (끝은 가장 늦은 쪽)
+    같은 음높이 구간마다 앞 노트들 끝의 누적 최댓값과 비교 (끝 값을 정수 순위로 바꿔 구간별 누적 최댓값을 한 번에)
+    """
+    if len(notes) < 2:
+        return notes.copy()
+    same = notes.pitch[1:] == notes.pitch[:-1]
+    run = np.concatenate([[0], np.cumsum(~same)])
+    values, rank = np.unique(notes.end, return_inverse=True)
+    running_end = values[np.maximum.accumulate(rank + run * len(values)) - run * len(values)]
+    joins = np.append(False, same & (notes.start[1:] <= running_end[:-1] + max_gap))
+    heads = np.flatnonzero(~joins)
+    merged = notes[heads]
+    merged.end[:] = np.maximum.reduceat(notes.end, heads)
+    return merged
+
+def delay_overlaps(notes, gap=0.05, not_before=None):
+    """
+    겹치지 않게 뒤 노트를 밀어냄 (길이 유지): start[i] = max(start[i], end[i-1] + gap)
+    not_before: 첫 노트가 이보다 먼저 시작하지 않게 (스트리밍에서 이전 조각의 끝 + 간격)
+    """
+    delayed = notes.copy()
+    if len(notes) == 0:
+        return delayed
+    duration = notes.duration
+    start = notes.start.copy()
+    if not_before is not None:
+        start[0] = max(start[0], not_before)
+    # 누적합 C로 바꾸면 start[i] = C[i] + max(start[:i+1] - C[:i+1]) 이므로 한 번의 누적 최댓값으로 계산
+    steps = np.concatenate([[0.0], np.cumsum(duration[:-1] + gap)])
+    delayed.start[:] = steps + np.maximum.accumulate(start - steps)
+    delayed.end[:] = delayed.start + duration
+    return delayed
+
+def merge_and_trim(notes, merge_window, gap=0.01, min_duration=None, max_duration=None,
+                   phrase_break=None, phrase_rest=0.2):
+    """
+    직전에 남긴 노트(조정 후)를 기준으로 하는 순차 정리, 한 번의 선형 순회 + 마스크
+    - 겹치고 시작 간격이 merge_window 미만이면 직전 노트에 합침 (끝 연장)
+    - 그냥 겹치면 직전 노트를 이 노트 시작 gap 전에 끝냄
+    - phrase_break=(하한, 상한): 직전 노트와의 쉼이 그 사이면 쉼을 phrase_rest로 맞춤 (끝도 같이 미룸)
+    - 남긴 노트의 길이를 [min_duration, max_duration]으로
+    직전 노트의 조정 결과가 다음 판단에 쓰이므로 배열 연산 대신 순서대로 처리
+    """
+    start = notes.start.tolist()
+    end = notes.end.tolist()
+    keep = np.zeros(len(notes), dtype=bool)
+    prev = -1
+
+    for i in range(len(start)):
+        note_start, note_end = start[i], end[i]
+        if prev >= 0:
+            if note_start < end[prev]:
+                if note_start - start[prev] < merge_window:
+                    end[prev] = max(end[prev], note_end)
+                    continue
+                end[prev] = note_start - gap
+
+            rest = note_start - end[prev]
+            if phrase_break is not None and phrase_break[0] < rest < phrase_break[1]:
+                note_start = end[prev] + phrase_rest
+                note_end += phrase_rest
+
+        duration = note_end - note_start
+        if min_duration is not None and duration < min_duration:
+            note_end = note_start + min_duration
+        elif max_duration is not None and duration > max_duration:
+            note_end = note_start + max_duration
+
+        start[i], end[i] = note_start, note_end
+        keep[i] = True
+        prev = i
+
+    cleaned = notes.copy()
+    cleaned.start[:] = start
+    cleaned.end[:] = end
+    return cleaned[keep]
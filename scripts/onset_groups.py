@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+온셋 그룹화 + 멜로디 선택 (배열 연산)
+시작 시각을 time_resolution 단위 버킷으로 묶고, 버킷마다 한 음(또는 화음 일부)을 고름
+- 버킷 키: np.round(start / time_resolution) (파이썬 round와 같은 짝수 반올림)
+- 그룹 경계: 버킷 키의 안정 정렬 → 같은 버킷 안에서는 원래 순서 유지
+모노포닉/기타 최적화 스크립트가 같이 사용
+"""
+
+import numpy as np
+
+# 기타 멜로디에 적합한 음역대 (C3-E5: MIDI 48-76)
+MELODY_SWEET_SPOT = (48, 76)
+
+def onset_groups(start, time_resolution):
+    """
+    시작 시각 배열 → (order, bounds)
+    order[bounds[g]:bounds[g + 1]]가 g번째 버킷(시간 순)의 노트 인덱스 (버킷 안에서는 원래 순서)
+    """
+    keys = np.round(np.asarray(start, dtype=np.float64) / time_resolution)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    bounds = np.concatenate([[0], np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1, [len(order)]])
+    return order, bounds
+
+def melody_base_scores(notes):
+    """
+    이전 음과 무관한 멜로디 점수 (음역대 + 벨로시티 + 길이)
+    더하는 순서를 노트별 계산과 같게 유지해서 동점 판정이 바뀌지 않게 함
+    """
+    pitch = notes.pitch.astype(np.int64)
+    low, high = MELODY_SWEET_SPOT
+
+    # 1. 음역대 점수 (기타 스위트 스팟), 벗어나면 거리 × 2만큼 감점
+    distance = np.minimum(np.abs(pitch - low), np.abs(pitch - high))
+    score = np.where((pitch >= low) & (pitch <= high), 100, np.maximum(0, 100 - distance * 2)).astype(np.float64)
+
+    # 2. 벨로시티 점수 (강한 소리가 주 멜로디)
+    score = score + notes.velocity * 0.8
+
+    # 3. 노트 길이 점수 (적절한 길이 선호)
+    duration = notes.duration
+    return score + np.where((duration >= 0.1) & (duration <= 3.0), 50, np.where(duration > 3.0, -20, 0))
+
+def continuity_score(interval):
+    """4. 이전 음과의 연결성 (완전5도 이내 +30, 옥타브 이내 +10, 그 이상은 반음당 -2)"""
+    if interval <= 7:
+        return 30
+    if interval <= 12:
+        return 10
+    return -(interval - 12) * 2
+
+def select_melody_line(notes, time_resolution=0.02):
+    """
+    버킷마다 멜로디 점수가 가장 높은 노트 하나 선택 (동점이면 버킷 안에서 먼저 나온 노트)
+    이전 음과 무관한 점수는 배열 연산으로 한 번에 계산하고, 직전 선택에 의존하는 연결성 점수만
+    버킷 순서대로 스캔 (노트가 하나뿐인 버킷은 계산 없이 선택)
+    반환: 선택된 노트 인덱스 (시간 순)
+    """
+    if len(notes) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    order, bounds = onset_groups(notes.start, time_resolution)
+    base = melody_base_scores(notes)[order].tolist()
+    pitch = notes.pitch[order].tolist()
+
+    selected = []
+    prev_pitch = None
+    for begin, end in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+        best = begin
+        if end - begin > 1:
+            best_score = None
+            for row in range(begin, end):
+                score = base[row]
+                if prev_pitch is not None:
+                    score += continuity_score(abs(pitch[row] - prev_pitch))
+                if best_score is None or score > best_score:
+                    best, best_score = row, score
+        selected.append(best)
+        prev_pitch = pitch[best]
+
+    return order[np.asarray(selected, dtype=np.int64)]
+
+def select_lead_notes(notes, time_resolution=0.1, min_pitch=35, max_pitch=95, max_chord=3):
+    """
+    버킷마다 기타 음역대(min_pitch-max_pitch) 노트를 max_chord개까지는 모두 유지,
+    더 많으면 최고음 하나만 선택 (동점이면 먼저 나온 노트)
+    반환: (유지할 노트 인덱스 (버킷 순, 버킷 안에서는 원래 순서), 전체 버킷 수)
+    """
+    if len(notes) == 0:
+        return np.zeros(0, dtype=np.int64), 0
+
+    order, bounds = onset_groups(notes.start, time_resolution)
+    group_of = np.repeat(np.arange(len(bounds) - 1), np.diff(bounds))
+    pitch = notes.pitch[order].astype(np.int64)
+    candidate = (pitch >= min_pitch) & (pitch <= max_pitch)
+
+    # 버킷별 기타 음역대 노트 수와 그 중 최고음
+    counts = np.add.reduceat(candidate.astype(np.int64), bounds[:-1])
+    top_pitch = np.maximum.reduceat(np.where(candidate, pitch, -1), bounds[:-1])
+    chord = counts[group_of] <= max_chord
+
+    # 화음이 너무 많은 버킷은 최고음 중 첫 번째 노트만 유지
+    top_index = np.flatnonzero(candidate & ~chord & (pitch == top_pitch[group_of]))
+    _, first_top = np.unique(group_of[top_index], return_index=True)
+    keep = candidate & chord
+    keep[top_index[first_top]] = True
+
+    return order[keep], len(bounds) - 1
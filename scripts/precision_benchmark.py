@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Demucs 추론 정밀도 벤치마크
+고정된 로컬 테스트 곡들에 대해 정밀도별 처리 시간, 최대 RSS, 'other' 스템 SDR(fp32 기준) 비교
+각 정밀도는 별도 프로세스에서 실행해서 최대 RSS가 서로 섞이지 않도록 함
+
+사용법: python precision_benchmark.py <오디오 파일 또는 폴더>... [--precisions fp32 int8 bf16]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import resource
+import tempfile
+import multiprocessing
+import numpy as np
+import librosa
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".flac", ".ogg", ".m4a")
+
+def collect_inputs(paths):
+    """파일/폴더 목록 → 정렬된 오디오 파일 목록 (실행마다 같은 순서)"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path))
+                if name.lower().endswith(AUDIO_EXTENSIONS)
+            )
+        else:
+            files.append(path)
+    return files
+
+def _run_precision(precision, files, output_dir):
+    """자식 프로세스: 한 정밀도로 모든 곡 분리 → 'other' 스템 저장, 시간/최대 RSS 보고"""
+    import torch
+    from demucs_engine import load_separation_model, separate_stems
+
+    model = load_separation_model("htdemucs", torch.device("cpu"))
+    timings = []
+    for index, path in enumerate(files):
+        waveform, _ = librosa.load(path, sr=model.samplerate, mono=False)
+        if waveform.ndim == 1:
+            waveform = np.stack([waveform, waveform])
+
+        # apply_model의 랜덤 shift를 모든 정밀도에서 똑같이 맞춤
+        random.seed(index)
+        torch.manual_seed(index)
+
+        started = time.time()
+        stems = separate_stems(model, waveform, workers=1, precision=precision)
+        timings.append(time.time() - started)
+        np.save(os.path.join(output_dir, f"{precision}_{index}.npy"), stems[2])
+
+    # ru_maxrss: Linux에서 KB 단위
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return precision, timings, peak_mb
+
+def sdr(reference, estimate):
+    """SDR(dB) = 10 log10(|ref|² / |ref - est|²)"""
+    noise = np.sum((reference - estimate) ** 2)
+    if noise == 0:
+        return float("inf")
+    return float(10 * np.log10(np.sum(reference ** 2) / noise))
+
+def benchmark(files, precisions):
+    if "fp32" not in precisions:
+        precisions = ["fp32"] + list(precisions)
+
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        for precision in precisions:
+            print(f"🔄 {precision} 실행 중...")
+            with context.Pool(1) as pool:
+                results[precision] = pool.apply(_run_precision, (precision, files, output_dir))
+
+        print(f"\n📊 테스트 곡 {len(files)}개")
+        print(f"{'정밀도':<8}{'총 시간(초)':>12}{'fp32 대비':>10}{'최대 RSS(MB)':>14}{'other SDR(dB)':>15}")
+        base_time = sum(results["fp32"][1])
+        for precision in precisions:
+            _, timings, peak_mb = results[precision]
+            scores = [
+                sdr(np.load(os.path.join(output_dir, f"fp32_{i}.npy")),
+                    np.load(os.path.join(output_dir, f"{precision}_{i}.npy")))
+                for i in range(len(files))
+            ]
+            total = sum(timings)
+            print(f"{precision:<8}{total:>12.2f}{base_time / total:>9.2f}x{peak_mb:>14.0f}"
+                  f"{np.mean(scores):>15.2f}")
+
+if __name__ == "__main__":
+    from demucs_engine import PRECISIONS
+
+    parser = argparse.ArgumentParser(description='Demucs 추론 정밀도 벤치마크')
+    parser.add_argument('inputs', nargs='+', help='테스트 오디오 파일 또는 폴더')
+    parser.add_argument('--precisions', nargs='+', choices=PRECISIONS, default=list(PRECISIONS),
+                        help='비교할 정밀도 (fp32는 항상 기준으로 포함)')
+
+    args = parser.parse_args()
+    files = collect_inputs(args.inputs)
+    if not files:
+        print("❌ 테스트 오디오 파일이 없습니다")
+        sys.exit(1)
+
+    benchmark(files, args.precisions)
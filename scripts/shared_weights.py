@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+프로세스 간 모델 가중치 공유
+- 처음 로드한 프로세스가 파라미터/버퍼를 하나의 평면 파일(/dev/shm)로 내보내고 위치/모양을 manifest(JSON)에 기록
+- 이후 프로세스는 모델 구조만 meta 디바이스에 다시 만든 뒤 (가중치 메모리 할당 없음)
+  모든 텐서를 공유 파일의 mmap 뷰로 연결
+  구조 정보(spec)를 manifest에 함께 저장해 두면 skeleton(spec)으로 체크포인트를 읽지 않고 구조 생성,
+  없으면 loader()를 meta 디바이스에서 다시 실행
+→ 동시에 N개 작업이 돌아도 가중치는 물리 메모리에 한 벌만 존재
+공유 디렉터리에는 pickle 없이 원시 바이트와 JSON만 두고, 디렉터리는 현재 사용자 전용(0700)이어야 사용
+"""
+
+import os
+import json
+import stat
+import weakref
+import warnings
+import torch
+
+DEFAULT_SHARED_DIR = os.environ.get(
+    "MODEL_SHARED_DIR",
+    os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else "/tmp", f"grip_models_{os.getuid()}")
+)
+ALIGNMENT = 64  # 텐서 시작 위치 정렬 (dtype view가 가능하도록)
+
+# 공유 파일에 연결된 모델 (다른 프로세스도 이름으로 같은 가중치에 연결 가능)
+_ATTACHED = weakref.WeakSet()
+
+def _paths(shared_dir, name):
+    base = os.path.join(shared_dir, name)
+    return f"{base}.weights", f"{base}.json"
+
+def ensure_private_dir(shared_dir):
+    """
+    공유 디렉터리를 0700으로 만들고, 이미 있으면 현재 사용자 소유의 실제 디렉터리이며
+    다른 사용자 권한이 없는지 확인 (다른 사용자가 미리 만든 디렉터리의 가중치는 사용하지 않음)
+    """
+    os.makedirs(shared_dir, mode=0o700, exist_ok=True)
+    info = os.lstat(shared_dir)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"공유 가중치 디렉터리의 소유자/권한이 안전하지 않습니다: {shared_dir}")
+
+def build_skeleton(loader):
+    """loader()를 meta 디바이스에서 실행해서 가중치 없는 모델 구조 생성 (loader가 체크포인트를 읽으면 그 읽기는 그대로 일어남)"""
+    with warnings.catch_warnings():
+        # 체크포인트 값을 meta 파라미터에 복사하는 것은 no-op이라는 경고
+        warnings.simplefilter("ignore", UserWarning)
+        with torch.device("meta"):
+            return loader()
+
+def _tensor_slots(model):
+    """(모듈, 속성 이름, 텐서 종류, 텐서) 목록 (공유/묶인 파라미터도 모두 포함)"""
+    for module in model.modules():
+        for attr, param in module._parameters.items():
+            if param is not None:
+                yield module, attr, "param", param
+        for attr, buffer in module._buffers.items():
+            if buffer is not None:
+                yield module, attr, "buffer", buffer
+
+def export_shared(model, name, version, shared_dir=DEFAULT_SHARED_DIR, spec=None):
+    """
+    모델 가중치를 공유 파일로 저장 (임시 파일 → rename으로 다른 프로세스와 경합 없이)
+    spec: manifest에 함께 저장할 모델 구조 정보 (JSON으로 저장 가능한 값)
+    """
+    ensure_private_dir(shared_dir)
+    weights_path, manifest_path = _paths(shared_dir, name)
+    suffix = f".{os.getpid()}.tmp"
+
+    # 같은 텐서(묶인 파라미터)는 한 번만 저장
+    entries = {}
+    offset = 0
+    with open(weights_path + suffix, "wb") as f:
+        for _, _, _, tensor in _tensor_slots(model):
+            if id(tensor) in entries:
+                continue
+            data = tensor.detach().cpu().contiguous()
+            raw = data.view(-1).view(torch.uint8).numpy().tobytes() if data.numel() else b""
+            padding = -offset % ALIGNMENT
+            f.write(b"\0" * padding)
+            offset += padding
+            entries[id(tensor)] = {
+                "offset": offset,
+                "nbytes": len(raw),
+                "shape": list(data.shape),
+                "dtype": str(data.dtype).replace("torch.", ""),
+            }
+            f.write(raw)
+            offset += len(raw)
+
+    manifest = {
+        "torch": torch.__version__,
+        "version": version,
+        "size": offset,
+        "spec": spec,
+        "slots": [entries[id(tensor)] for _, _, _, tensor in _tensor_slots(model)],
+    }
+    with open(manifest_path + suffix, "w") as f:
+        json.dump(manifest, f)
+
+    # 가중치 → manifest 순으로 교체 (manifest가 보이면 가중치도 준비된 상태)
+    os.replace(weights_path + suffix, weights_path)
+    os.replace(manifest_path + suffix, manifest_path)
+
+def attach_shared(name, loader, version, shared_dir=DEFAULT_SHARED_DIR, skeleton=None):
+    """
+    공유 파일에 연결된 모델 반환
+    파일이 없거나 torch 버전 / version(모델 패키지 버전, 체크포인트 해시)이 다르거나 구조가 맞지 않으면 None
+    skeleton: manifest의 spec → 모델 구조 (있으면 loader 대신 사용, 체크포인트를 읽지 않음)
+    """
+    weights_path, manifest_path = _paths(shared_dir, name)
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("torch") != torch.__version__ or manifest.get("version") != version:
+        return None
+    try:
+        if os.path.getsize(weights_path) < manifest["size"]:
+            return None
+    except OSError:
+        return None
+
+    spec = manifest.get("spec")
+    if skeleton is not None and spec is not None:
+        model = build_skeleton(lambda: skeleton(spec))
+    else:
+        model = build_skeleton(loader)
+    slots = list(_tensor_slots(model))
+    if len(slots) != len(manifest["slots"]):
+        return None
+    for (_, _, _, tensor), entry in zip(slots, manifest["slots"]):
+        if list(tensor.shape) != entry["shape"] or str(tensor.dtype).replace("torch.", "") != entry["dtype"]:
+            return None
+
+    # 파일 전체를 MAP_SHARED로 매핑 → 모든 프로세스가 같은 물리 페이지 사용
+    flat = torch.from_file(weights_path, shared=True, size=max(manifest["size"], 1), dtype=torch.uint8)
+
+    views = {}
+    for (module, attr, kind, _), entry in zip(slots, manifest["slots"]):
+        key = entry["offset"]
+        if key not in views:
+            dtype = getattr(torch, entry["dtype"])
+            data = flat[entry["offset"]:entry["offset"] + entry["nbytes"]]
+            views[key] = data.view(dtype).view(entry["shape"])
+        if kind == "param":
+            module._parameters[attr] = torch.nn.Parameter(views[key], requires_grad=False)
+        else:
+            module._buffers[attr] = views[key]
+
+    model.eval()
+    _ATTACHED.add(model)
+    return model
+
+def is_attached(model):
+    """모델이 공유 파일에 연결된 상태인지"""
+    return model in _ATTACHED
+
+def load_shared_model(name, loader, version, shared_dir=DEFAULT_SHARED_DIR, describe=None, skeleton=None):
+    """
+    공유 가중치 모델 로드
+    공유 파일이 없으면 loader()로 한 번 로드해서 내보낸 뒤, 자기 자신도 공유 파일에 연결
+    version: 가중치가 같은지 판단하는 문자열 (모델 패키지 버전 + 체크포인트 해시), None이면 공유하지 않음
+    describe / skeleton: 모델 → spec / spec → 모델 구조 (둘 다 있으면 연결할 때 loader를 다시 실행하지 않음)
+    """
+    if version is None:
+        print(f"⚠️ 모델 버전을 알 수 없어 프로세스 전용 가중치 사용: {name}")
+        return loader()
+    try:
+        ensure_private_dir(shared_dir)
+    except OSError as e:
+        print(f"⚠️ {e}, 프로세스 전용 가중치 사용")
+        return loader()
+
+    model = attach_shared(name, loader, version, shared_dir, skeleton)
+    if model is not None:
+        print(f"🔗 공유 가중치 연결: {name}")
+        return model
+
+    model = loader()
+    try:
+        export_shared(model, name, version, shared_dir, describe(model) if describe else None)
+    except OSError as e:
+        print(f"⚠️ 공유 가중치 저장 실패, 프로세스 전용 가중치 사용: {e}")
+        return model
+
+    shared = attach_shared(name, loader, version, shared_dir, skeleton)
+    if shared is None:
+        return model
+    print(f"📤 공유 가중치 생성: {name}")
+    return shared
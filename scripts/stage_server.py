@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Python 스테이지 서버
+요청마다 인터프리터를 새로 띄우지 않고, torch / TensorFlow / librosa 임포트와
+모델 로딩을 서버 시작 시 한 번만 수행한 뒤 유닉스 소켓으로 각 단계를 실행
+
+프로토콜 (줄 단위 JSON):
+  요청: {"id": "...", "stage": "separate_guitar_enhanced", "args": ["in.wav", "out.wav"]}
+  응답: {"id": "...", "stage": "...", "success": true, "elapsed": 12.3}
+  {"stage": "stats"} 요청은 Basic Pitch 교차 요청 배칭 통계를 돌려줌 (--workers 2 이상일 때)
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import asyncio
+import argparse
+import importlib
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+from inference_batcher import BatchingModel, DEFAULT_BATCH_SIZE, DEFAULT_BATCH_WAIT_MS
+
+DEFAULT_SOCKET_PATH = os.environ.get("PYTHON_STAGE_SOCKET", "/tmp/grip_stage.sock")
+
+# 스테이지 이름 → (모듈, 함수, 사용하는 모델)
+STAGES = {
+    "separate_guitar": ("guitar_separation", "separate_guitar", "demucs"),
+    "separate_guitar_enhanced": ("guitar_separation_improved", "separate_guitar_enhanced", "demucs"),
+    "separate_guitar_fast": ("guitar_separation_fast", "separate_guitar_fast", None),
+    "audio_to_midi": ("midi_conversion", "audio_to_midi", "basic_pitch"),
+    "convert_to_monophonic_midi": ("midi_conversion_monophonic", "convert_to_monophonic_midi", "basic_pitch"),
+    "convert_to_guitar_optimized_midi": ("midi_conversion_guitar_optimized", "convert_to_guitar_optimized_midi", "basic_pitch"),
+    "convert_to_tabify_compatible_midi": ("midi_conversion_tabify_compatible", "convert_to_tabify_compatible_midi", "basic_pitch"),
+    "convert_to_tabify_compatible_midi_stream": ("midi_conversion_tabify_compatible", "convert_to_tabify_compatible_midi_stream", "basic_pitch"),
+    "convert_audio_to_midi_enhanced": ("midi_conversion_enhanced_musical", "convert_audio_to_midi_enhanced", "basic_pitch"),
+    "convert_audio_to_midi_variants": ("midi_conversion_multi", "convert_audio_to_midi_variants", "basic_pitch"),
+    "generate_guitar_tab": ("guitar_tab_generator", "generate_guitar_tab", None),
+    "convert_midi_to_tab_with_tabify": ("tabify_converter", "convert_midi_to_tab_with_tabify", None),
+    "export_stem_wav": ("stem_format", "export_wav", None),
+}
+
+# 모델 없이 가벼운 스테이지: 별도 executor에서 실행해서 Demucs/Basic Pitch 작업 뒤에 줄 서지 않도록
+LIGHT_STAGES = {"separate_guitar_fast", "generate_guitar_tab", "convert_midi_to_tab_with_tabify", "export_stem_wav"}
+
+def is_stage_success(result):
+    """엔트리포인트마다 다른 반환값(None / bool / dict)을 성공 여부로 통일"""
+    if isinstance(result, dict):
+        return bool(result.get("success", True))
+    if isinstance(result, bool):
+        return result
+    return True
+
+class StageServer:
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH, workers=1, light_workers=2,
+                 batch_size=DEFAULT_BATCH_SIZE, batch_wait_ms=DEFAULT_BATCH_WAIT_MS):
+        self.socket_path = socket_path
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_wait_ms = batch_wait_ms
+        self.batcher = None
+        # 무거운 연산은 이벤트 루프 밖 executor에서 실행 (torch/TF는 연산 중 GIL을 놓음)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stage")
+        self.light_executor = ThreadPoolExecutor(max_workers=light_workers, thread_name_prefix="light")
+        self.models = {}
+        self.functions = {}
+        self.server = None
+
+    def load(self):
+        """모든 스테이지 모듈 임포트 + 모델을 한 번만 로드"""
+        print("📥 스테이지 모듈 임포트...")
+        for stage, (module_name, function_name, _) in STAGES.items():
+            module = importlib.import_module(module_name)
+            self.functions[stage] = getattr(module, function_name)
+
+        from demucs_engine import load_separation_model, start_pool, model_device, DEFAULT_WORKERS
+        from transcription import load_basic_pitch_model
+
+        self.models["demucs"] = load_separation_model("htdemucs")
+        if DEFAULT_WORKERS > 1 and model_device(self.models["demucs"]).type == "cpu":
+            # 구간 병렬 분리용 워커는 요청 처리 전에 미리 시작
+            start_pool(self.models["demucs"], DEFAULT_WORKERS)
+        self.models["basic_pitch"] = load_basic_pitch_model()
+        if self.workers > 1:
+            # 동시에 실행되는 변환 작업들의 윈도우를 한 배치로 묶어서 추론
+            self.batcher = BatchingModel(self.models["basic_pitch"], self.batch_size, self.batch_wait_ms)
+            self.models["basic_pitch"] = self.batcher
+            print(f"📦 Basic Pitch 배칭: 최대 {self.batch_size}개 윈도우, 대기 {self.batch_wait_ms:g}ms")
+        print(f"✅ 스테이지 준비 완료: {', '.join(STAGES)}")
+
+    def run_stage(self, stage, args):
+        """executor 스레드에서 스테이지 하나 실행"""
+        function = self.functions[stage]
+        model_key = STAGES[stage][2]
+        kwargs = {"model": self.models[model_key]} if model_key else {}
+
+        try:
+            result = function(*args, **kwargs)
+        except SystemExit as e:
+            # 기존 스크립트들은 실패 시 sys.exit(1)을 호출함
+            if e.code not in (None, 0):
+                return {"success": False, "error": f"스테이지 종료 코드: {e.code}"}
+            result = None
+
+        if is_stage_success(result):
+            return {"success": True}
+
+        error = result.get("error") if isinstance(result, dict) else None
+        return {"success": False, "error": error or "스테이지 실행 실패"}
+
+    async def handle_request(self, request):
+        stage = request.get("stage")
+        args = request.get("args", [])
+
+        if stage == "ping":
+            return {"success": True, "stages": list(STAGES)}
+        if stage == "stats":
+            return {"success": True, "batching": self.batcher.stats() if self.batcher else None}
+        if stage not in STAGES:
+            return {"success": False, "error": f"알 수 없는 스테이지: {stage}"}
+
+        print(f"🚀 스테이지 실행: {stage} {args}")
+        loop = asyncio.get_running_loop()
+        started = time.time()
+        try:
+            executor = self.light_executor if stage in LIGHT_STAGES else self.executor
+            response = await loop.run_in_executor(executor, self.run_stage, stage, args)
+        except Exception as e:
+            traceback.print_exc()
+            response = {"success": False, "error": str(e)}
+        response["elapsed"] = round(time.time() - started, 3)
+
+        print(f"{'✅' if response['success'] else '❌'} {stage} ({response['elapsed']}초)")
+        return response
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    response = {"success": False, "error": "잘못된 JSON 요청"}
+                    request = {}
+                else:
+                    response = await self.handle_request(request)
+
+                response["id"] = request.get("id")
+                response["stage"] = request.get("stage")
+                writer.write((json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8"))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        self.server = await asyncio.start_unix_server(self.handle_client, path=self.socket_path)
+        print(f"🎧 스테이지 서버 대기 중: {self.socket_path}")
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+
+        async with self.server:
+            await stop.wait()
+
+        print("🛑 스테이지 서버 종료")
+        if self.batcher is not None:
+            print(f"📊 Basic Pitch 배칭 통계: {self.batcher.stats()}")
+            self.batcher.close()
+        self.executor.shutdown(wait=False)
+        self.light_executor.shutdown(wait=False)
+        from demucs_engine import close_pools
+        close_pools()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+def main():
+    parser = argparse.ArgumentParser(description='Python 스테이지 서버')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET_PATH, help='유닉스 소켓 경로')
+    parser.add_argument('--workers', type=int, default=1, help='동시에 실행할 스테이지 수')
+    parser.add_argument('--light-workers', type=int, default=2, help='가벼운 스테이지(빠른 분리, 탭 생성) 동시 실행 수')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Basic Pitch 배치 크기 (윈도우 수)')
+    parser.add_argument('--batch-wait-ms', type=float, default=DEFAULT_BATCH_WAIT_MS, help='배치를 모으는 최대 대기 시간')
+
+    args = parser.parse_args()
+
+    server = StageServer(args.socket, workers=args.workers, light_workers=args.light_workers,
+                         batch_size=args.batch_size, batch_wait_ms=args.batch_wait_ms)
+    server.load()
+    asyncio.run(server.serve())
+
+if __name__ == "__main__":
+    main()
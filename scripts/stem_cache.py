@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Demucs 스템 캐시
+디코딩된 PCM + 모델 이름 + 분리 설정의 해시를 키로 drums/bass/other/vocals 스템을 저장
+같은 곡이 다시 들어오면 apply_model을 건너뛰고 바로 기타 후처리로 진행
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+from lru_file_cache import LruFileCache
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "STEM_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "temp", "stem_cache")
+)
+DEFAULT_MAX_MB = float(os.environ.get("STEM_CACHE_MAX_MB", "4096"))
+
+class StemCache(LruFileCache):
+    """크기 상한이 있는 LRU 스템 캐시 (float16 .npy)"""
+    SUFFIX = ".npy"
+    LABEL = "스템 캐시"
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_mb=DEFAULT_MAX_MB):
+        super().__init__(cache_dir, max_mb)
+
+    def make_key(self, waveform, sr, model_name, settings):
+        """디코딩된 PCM(float32) + 샘플링 레이트 + 모델 이름 + 분리 설정 → 캐시 키"""
+        hasher = hashlib.sha256()
+        hasher.update(np.ascontiguousarray(waveform, dtype=np.float32).data)
+        hasher.update(json.dumps(
+            {"sr": int(sr), "shape": list(np.shape(waveform)), "model": model_name, "settings": settings},
+            sort_keys=True
+        ).encode("utf-8"))
+        return hasher.hexdigest()
+
+    def _save(self, f, stems):
+        # float16으로 절반 크기
+        np.save(f, np.asarray(stems, dtype=np.float16))
+
+    def _load(self, path):
+        """(4, channels, samples) float32 스템"""
+        return np.load(path, mmap_mode="r").astype(np.float32)
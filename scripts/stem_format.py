@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+중간 산출물용 float16 스템 포맷 (.stem)
+- 64바이트 헤더 (매직, 버전, 채널 수, 샘플링 레이트, 프레임 수) + float16 오디오
+- 오디오는 (frames, channels) 순서로 저장해서 시간 구간 슬라이스가 연속 메모리
+- np.memmap으로 열기 때문에 다음 단계는 필요한 구간만 복사 없이 읽음
+PCM_16 WAV 인코딩/디코딩 왕복 없이 분리 → MIDI 변환 단계 사이에서 오디오를 전달
+(.stem은 내부 중간 산출물 전용, API로 내보낼 때는 export_wav로 WAV 변환)
+"""
+
+import os
+import struct
+import numpy as np
+import soundfile as sf
+
+STEM_EXTENSION = ".stem"
+STEM_MAGIC = b"GRIPSTEM"
+STEM_VERSION = 1
+HEADER_SIZE = 64
+# 매직(8) + 버전(uint16) + 채널(uint16) + 샘플링 레이트(uint32) + 프레임 수(uint64)
+HEADER_STRUCT = struct.Struct("<8sHHIQ")
+SAMPLE_DTYPE = np.dtype("<f2")
+
+def is_stem_path(path):
+    return str(path).endswith(STEM_EXTENSION)
+
+def _pack_header(channels, sample_rate, frames):
+    header = HEADER_STRUCT.pack(STEM_MAGIC, STEM_VERSION, channels, sample_rate, frames)
+    return header.ljust(HEADER_SIZE, b"\0")
+
+class StemFile:
+    """.stem 파일 읽기 (오디오는 읽기 전용 memmap)"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+
+        if len(header) < HEADER_SIZE:
+            raise ValueError(f"스템 헤더가 손상되었습니다: {path}")
+        magic, version, channels, sample_rate, frames = HEADER_STRUCT.unpack_from(header)
+        if magic != STEM_MAGIC or version != STEM_VERSION:
+            raise ValueError(f"지원하지 않는 스템 파일입니다: {path}")
+
+        self.path = path
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.frames = frames
+        if frames:
+            self.data = np.memmap(path, dtype=SAMPLE_DTYPE, mode="r",
+                                  offset=HEADER_SIZE, shape=(frames, channels))
+        else:
+            self.data = np.zeros((0, channels), dtype=SAMPLE_DTYPE)
+
+    @property
+    def duration(self):
+        return self.frames / self.sample_rate if self.sample_rate else 0.0
+
+    def read(self, start=0, stop=None):
+        """[start, stop) 프레임 구간 (frames, channels) float16 뷰 (복사 없음)"""
+        return self.data[start:stop]
+
+    def iter_blocks(self, block_frames):
+        """block_frames 단위로 (frames, channels) 뷰를 순서대로 반환"""
+        for start in range(0, self.frames, block_frames):
+            yield start, self.data[start:start + block_frames]
+
+    def to_mono(self, block_frames=1 << 20):
+        """채널 평균 모노 float32 (블록 단위로 변환해서 임시 메모리 최소화)"""
+        mono = np.empty(self.frames, dtype=np.float32)
+        for start, block in self.iter_blocks(block_frames):
+            np.mean(block, axis=1, dtype=np.float32, out=mono[start:start + block.shape[0]])
+        return mono
+
+class StemWriter:
+    """.stem 파일에 (channels, n) 블록을 순서대로 추가 (닫을 때 헤더의 프레임 수 기록)"""
+
+    def __init__(self, path, sample_rate, channels=2):
+        self.path = path
+        self.sample_rate = int(sample_rate)
+        self.channels = int(channels)
+        self.frames = 0
+        self.file = open(path, "wb")
+        self.file.write(_pack_header(self.channels, self.sample_rate, 0))
+
+    def write(self, block):
+        """block: (channels, n) 오디오"""
+        block = np.asarray(block)
+        if block.shape[0] != self.channels:
+            raise ValueError(f"채널 수 불일치: {block.shape[0]} != {self.channels}")
+        self.file.write(np.ascontiguousarray(block.T, dtype=SAMPLE_DTYPE).tobytes())
+        self.frames += block.shape[1]
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.file.seek(0)
+        self.file.write(_pack_header(self.channels, self.sample_rate, self.frames))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def write_stem(path, audio, sample_rate, block_frames=1 << 20):
+    """(channels, frames) 오디오를 .stem 파일로 저장"""
+    audio = np.asarray(audio)
+    with StemWriter(path, sample_rate, audio.shape[0]) as writer:
+        for start in range(0, audio.shape[1], block_frames):
+            writer.write(audio[:, start:start + block_frames])
+    return path
+
+def open_audio_writer(path, sample_rate, channels=2):
+    """출력 경로 확장자에 맞는 블록 writer (.stem → StemWriter, 그 외 → PCM_16 WAV)"""
+    if is_stem_path(path):
+        return StemWriter(path, sample_rate, channels)
+    return _WavBlockWriter(path, sample_rate, channels)
+
+def save_audio(path, audio, sample_rate):
+    """(channels, frames) 오디오 저장 (.stem이면 float16 스템, 그 외는 기존처럼 PCM_16 WAV)"""
+    if is_stem_path(path):
+        return write_stem(path, audio, sample_rate)
+    sf.write(path, np.asarray(audio).T, sample_rate, format='WAV', subtype='PCM_16')
+    return path
+
+class _WavBlockWriter:
+    """StemWriter와 같은 인터페이스의 PCM_16 WAV writer"""
+
+    def __init__(self, path, sample_rate, channels=2):
+        self.file = sf.SoundFile(path, 'w', samplerate=int(sample_rate), channels=channels,
+                                 format='WAV', subtype='PCM_16')
+
+    def write(self, block):
+        self.file.write(np.asarray(block).T)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def export_wav(stem_path, wav_path=None, block_frames=1 << 20):
+    """.stem → PCM_16 WAV (블록 단위 변환, 외부로 내보내는 파일용), wav_path가 없으면 확장자만 .wav로"""
+    if wav_path is None:
+        wav_path = os.path.splitext(stem_path)[0] + ".wav"
+    stem = StemFile(stem_path)
+    with _WavBlockWriter(wav_path, stem.sample_rate, stem.channels) as writer:
+        for _, block in stem.iter_blocks(block_frames):
+            writer.write(block.T.astype(np.float32))
+    return wav_path
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) not in (2, 3):
+        print("사용법: python stem_format.py <input.stem> [output.wav]")
+        sys.exit(1)
+
+    if len(sys.argv) == 3:
+        print(f"✅ WAV 저장: {export_wav(sys.argv[1], sys.argv[2])}")
+        sys.exit(0)
+
+    stem = StemFile(sys.argv[1])
+    size_mb = os.path.getsize(sys.argv[1]) / (1024 * 1024)
+    print(f"📊 {sys.argv[1]}: {stem.channels}ch, {stem.sample_rate}Hz, "
+          f"{stem.duration:.2f}초, {size_mb:.2f}MB")
@@ -1,80 +1,56 @@
 #!/usr/bin/env python3
 """
-Tabify를 사용한 MIDI to TAB 변환기
-GitHub: https://github.com/roelvanduijnhoven/tabify
+MIDI to TAB 변환기 (Tabify 대체)
+예전에는 Node tabify CLI(https://github.com/roelvanduijnhoven/tabify)를 서브프로세스로 실행했지만,
+이제는 fingering.py의 동적 계획법 운지 최적화를 프로세스 안에서 바로 실행
+출력은 그대로: 텍스트 TAB (선택) + 텍스트를 그린 PNG 이미지
 """
 
 import sys
 import os
-import subprocess
-import tempfile
-import shutil
+import time
+import pretty_midi
+from note_array import NoteArray
+from fingering import optimize_fingering, greedy_fingering, fingering_cost, format_ascii_tab
 
 def convert_midi_to_tab_with_tabify(input_midi_path, output_tab_path, output_text_path=None):
-    """Tabify를 사용하여 MIDI를 TAB으로 변환"""
+    """동적 계획법 운지 최적화로 MIDI를 TAB으로 변환 (함수 이름은 스테이지 서버/Node 호환용)"""
     try:
-        print("🎸 Tabify를 사용한 MIDI → TAB 변환 시작...")
+        print("🎸 운지 최적화 MIDI → TAB 변환 시작...")
         print(f"📥 입력 MIDI: {input_midi_path}")
         print(f"📤 출력 TAB: {output_tab_path}")
         
-        # Tabify 실행 가능 여부 확인
-        try:
-            result = subprocess.run(['tabify', '--version'], 
-                                  capture_output=True, text=True, timeout=10)
-            print(f"✅ Tabify 버전: {result.stdout.strip()}")
-        except FileNotFoundError:
-            print("❌ Tabify가 설치되어 있지 않습니다.")
-            print("설치 방법: npm install -g tabify")
-            return False
-        except Exception as e:
-            print(f"❌ Tabify 버전 확인 실패: {e}")
+        notes = NoteArray.from_midi(pretty_midi.PrettyMIDI(input_midi_path))
+        if len(notes) == 0:
+            print("❌ 연주할 노트가 없습니다.")
             return False
         
-        # Tabify 명령어 실행 (stdout으로 TAB 출력)
-        cmd = [
-            'tabify',
-            input_midi_path
-        ]
+        started = time.time()
+        fingered = optimize_fingering(notes)
+        elapsed = time.time() - started
         
-        print(f"🚀 Tabify 실행: {' '.join(cmd)}")
+        # 노트마다 가장 낮은 프렛을 고르는 방식과 비용 비교
+        greedy_cost = fingering_cost(greedy_fingering(notes))
+        optimized_cost = fingering_cost(fingered)
+        print(f"✅ 운지 최적화 완료: {len(fingered)}개 노트, {elapsed * 1000:.1f}ms")
+        print(f"📊 운지 비용: {optimized_cost:.1f} (최저 프렛 방식 {greedy_cost:.1f})")
         
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+        tab_content = "Guitar TAB\n" + "=" * 50 + "\n\n" + format_ascii_tab(fingered)
+        print(f"📊 생성된 TAB 길이: {len(tab_content)} 문자")
         
-        if result.returncode == 0:
-            print("✅ Tabify 변환 성공!")
-            
-            # stdout에서 TAB 결과 가져오기
-            tab_content = result.stdout
-            
-            if tab_content.strip() and "Song is unplayable" not in tab_content:
-                print(f"📊 생성된 TAB 길이: {len(tab_content)} 문자")
-                
-                # 텍스트 TAB 저장 (요청된 경우)
-                if output_text_path:
-                    with open(output_text_path, 'w', encoding='utf-8') as f:
-                        f.write(tab_content)
-                    print(f"💾 텍스트 TAB 저장: {output_text_path}")
-                
-                # 이미지 변환을 위해 간단한 ASCII 아트 생성
-                create_tab_image_from_text(tab_content, output_tab_path)
-                
-                return True
-            else:
-                print("❌ Tabify에서 연주 불가능한 곡이라고 판단했습니다.")
-                print(f"STDOUT: {tab_content}")
-                print(f"STDERR: {result.stderr}")
-                return False
-        else:
-            print(f"❌ Tabify 실행 실패 (코드: {result.returncode})")
-            print(f"STDOUT: {result.stdout}")
-            print(f"STDERR: {result.stderr}")
-            return False
+        # 텍스트 TAB 저장 (요청된 경우)
+        if output_text_path:
+            with open(output_text_path, 'w', encoding='utf-8') as f:
+                f.write(tab_content)
+            print(f"💾 텍스트 TAB 저장: {output_text_path}")
+        
+        # 이미지 변환을 위해 간단한 ASCII 아트 생성
+        create_tab_image_from_text(tab_content, output_tab_path)
+        
+        return True
                 
-    except subprocess.TimeoutExpired:
-        print("❌ Tabify 실행 시간 초과")
-        return False
     except Exception as e:
-        print(f"❌ Tabify 변환 오류: {e}")
+        print(f"❌ TAB 변환 오류: {e}")
         return False
 
 def create_tab_image_from_text(tab_text, output_image_path):
@@ -141,14 +117,6 @@ def create_tab_image_from_text(tab_text, output_image_path):
         print(f"❌ 이미지 생성 오류: {e}")
         return False
 
-def install_tabify():
-    """Tabify 설치 안내"""
-    print("📦 Tabify 설치가 필요합니다.")
-    print("다음 명령어로 설치하세요:")
-    print("  npm install -g tabify")
-    print("또는:")
-    print("  yarn global add tabify")
-
 if __name__ == "__main__":
     if len(sys.argv) < 3:
         print("사용법: python tabify_converter.py <input.mid> <output.png> [output.txt]")
@@ -165,8 +133,7 @@ if __name__ == "__main__":
     success = convert_midi_to_tab_with_tabify(input_midi, output_image, output_text)
     
     if not success:
-        install_tabify()
         sys.exit(1)
     
-    print("✅ Tabify 변환 완료!")
+    print("✅ TAB 변환 완료!")
     sys.exit(0)
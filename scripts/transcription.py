@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Basic Pitch 공용 모듈
+- 같은 프로세스 안에서는 ICASSP 2022 모델을 한 번만 로드해서 재사용
+- .stem(float16 memmap) 입력은 WAV 디코딩 없이 바로 추론
+- 활성화(note/onset/contour)를 캐시해서 같은 곡은 노트 추출만 다시 실행
+- 스트리밍 모드: 오디오를 블록 단위로 읽으면서 윈도우마다 추론하고, 확정된 노트부터 순서대로 내보냄
+- 추론 런타임은 BASIC_PITCH_BACKEND로 선택 (inference_backends 참고), 스크립트들은 여기의
+  ICASSP_2022_MODEL_PATH를 기본 모델로 사용
+"""
+
+import os
+import numpy as np
+import librosa
+import soundfile as sf
+from inference_backends import selected_backend, model_path, import_basic_pitch, load_model
+
+# basic_pitch 임포트 전에 백엔드를 정해야 경량 런타임에서 TensorFlow를 불러오지 않음
+BACKEND = selected_backend()
+import_basic_pitch(BACKEND)
+ICASSP_2022_MODEL_PATH = model_path(BACKEND)
+
+from basic_pitch import note_creation as infer
+from basic_pitch.constants import AUDIO_SAMPLE_RATE, AUDIO_N_SAMPLES, ANNOTATIONS_FPS, ANNOT_N_FRAMES, FFT_HOP
+from stem_format import StemFile, is_stem_path
+from activation_cache import ActivationCache
+
+try:
+    from importlib.metadata import version as _package_version
+    BASIC_PITCH_VERSION = _package_version("basic-pitch")
+except Exception:
+    BASIC_PITCH_VERSION = "unknown"
+
+try:
+    import soxr  # 블록 경계에서 끊김 없는 스트리밍 리샘플링
+except ImportError:
+    soxr = None
+
+# 윈도우 사이 겹치는 출력 프레임 수 (basic_pitch.inference와 동일)
+N_OVERLAPPING_FRAMES = 30
+OVERLAP_LEN = N_OVERLAPPING_FRAMES * FFT_HOP
+HOP_SIZE = AUDIO_N_SAMPLES - OVERLAP_LEN
+
+# 스트리밍 모드 설정 (초)
+STREAM_BLOCK_SECONDS = 30.0   # 한 번에 읽는 오디오 길이
+STREAM_DECODE_SECONDS = 10.0  # 새 활성화가 이만큼 쌓일 때마다 노트 추출
+STREAM_MARGIN_SECONDS = 2.0   # 버퍼 끝에서 이 안쪽에 걸친 노트는 다음 추출까지 보류
+STREAM_CONTEXT_SECONDS = 1.0  # 확정 경계 앞쪽으로 남겨두는 활성화 (다음 추출의 문맥)
+STREAM_MAX_BUFFER_SECONDS = 60.0  # 버퍼 상한: 계속 이어지는 노트가 경계를 붙잡아도 이 길이를 넘으면 강제로 확정
+
+# 모델 경로 → 로드된 모델
+_MODEL_CACHE = {}
+_ACTIVATION_CACHE = ActivationCache()
+
+def load_basic_pitch_model(model_path=ICASSP_2022_MODEL_PATH):
+    """Basic Pitch 모델을 로드 (predict()의 model_or_model_path 자리에 그대로 전달 가능, 확장자로 런타임 결정)"""
+    key = str(model_path)
+
+    if key not in _MODEL_CACHE:
+        print(f"📥 Basic Pitch 모델 로딩: {key}")
+        _MODEL_CACHE[key] = load_model(model_path)
+
+    return _MODEL_CACHE[key]
+
+def _resolve_model(model_or_model_path):
+    if isinstance(model_or_model_path, (str, bytes)) or hasattr(model_or_model_path, "__fspath__"):
+        return load_basic_pitch_model(model_or_model_path)
+    return model_or_model_path
+
+def model_version(model_or_model_path):
+    """활성화 캐시 키에 쓰는 모델 버전 (basic-pitch 버전 + 모델 파일 이름)"""
+    # BatchingModel 등 래퍼는 감싼 모델 기준 (배칭 여부와 무관하게 같은 캐시 키)
+    model_or_model_path = getattr(model_or_model_path, "base_model", model_or_model_path)
+    path = model_or_model_path
+    if not (isinstance(path, (str, bytes)) or hasattr(path, "__fspath__")):
+        # 미리 로드된 모델은 로드할 때 쓴 경로로 역추적
+        path = next((k for k, v in _MODEL_CACHE.items() if v is model_or_model_path), None)
+        if path is None:
+            return f"{BASIC_PITCH_VERSION}:{type(model_or_model_path).__name__}"
+    path = os.fsdecode(path)
+    return f"{BASIC_PITCH_VERSION}:{os.path.basename(os.path.dirname(path))}/{os.path.basename(path)}"
+
+def run_model(model, batch):
+    """(n, AUDIO_N_SAMPLES, 1) 윈도우 배치 → {'note', 'onset', 'contour'} 넘파이 출력"""
+    if hasattr(model, "predict"):
+        output = model.predict(batch)
+    else:
+        output = model(batch)
+    return {k: np.asarray(v) for k, v in output.items()}
+
+def load_stem_audio(stem_path):
+    """.stem → Basic Pitch 입력 (22050Hz 모노 float32), librosa.load(sr=22050, mono=True)와 같은 변환"""
+    stem = StemFile(stem_path)
+    mono = stem.to_mono()
+    if stem.sample_rate != AUDIO_SAMPLE_RATE:
+        mono = librosa.resample(mono, orig_sr=stem.sample_rate, target_sr=AUDIO_SAMPLE_RATE)
+    return mono.astype(np.float32, copy=False)
+
+def load_audio(audio_path):
+    """오디오 파일 → Basic Pitch 입력 (22050Hz 모노 float32), basic_pitch.inference와 같은 librosa.load"""
+    if is_stem_path(audio_path):
+        return load_stem_audio(audio_path)
+    audio, _ = librosa.load(str(audio_path), sr=AUDIO_SAMPLE_RATE, mono=True)
+    return audio.astype(np.float32, copy=False)
+
+def iter_audio_windows(audio):
+    """모노 오디오를 Basic Pitch 입력 윈도우로 분할 (앞쪽에 겹침 절반만큼 0 패딩)"""
+    padded = np.concatenate([np.zeros(OVERLAP_LEN // 2, dtype=np.float32), audio])
+    for i in range(0, padded.shape[0], HOP_SIZE):
+        window = padded[i:i + AUDIO_N_SAMPLES]
+        if window.shape[0] < AUDIO_N_SAMPLES:
+            window = np.pad(window, (0, AUDIO_N_SAMPLES - window.shape[0]))
+        yield window[np.newaxis, :, np.newaxis]
+
+def unwrap_output(raw_output, original_length):
+    """윈도우별 출력에서 겹치는 프레임을 잘라내고 시간축으로 이어 붙임"""
+    n_olap = N_OVERLAPPING_FRAMES // 2
+    if n_olap > 0:
+        raw_output = raw_output[:, n_olap:-n_olap, :]
+    n_frames = int(np.floor(original_length * (ANNOTATIONS_FPS / AUDIO_SAMPLE_RATE)))
+    unwrapped = raw_output.reshape(-1, raw_output.shape[2])
+    return unwrapped[:n_frames, :]
+
+def run_inference_on_audio(audio, model):
+    """모노 22050Hz 오디오 → {'note', 'onset', 'contour'} 활성화"""
+    output = {"note": [], "onset": [], "contour": []}
+    for window in iter_audio_windows(audio):
+        for k, v in run_model(model, window).items():
+            output[k].append(v)
+    return {k: unwrap_output(np.concatenate(v), audio.shape[0]) for k, v in output.items()}
+
+def decode_notes(model_output, onset_threshold=0.5, frame_threshold=0.3, minimum_note_length=127.70,
+                 minimum_frequency=None, maximum_frequency=None, multiple_pitch_bends=False,
+                 melodia_trick=True, midi_tempo=120):
+    """활성화 → (midi_data, note_events), minimum_note_length는 ms 단위 (basic_pitch.inference.predict와 동일)"""
+    min_note_len = int(np.round(minimum_note_length / 1000 * (AUDIO_SAMPLE_RATE / FFT_HOP)))
+    return infer.model_output_to_notes(
+        model_output,
+        onset_thresh=onset_threshold,
+        frame_thresh=frame_threshold,
+        min_note_len=min_note_len,
+        min_freq=minimum_frequency,
+        max_freq=maximum_frequency,
+        multiple_pitch_bends=multiple_pitch_bends,
+        melodia_trick=melodia_trick,
+        midi_tempo=midi_tempo,
+    )
+
+def predict(audio_path, model_or_model_path=ICASSP_2022_MODEL_PATH,
+            onset_threshold=0.5, frame_threshold=0.3, minimum_note_length=127.70,
+            minimum_frequency=None, maximum_frequency=None, multiple_pitch_bends=False,
+            melodia_trick=True, midi_tempo=120, cache=_ACTIVATION_CACHE):
+    """
+    basic_pitch.inference.predict와 같은 (model_output, midi_data, note_events) 반환
+    .stem 입력은 memmap에서 바로 읽고, 그 외 파일은 basic_pitch와 같은 librosa.load 후 같은 윈도우로 추론
+    (basic_pitch.inference는 TensorFlow를 임포트하고 자체 Model 객체만 받으므로 추론은 여기서 직접 실행)
+    cache에 같은 오디오 + 모델 버전의 활성화가 있으면 추론을 건너뜀 (cache=None이면 캐시 사용 안 함)
+    """
+    decode_args = dict(
+        onset_threshold=onset_threshold,
+        frame_threshold=frame_threshold,
+        minimum_note_length=minimum_note_length,
+        minimum_frequency=minimum_frequency,
+        maximum_frequency=maximum_frequency,
+        multiple_pitch_bends=multiple_pitch_bends,
+        melodia_trick=melodia_trick,
+        midi_tempo=midi_tempo,
+    )
+
+    key = None
+    if cache is not None and cache.enabled:
+        key = cache.make_key(audio_path, model_version(model_or_model_path))
+        model_output = cache.get(key)
+        if model_output is not None:
+            print(f"♻️ 캐시된 Basic Pitch 활성화 사용: {key[:12]}")
+            return (model_output,) + tuple(decode_notes(model_output, **decode_args))
+
+    model = _resolve_model(model_or_model_path)
+    model_output = run_inference_on_audio(load_audio(audio_path), model)
+    midi_data, note_events = decode_notes(model_output, **decode_args)
+
+    if key is not None:
+        try:
+            cache.put(key, model_output)
+        except OSError as e:
+            print(f"⚠️ 활성화 캐시 저장 실패: {e}")
+    return model_output, midi_data, note_events
+
+def redecode(audio_path, model_or_model_path=ICASSP_2022_MODEL_PATH, cache=_ACTIVATION_CACHE, **decode_args):
+    """
+    캐시된 활성화에서 다른 임계값/최소 노트 길이로 노트만 다시 추출 (추론 없음)
+    반환: (model_output, midi_data, note_events), 캐시에 없으면 None
+    """
+    model_output = cache.get(cache.make_key(audio_path, model_version(model_or_model_path)))
+    if model_output is None:
+        return None
+    return (model_output,) + tuple(decode_notes(model_output, **decode_args))
+
+def iter_audio_blocks(audio_path, block_seconds=STREAM_BLOCK_SECONDS):
+    """
+    오디오 파일 → 22050Hz 모노 float32 블록 generator (파일 전체를 메모리에 올리지 않음)
+    .stem은 memmap 구간, 그 외는 soundfile 블록 읽기, soundfile로 못 읽는 포맷은 librosa로 전체 로드 후 분할
+    """
+    if is_stem_path(audio_path):
+        stem = StemFile(audio_path)
+        sr = stem.sample_rate
+        blocks = (
+            np.mean(block, axis=1, dtype=np.float32)
+            for _, block in stem.iter_blocks(max(1, int(block_seconds * sr)))
+        )
+    else:
+        try:
+            sr = sf.info(audio_path).samplerate
+        except RuntimeError:
+            audio, _ = librosa.load(audio_path, sr=AUDIO_SAMPLE_RATE, mono=True)
+            block_frames = max(1, int(block_seconds * AUDIO_SAMPLE_RATE))
+            for start in range(0, audio.shape[0], block_frames):
+                yield audio[start:start + block_frames]
+            return
+        blocks = (
+            np.mean(block, axis=1, dtype=np.float32)
+            for block in sf.blocks(audio_path, blocksize=max(1, int(block_seconds * sr)), dtype="float32", always_2d=True)
+        )
+
+    if sr == AUDIO_SAMPLE_RATE:
+        yield from blocks
+    elif soxr is not None:
+        resampler = soxr.ResampleStream(sr, AUDIO_SAMPLE_RATE, 1, dtype="float32", quality="HQ")
+        for block in blocks:
+            yield resampler.resample_chunk(block)
+        yield resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+    else:
+        # 블록마다 따로 리샘플링 (경계에서 필터 상태가 끊기지만 차이는 샘플 몇 개 수준)
+        for block in blocks:
+            yield librosa.resample(block, orig_sr=sr, target_sr=AUDIO_SAMPLE_RATE).astype(np.float32, copy=False)
+
+def stream_activations(blocks, model):
+    """
+    22050Hz 모노 블록 → 활성화 조각 {'note', 'onset', 'contour'} generator
+    윈도우 분할/겹침 제거가 run_inference_on_audio와 같아서 이어 붙이면 한 번에 추론한 결과와 동일
+    이미 읽은 샘플 수로 확정되는 프레임까지만 내보내고, 끝에서 전체 길이에 맞게 자름
+    """
+    n_olap = N_OVERLAPPING_FRAMES // 2
+    buffer = np.zeros(OVERLAP_LEN // 2, dtype=np.float32)
+    pending = {"note": [], "onset": [], "contour": []}
+    samples_read = 0
+    emitted = 0
+
+    def run_window(window):
+        if window.shape[0] < AUDIO_N_SAMPLES:
+            window = np.pad(window, (0, AUDIO_N_SAMPLES - window.shape[0]))
+        for k, v in run_model(model, window[np.newaxis, :, np.newaxis]).items():
+            pending[k].append(v[0, n_olap:-n_olap] if n_olap > 0 else v[0])
+
+    def flush(limit):
+        nonlocal emitted
+        chunk = {k: np.concatenate(v) if v else None for k, v in pending.items()}
+        if chunk["note"] is None:
+            return None
+        count = max(0, min(chunk["note"].shape[0], limit - emitted))
+        for k, v in chunk.items():
+            pending[k] = [v[count:]] if count < v.shape[0] else []
+        if count == 0:
+            return None
+        emitted += count
+        return {k: v[:count] for k, v in chunk.items()}
+
+    for block in blocks:
+        buffer = np.concatenate([buffer, block])
+        samples_read += block.shape[0]
+        while buffer.shape[0] >= AUDIO_N_SAMPLES:
+            run_window(buffer[:AUDIO_N_SAMPLES])
+            buffer = buffer[HOP_SIZE:]
+        chunk = flush(int(np.floor(samples_read * (ANNOTATIONS_FPS / AUDIO_SAMPLE_RATE))))
+        if chunk is not None:
+            yield chunk
+
+    # 남은 샘플은 0으로 채운 윈도우로 처리 (iter_audio_windows의 마지막 윈도우들과 동일)
+    while buffer.shape[0] > 0:
+        run_window(buffer)
+        buffer = buffer[HOP_SIZE:]
+    chunk = flush(int(np.floor(samples_read * (ANNOTATIONS_FPS / AUDIO_SAMPLE_RATE))))
+    if chunk is not None:
+        yield chunk
+
+def frame_times(frames):
+    """절대 프레임 번호 → 초 (infer.model_frames_to_time과 같은 윈도우 보정)"""
+    frames = np.asarray(frames)
+    original_times = librosa.core.frames_to_time(frames, sr=AUDIO_SAMPLE_RATE, hop_length=FFT_HOP)
+    window_offset = (FFT_HOP / AUDIO_SAMPLE_RATE) * (ANNOT_N_FRAMES - (AUDIO_N_SAMPLES / FFT_HOP)) + 0.0018
+    return original_times - window_offset * np.floor(frames / ANNOT_N_FRAMES)
+
+def stream_note_events(audio_path, model_or_model_path=ICASSP_2022_MODEL_PATH,
+                       onset_threshold=0.5, frame_threshold=0.3, minimum_note_length=127.70,
+                       minimum_frequency=None, maximum_frequency=None, melodia_trick=True,
+                       block_seconds=STREAM_BLOCK_SECONDS, decode_seconds=STREAM_DECODE_SECONDS,
+                       margin_seconds=STREAM_MARGIN_SECONDS, context_seconds=STREAM_CONTEXT_SECONDS,
+                       max_buffer_seconds=STREAM_MAX_BUFFER_SECONDS):
+    """
+    스트리밍 전사: 확정된 노트를 시작 시각 순 note_events 리스트 (start, end, pitch, amplitude, pitch_bends)로 차례로 반환
+    활성화 버퍼에서 주기적으로 노트를 추출하고, 버퍼 끝 margin 안에 걸친 노트가 시작하는 지점을 확정 경계로 삼아
+    경계 앞에서 시작하는 노트만 내보냄 (경계를 넘는 노트는 다음 추출에서 이어진 활성화로 다시 추출)
+    내보낸 리스트들은 서로 겹치지 않고 시작 시각 순으로 이어짐
+    버퍼가 max_buffer_seconds를 넘으면 경계를 강제로 당겨서, 그 앞에서 시작한 노트는 지금까지의 길이로 확정
+    """
+    model = _resolve_model(model_or_model_path)
+    min_note_len = int(np.round(minimum_note_length / 1000 * (AUDIO_SAMPLE_RATE / FFT_HOP)))
+    decode_frames = max(1, int(decode_seconds * ANNOTATIONS_FPS))
+    margin_frames = int(np.ceil(margin_seconds * ANNOTATIONS_FPS))
+    context_frames = int(np.ceil(context_seconds * ANNOTATIONS_FPS))
+    # 상한은 최소한 한 번의 추출 + margin + 문맥보다는 길어야 함
+    max_buffer_frames = max(int(max_buffer_seconds * ANNOTATIONS_FPS), decode_frames + margin_frames + context_frames)
+
+    buffer = {"note": [], "onset": [], "contour": []}
+    buffer_start = 0    # buffer 첫 프레임의 절대 번호
+    buffer_frames = 0
+    boundary = 0        # 이 프레임보다 앞에서 시작하는 노트는 모두 내보냄
+    new_frames = 0
+    peaks = [0.0, 0.0]  # 지금까지의 onset 최댓값, 프레임 증가량 최댓값
+
+    def decode(final):
+        nonlocal boundary, buffer_start, buffer_frames
+        output = {k: np.concatenate(v) for k, v in buffer.items()}
+        for k, v in output.items():
+            buffer[k] = [v]
+
+        # infer.get_infered_onsets는 곡 전체 최댓값으로 정규화하므로 지금까지 본 최댓값으로 대신함
+        onsets, frames = infer.constrain_frequency(output["onset"], output["note"], maximum_frequency, minimum_frequency)
+        frame_diff = np.min([frames - np.roll(frames, n, axis=0) for n in (1, 2)], axis=0)
+        frame_diff[:2] = 0
+        np.maximum(frame_diff, 0, out=frame_diff)
+        peaks[0] = max(peaks[0], float(np.max(onsets)))
+        peaks[1] = max(peaks[1], float(np.max(frame_diff)))
+        if peaks[1] > 0:
+            onsets = np.maximum(onsets, peaks[0] * frame_diff / peaks[1])
+
+        notes = infer.output_to_notes_polyphonic(
+            frames, onsets,
+            onset_thresh=onset_threshold, frame_thresh=frame_threshold,
+            min_note_len=min_note_len, infer_onsets=False,
+            max_freq=maximum_frequency, min_freq=minimum_frequency,
+            melodia_trick=melodia_trick,
+        )
+        notes = [note for note in notes if buffer_start + note[0] >= boundary]
+
+        if final:
+            cut = buffer_start + buffer_frames
+        else:
+            # 버퍼 끝까지 이어질 수 있는 노트가 있으면 그 시작 지점에서 멈춤
+            limit = buffer_start + buffer_frames - margin_frames
+            cut = min([buffer_start + note[0] for note in notes if buffer_start + note[1] > limit] + [limit])
+            # 버퍼가 상한을 넘지 않도록 경계를 강제로 당김 (계속 울리는 노트가 경계를 붙잡는 경우)
+            cut = max(cut, min(limit, buffer_start + buffer_frames - max_buffer_frames + context_frames))
+        ready = [note for note in notes if buffer_start + note[0] < cut]
+
+        events = []
+        if ready:
+            ready = infer.get_pitch_bends(output["contour"], ready)
+            starts = frame_times(buffer_start + np.array([note[0] for note in ready]))
+            ends = frame_times(buffer_start + np.array([note[1] for note in ready]))
+            events = [
+                (start, end, note[2], note[3], note[4])
+                for start, end, note in zip(starts.tolist(), ends.tolist(), ready)
+            ]
+            events.sort(key=lambda event: event[0])
+
+        # 확정 경계 앞쪽 문맥만 남기고 버림
+        boundary = max(boundary, cut)
+        drop = max(0, min(boundary - context_frames, buffer_start + buffer_frames) - buffer_start)
+        if drop > 0:
+            for k in buffer:
+                buffer[k] = [buffer[k][0][drop:]]
+            buffer_start += drop
+            buffer_frames -= drop
+        return events
+
+    for chunk in stream_activations(iter_audio_blocks(audio_path, block_seconds), model):
+        for k, v in chunk.items():
+            buffer[k].append(v)
+        buffer_frames += chunk["note"].shape[0]
+        new_frames += chunk["note"].shape[0]
+        if new_frames >= decode_frames and buffer_frames > margin_frames:
+            new_frames = 0
+            events = decode(final=False)
+            if events:
+                yield events
+
+    if buffer_frames > 0:
+        events = decode(final=True)
+        if events:
+            yield events
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Scaling benchmark for the sweep-line apply_musical_intelligence
+Times the sweep over increasing song lengths (and the original grid scan up to --reference-max seconds)
+and reports time per note plus the log-log scaling exponent (about 1 for linear)
+
+    python3 tests/benchmark_musical_intelligence.py [--durations 30 60 120 240 480] [--reference-max 120]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(os.path.dirname(TESTS_DIR), "scripts"), TESTS_DIR]
+from midi_conversion_enhanced_musical import apply_musical_intelligence
+from test_musical_intelligence import note_tuples, reference_musical_intelligence, synthetic_notes
+
+def _best_time(function, notes, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function(notes)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def scaling_exponent(sizes, seconds):
+    """Slope of log(time) against log(size)"""
+    return float(np.polyfit(np.log(sizes), np.log(seconds), 1)[0])
+
+def benchmark_musical_intelligence(durations=(30, 60, 120, 240, 480), reference_max=120, repeat=3):
+    """Returns [(duration, notes, sweep seconds, reference seconds or None)] and prints a table"""
+    rows = []
+    print("duration  notes   sweep(s)   us/note   grid scan(s)")
+    for duration in durations:
+        notes = synthetic_notes(duration)
+        sweep, result = _best_time(apply_musical_intelligence, notes, repeat)
+        reference = None
+        if duration <= reference_max:
+            reference, expected = _best_time(reference_musical_intelligence, notes, 1)
+            if note_tuples(result) != note_tuples(expected):
+                raise AssertionError(f"sweep-line output differs from the grid scan at {duration}s")
+        rows.append((duration, len(notes), sweep, reference))
+        reference_text = f"{reference:12.3f}" if reference is not None else f"{'-':>12}"
+        print(f"{duration:8d}  {len(notes):5d}  {sweep:9.4f}  {sweep / len(notes) * 1e6:8.1f}  {reference_text}")
+
+    if len(rows) >= 2:
+        sizes = [row[1] for row in rows]
+        print(f"sweep-line scaling exponent: {scaling_exponent(sizes, [row[2] for row in rows]):.2f}")
+        timed = [row for row in rows if row[3] is not None]
+        if len(timed) >= 2:
+            exponent = scaling_exponent([row[1] for row in timed], [row[3] for row in timed])
+            print(f"grid scan scaling exponent: {exponent:.2f}")
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--durations", type=int, nargs="+", default=[30, 60, 120, 240, 480],
+                        help="synthetic song lengths in seconds")
+    parser.add_argument("--reference-max", type=int, default=120,
+                        help="also time the grid scan for songs up to this many seconds (0 = never)")
+    parser.add_argument("--repeat", type=int, default=3, help="best of N sweep-line runs")
+    args = parser.parse_args()
+    benchmark_musical_intelligence(args.durations, args.reference_max, args.repeat)
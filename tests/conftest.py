@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""scripts/의 모듈은 독립 실행 스크립트라 패키지가 아니므로 경로를 추가해서 임포트"""
+
+import os
+import sys
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
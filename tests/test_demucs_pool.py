@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+import json
+
+import numpy as np
+import torch
+from demucs.apply import BagOfModels
+
+import demucs_engine
+from audio_windows import OverlapCrossfader
+from demucs_engine import (
+    _apply, close_pools, model_from_spec, model_spec, plan_spans, separate_stems_parallel, with_precision,
+)
+from shared_weights import build_skeleton
+
+SR = 8000
+
+class PointwiseSeparator(torch.nn.Module):
+    """시간 불변(1x1 conv) 분리 모델: apply_model의 랜덤 shift와 무관하게 결과가 결정적"""
+    samplerate = SR
+    audio_channels = 2
+    sources = ["drums", "bass", "other", "vocals"]
+    segment = 1.0
+
+    def __init__(self):
+        super().__init__()
+        self.conv = torch.nn.Conv1d(2, 8, 1)
+
+    def forward(self, mix):
+        out = self.conv(mix)
+        return out.reshape(mix.shape[0], 4, 2, mix.shape[-1])
+
+class LinearSeparator(PointwiseSeparator):
+    """같은 시간 불변 분리를 Linear로 (int8 동적 양자화 대상)"""
+
+    def __init__(self):
+        super().__init__()
+        self.linear = torch.nn.Linear(2, 8)
+
+    def forward(self, mix):
+        out = self.linear(mix.transpose(1, 2)).transpose(1, 2)
+        return out.reshape(mix.shape[0], 4, 2, mix.shape[-1])
+
+def _model(klass=PointwiseSeparator):
+    torch.manual_seed(0)
+    return BagOfModels([klass().eval()])
+
+def _serial_spans(model, waveform, overlap_seconds):
+    """같은 구간을 이 프로세스에서 직접 분리해서 이어 붙인 결과"""
+    crossfader = OverlapCrossfader(int(overlap_seconds * SR))
+    spans = plan_spans(waveform.shape[1], 2, int(overlap_seconds * SR))
+    assert len(spans) == 2
+    pieces = []
+    for index, (start, stop) in enumerate(spans):
+        stems = _apply(model, waveform[:, start:stop], 0.25)
+        pieces.append(crossfader.push(stems.reshape(-1, stems.shape[-1]), last=index == len(spans) - 1))
+    return np.concatenate(pieces, axis=1)
+
+def test_parallel_pool_matches_serial_spans():
+    torch.set_num_threads(1)
+    model = _model()
+    rng = np.random.default_rng(0)
+    waveform = (0.1 * rng.standard_normal((2, 6 * SR))).astype(np.float32)
+    overlap_seconds = 0.5
+
+    try:
+        result = separate_stems_parallel(model, waveform, workers=2, sr=SR, overlap_seconds=overlap_seconds)
+        (_, pool), = demucs_engine._POOLS.values()
+        # 스레드가 있는 프로세스를 fork하지 않음
+        assert pool._ctx.get_start_method() in ("forkserver", "spawn")
+
+        expected = _serial_spans(model, waveform, overlap_seconds).reshape(result.shape)
+        np.testing.assert_allclose(result, expected, atol=1e-5)
+    finally:
+        close_pools()
+
+    # 종료 후 풀과 워커 프로세스가 남지 않음
+    assert demucs_engine._POOLS == {}
+    assert all(not worker.is_alive() for worker in pool._pool)
+
+def test_int8_pool_uses_parent_quantized_model():
+    torch.set_num_threads(1)
+    model = _model(LinearSeparator)
+    rng = np.random.default_rng(1)
+    waveform = (0.1 * rng.standard_normal((2, 6 * SR))).astype(np.float32)
+
+    try:
+        result = separate_stems_parallel(model, waveform, workers=2, sr=SR, overlap_seconds=0.5, precision="int8")
+        # 풀은 부모가 한 번 양자화한 모델로 시작 (워커에서 다시 양자화하지 않음)
+        quantized = with_precision(model, "int8")
+        (pool_model, _), = demucs_engine._POOLS.values()
+        assert pool_model is quantized
+        assert not any(isinstance(module, torch.nn.Linear) and type(module) is torch.nn.Linear
+                       for module in quantized.modules())
+        # 동적 양자화는 활성값 스케일을 조각마다 정하므로 (apply_model의 랜덤 shift) int8 오차 범위에서 비교
+        expected = _serial_spans(quantized, waveform, 0.5).reshape(result.shape)
+        np.testing.assert_allclose(result, expected, atol=0.02)
+    finally:
+        close_pools()
+
+def test_skeleton_from_spec_matches_htdemucs_structure():
+    from demucs.htdemucs import HTDemucs
+
+    model = BagOfModels([HTDemucs(sources=["drums", "bass", "other", "vocals"], channels=8, depth=2,
+                                  t_layers=1, bottom_channels=0, segment=4)], segment=3)
+    spec = model_spec(model)
+    skeleton = build_skeleton(lambda: model_from_spec(json.loads(json.dumps(spec))))
+
+    assert {p.device.type for p in skeleton.parameters()} == {"meta"}
+    assert {k: v.shape for k, v in skeleton.state_dict().items()} == {k: v.shape for k, v in model.state_dict().items()}
+    assert skeleton.models[0].segment == model.models[0].segment
+    assert skeleton.weights == model.weights
+
+def test_model_without_init_args_has_no_spec():
+    assert model_spec(_model()) is None
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from expression import (
+    STREAM_DYNAMICS, STREAM_TIMING, STREAM_VELOCITY, jitter_timing, note_keys, note_randint, note_random,
+    note_uniform,
+)
+
+def reference_jitter(start, end, shift, min_length, overlap_gap):
+    """84837fb 이전 apply_musical_expression의 노트별 순차 루프 (흔들림 값은 같은 배열 사용)"""
+    new_start, new_end = [], []
+    for i in range(len(start)):
+        note_start = max(0, start[i] + shift[i])
+        note_end = max(note_start + min_length, end[i] + shift[i])
+        if i > 0 and note_start < new_end[i - 1]:
+            note_start = new_end[i - 1] + overlap_gap
+            note_end = max(note_start + min_length, note_end)
+        new_start.append(note_start)
+        new_end.append(note_end)
+    return np.array(new_start), np.array(new_end)
+
+def _notes(count, seed, spacing, duration):
+    rng = np.random.RandomState(seed)
+    start = np.cumsum(rng.uniform(0, 2 * spacing, count))
+    end = start + rng.uniform(*duration, count)
+    pitch = rng.randint(40, 90, count)
+    return start, end, note_keys(start, pitch)
+
+@pytest.mark.parametrize("spacing, duration", [
+    (0.5, (0.1, 0.4)),      # 짧은 연쇄만: 배열 반복 안에서 수렴
+    (0.1, (0.05, 0.3)),     # 8회 넘게 이어지는 연쇄가 있어 남은 구간은 순차 처리
+    (0.002, (0.2, 1.5)),    # 거의 동시에 시작하는 긴 노트들: 곡 전체가 하나의 긴 연쇄
+])
+def test_jitter_timing_matches_sequential_loop(spacing, duration):
+    start, end, keys = _notes(3000, 0, spacing, duration)
+    new_start, new_end = jitter_timing(start, end, keys, max_shift=0.008, min_length=0.1, overlap_gap=0.005)
+
+    shift = note_uniform(keys, -0.008, 0.008, STREAM_TIMING)
+    expected_start, expected_end = reference_jitter(start, end, shift, 0.1, 0.005)
+    np.testing.assert_array_equal(new_start, expected_start)
+    np.testing.assert_array_equal(new_end, expected_end)
+
+def test_jitter_timing_chain_longer_than_iterations():
+    # 모든 노트가 같은 순간에 시작: 연쇄 길이 = 노트 수
+    start = np.zeros(50)
+    end = np.full(50, 0.5)
+    keys = note_keys(start, np.arange(50))
+    new_start, new_end = jitter_timing(start, end, keys, max_shift=0.008, min_length=0.1, overlap_gap=0.005)
+
+    shift = note_uniform(keys, -0.008, 0.008, STREAM_TIMING)
+    expected_start, expected_end = reference_jitter(start, end, shift, 0.1, 0.005)
+    np.testing.assert_array_equal(new_start, expected_start)
+    np.testing.assert_array_equal(new_end, expected_end)
+    assert (np.diff(new_start) > 0).all()
+
+def test_seeded_values_are_reproducible():
+    keys = np.array([0, 1, 12345678])
+    # 같은 키/스트림은 실행, 순서, 나눠 계산하는지와 무관하게 항상 같은 값
+    assert note_random(keys, STREAM_TIMING).tolist() == [0.09898262136490354, 0.5653292717927194, 0.14688953592768283]
+    assert note_randint(keys, -6, 6, STREAM_VELOCITY).tolist() == [3, -2, 4]
+    assert note_random(keys[::-1], STREAM_TIMING).tolist() == note_random(keys, STREAM_TIMING)[::-1].tolist()
+    assert note_random(keys[1:], STREAM_TIMING).tolist() == note_random(keys, STREAM_TIMING)[1:].tolist()
+
+    start, end, keys = _notes(500, 1, 0.01, (0.2, 1.0))
+    first = jitter_timing(start, end, keys, 0.008, 0.1, 0.005)
+    second = jitter_timing(start.copy(), end.copy(), keys.copy(), 0.008, 0.1, 0.005)
+    np.testing.assert_array_equal(first[0], second[0])
+    np.testing.assert_array_equal(first[1], second[1])
+
+def test_random_distribution():
+    keys = note_keys(np.arange(200000) * 0.0137, np.arange(200000) % 128)
+    values = note_random(keys, STREAM_TIMING)
+    assert values.min() >= 0 and values.max() < 1
+    assert abs(values.mean() - 0.5) < 0.005
+    assert abs(values.std() - np.sqrt(1 / 12)) < 0.005
+    assert (np.abs(np.histogram(values, bins=10, range=(0, 1))[0] / len(values) - 0.1) < 0.005).all()
+
+    # randint(-6, 6): 13개 값이 고르게 (표준편차 √((13² - 1) / 12) ≈ 3.74)
+    ints = note_randint(keys, -6, 6, STREAM_VELOCITY)
+    assert set(ints.tolist()) == set(range(-6, 7))
+    assert (np.abs(np.bincount(ints + 6) / len(ints) - 1 / 13) < 0.005).all()
+    assert abs(ints.std() - np.sqrt((13 ** 2 - 1) / 12)) < 0.02
+
+    # 용도별 스트림끼리, 이웃한 키끼리 상관 없음
+    assert abs(np.corrcoef(values, note_random(keys, STREAM_DYNAMICS))[0, 1]) < 0.01
+    assert abs(np.corrcoef(values[:-1], values[1:])[0, 1]) < 0.01
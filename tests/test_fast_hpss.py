@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import librosa
+import pytest
+
+import fast_hpss
+from fast_hpss import harmonic_mask, hpss_mix
+
+SR = 22050
+
+def _stem(seconds=3.0, seed=0):
+    """스테레오 테스트 신호 (기타 음 + 타격음 + 잡음, 오른쪽 채널은 살짝 지연)"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SR)) / SR
+    tones = sum(0.2 * np.sin(2 * np.pi * f * t) for f in (82.4, 196.0, 329.6))
+    clicks = np.zeros_like(t)
+    clicks[::SR // 4] = 1.0
+    mono = tones + clicks + 0.01 * rng.standard_normal(t.shape[0])
+    return np.stack([mono, np.roll(mono, 37)]).astype(np.float32)
+
+def _librosa_mix(y, harmonic_weight=0.8, percussive_weight=0.2):
+    harmonic, percussive = librosa.effects.hpss(y, margin=1.0)
+    return harmonic * harmonic_weight + percussive * percussive_weight
+
+@pytest.fixture(params=["bottleneck", "scipy"])
+def median_backend(request, monkeypatch):
+    """bottleneck 이동 중앙값과 scipy.ndimage 대체 경로 모두 확인"""
+    if request.param == "scipy":
+        monkeypatch.setattr(fast_hpss, "bn", None)
+    elif fast_hpss.bn is None:
+        pytest.skip("bottleneck이 설치되지 않음")
+    return request.param
+
+def test_harmonic_mask_matches_librosa(median_backend):
+    S = np.abs(librosa.stft(_stem()[0]))
+    expected, _ = librosa.decompose.hpss(S, margin=1.0, mask=True)
+    np.testing.assert_allclose(harmonic_mask(S), expected, atol=1e-5)
+
+def test_hpss_mix_matches_librosa_mono(median_backend):
+    y = _stem()[0]
+    np.testing.assert_allclose(hpss_mix(y), _librosa_mix(y), atol=1e-4)
+
+def test_hpss_mix_matches_librosa_stereo(median_backend):
+    y = _stem()
+    expected = np.stack([_librosa_mix(channel) for channel in y])
+    fast = hpss_mix(y)
+    assert fast.shape == y.shape
+    np.testing.assert_allclose(fast, expected, atol=1e-4)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import itertools
+
+import numpy as np
+
+from fingering import (
+    MAX_STRETCH, STRETCH_COST, fingering_cost, format_ascii_tab, optimize_fingering,
+)
+from fretboard import STANDARD_TUNING, get_fretboard
+from note_array import NoteArray
+
+def _chord(pitches, start=0.0):
+    count = len(pitches)
+    return NoteArray.from_columns(np.full(count, start), np.full(count, start + 1.0), pitches)
+
+def _pressed_span(notes):
+    frets = notes.fret[notes.fret > 0]
+    return int(frets.max() - frets.min()) if len(frets) else 0
+
+def _narrowest_span(pitches):
+    """음높이 순으로 더 높은 현에 배정하는 모든 방법 중 가장 좁은 누른 프렛 폭 (배정 불가면 None)"""
+    fretboard = get_fretboard(STANDARD_TUNING, max_fret=15)
+    spans = []
+    for strings in itertools.combinations(range(6), len(pitches)):
+        frets = [int(fretboard.string_frets[pitch][string]) for pitch, string in zip(pitches, strings)]
+        if min(frets) >= 0:
+            pressed = [fret for fret in frets if fret > 0]
+            spans.append(max(pressed) - min(pressed) if pressed else 0)
+    return min(spans, default=None)
+
+def test_seven_note_chord_drops_excess_explicitly(capsys):
+    fingered = optimize_fingering(_chord([40, 45, 50, 55, 59, 64, 64]))
+    assert "1개 제외" in capsys.readouterr().out
+    assert len(fingered) == 6
+    # 같은 현에 두 음이 남지 않고, 높은 E(64)는 그대로 남음
+    assert len(set(fingered.string.tolist())) == 6
+    assert 64 in fingered.pitch.tolist()
+
+def test_ascii_tab_never_overwrites_silently(capsys):
+    notes = _chord([60, 64])
+    notes.string[:] = 4
+    notes.fret[:] = [1, 5]
+    tab = format_ascii_tab(notes)
+    assert "1개 생략" in capsys.readouterr().out
+    assert "-5" in tab and "-1" not in tab
+
+def test_chord_span_is_penalised_not_just_adjacent_pairs():
+    # 1-5-9 프렛: 인접한 두 음 간격은 4지만 화음 전체 폭은 8
+    notes = _chord([41, 50, 59])
+    notes.string[:] = [0, 1, 2]
+    notes.fret[:] = [1, 5, 9]
+    compact = NoteArray(notes.data.copy())
+    compact.string[:] = [0, 2, 4]
+    compact.fret[:] = [1, 0, 0]
+    assert fingering_cost(notes) - fingering_cost(compact) >= STRETCH_COST * (8 - MAX_STRETCH)
+
+def test_optimizer_keeps_chords_within_stretch():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        pitches = sorted(rng.choice(np.arange(45, 72), 3, replace=False).tolist())
+        narrowest = _narrowest_span(pitches)
+        if narrowest is None:
+            continue
+        fingered = optimize_fingering(_chord(pitches))
+        assert _pressed_span(fingered) <= max(narrowest, MAX_STRETCH)
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+
+from guitar_dsp import GuitarPostChain
+
+SR = 8000
+
+class _Collect:
+    def __init__(self):
+        self.blocks = []
+
+    def write(self, block):
+        self.blocks.append(np.array(block))
+
+    def result(self):
+        return np.concatenate(self.blocks, axis=1)
+
+def _signal(seconds=6.0, seed=0):
+    """조용한 앞부분 + 끝 근처의 큰 소리 (누적 최대값으로 게이트하면 앞부분 결과가 달라지는 신호)"""
+    rng = np.random.default_rng(seed)
+    frames = int(seconds * SR)
+    guitar = rng.normal(0, 0.01, (2, frames)).astype(np.float32)
+    guitar[:, -SR // 2:] += rng.normal(0, 1.0, (2, SR // 2)).astype(np.float32)
+    vocals = rng.normal(0, 0.01, (2, frames)).astype(np.float32)
+    return guitar, vocals
+
+def _chunks(guitar, vocals, sizes):
+    start = 0
+    for size in sizes:
+        yield guitar[:, start:start + size], vocals[:, start:start + size]
+        start += size
+    yield guitar[:, start:], vocals[:, start:]
+
+def test_stream_matches_batch(tmp_path):
+    guitar, vocals = _signal()
+    batch = GuitarPostChain(SR, block_frames=4096).process(guitar, vocals)
+
+    out = _Collect()
+    chain = GuitarPostChain(SR, block_frames=4096)
+    frames = chain.process_stream(_chunks(guitar, vocals, [5000, 12345, 7]), out, spool_dir=str(tmp_path))
+
+    assert frames == guitar.shape[1]
+    np.testing.assert_array_equal(out.result(), batch)
+    assert list(tmp_path.iterdir()) == []
+
+def test_gate_uses_whole_signal_peak():
+    guitar, vocals = _signal()
+    chain = GuitarPostChain(SR, block_frames=4096)
+    output = chain.process(guitar, vocals)
+
+    # 앞부분은 전체 최대값의 0.5% 기준으로 게이트
+    reference = GuitarPostChain(SR, block_frames=4096)
+    pre_gate = np.concatenate([reference.filter_block(guitar[:, s:s + 4096], vocals[:, s:s + 4096])
+                               for s in range(0, guitar.shape[1], 4096)], axis=1)
+    threshold = 0.005 * np.abs(pre_gate).max(axis=1, keepdims=True)
+    expected = np.where(np.abs(pre_gate) < threshold, pre_gate * 0.1, pre_gate)
+    np.testing.assert_array_equal(output, expected.astype(np.float32))
+    assert (np.abs(pre_gate[:, :SR]) < threshold).any()
+
+def test_stream_without_vocals(tmp_path):
+    guitar, _ = _signal(seconds=2.0, seed=1)
+    batch = GuitarPostChain(SR, vocal_reduction=0.0).process(guitar)
+    out = _Collect()
+    GuitarPostChain(SR, vocal_reduction=0.0).process_stream(
+        ((block, None) for block, _ in _chunks(guitar, guitar, [3000])), out, spool_dir=str(tmp_path))
+    np.testing.assert_array_equal(out.result(), batch)
+
+def _reference_extract_guitar_only(other, vocals, sr):
+    """85ced68의 extract_guitar_only (STFT 마스크 저역 감쇠 → librosa HPSS → 보컬 감산 → 채널별 게이트)"""
+    import librosa
+
+    guitar_base = np.zeros_like(other)
+    for ch in range(other.shape[0]):
+        stft = librosa.stft(other[ch], n_fft=2048, hop_length=512)
+        freqs = librosa.fft_frequencies(sr=sr, n_fft=2048)
+        stft[freqs < 50] *= 0.1
+        guitar_base[ch] = librosa.istft(stft, hop_length=512, length=other.shape[1])
+
+    guitar_clean = np.zeros_like(guitar_base)
+    for ch in range(guitar_base.shape[0]):
+        harmonic, percussive = librosa.effects.hpss(guitar_base[ch], margin=1.0)
+        guitar_clean[ch] = harmonic * 0.8 + percussive * 0.2
+
+    guitar_final = guitar_clean - vocals * 0.1
+    for ch in range(guitar_final.shape[0]):
+        audio = guitar_final[ch]
+        threshold = np.max(np.abs(audio)) * 0.005
+        guitar_final[ch] = np.where(np.abs(audio) < threshold, audio * 0.1, audio)
+    return guitar_final
+
+def test_extract_guitar_only_matches_stft_mask_path():
+    from guitar_separation_improved import extract_guitar_only
+
+    sr = 22050
+    t = np.arange(4 * sr) / sr
+    rng = np.random.default_rng(2)
+    # 베이스(40Hz) + 기타 음(110/440Hz) + 타격음 + 잡음
+    mono = 0.5 * np.sin(2 * np.pi * 40 * t) + 0.3 * np.sin(2 * np.pi * 110 * t) + 0.2 * np.sin(2 * np.pi * 440 * t)
+    mono[::sr // 2] += 2.0
+    other = np.stack([mono, np.roll(mono, 37)]) + rng.normal(0, 0.02, (2, t.size))
+    other = other.astype(np.float32)
+    vocals = rng.normal(0, 0.05, (2, t.size)).astype(np.float32)
+    silent = np.zeros_like(other)
+
+    output = extract_guitar_only(silent, silent, other, vocals, sr)
+    expected = _reference_extract_guitar_only(other, vocals, sr)
+
+    # 양 끝(필터/STFT 가장자리 효과) 제외, 상대 오차 2% 이내 (측정값 약 0.7%)
+    edge = 2048
+    diff = output[:, edge:-edge] - expected[:, edge:-edge]
+    error = np.linalg.norm(diff) / np.linalg.norm(expected[:, edge:-edge])
+    assert error < 0.02
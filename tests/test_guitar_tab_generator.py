@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import multiprocessing
+import threading
+
+import numpy as np
+import pytest
+
+import guitar_tab_generator
+from guitar_tab_generator import GuitarTabGenerator
+from midi_io import write_notes
+from note_array import NoteArray
+
+@pytest.fixture(scope="module")
+def tab_positions(tmp_path_factory):
+    # 3음 화음 300개: 한 줄 최대 노트 수를 넘겨 여러 페이지가 되도록
+    start = np.repeat(np.arange(300) * 0.25, 3)
+    pitch = 40 + (np.arange(900) * 7) % 36
+    path = str(tmp_path_factory.mktemp("midi") / "scale.mid")
+    write_notes(path, NoteArray.from_columns(start, start + 0.2, pitch))
+    return GuitarTabGenerator().midi_to_tab_positions(path)
+
+def _page_count(generator, tab_positions):
+    return len(generator.paginate(generator.split_tab_into_lines(tab_positions)))
+
+def test_pdf_holds_every_page(tab_positions, tmp_path):
+    generator = GuitarTabGenerator()
+    pages = _page_count(generator, tab_positions)
+    assert pages > 1
+    output = str(tmp_path / "tab.pdf")
+    assert generator.render_pages(tab_positions, output, workers=1) == [output]
+    with open(output, "rb") as f:
+        assert f.read().count(b"/Type /Page ") == pages
+
+def test_renders_inline_off_main_thread(tab_positions, tmp_path, monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("스테이지 서버 스레드에서 프로세스 풀을 만들면 안 됨")
+    monkeypatch.setattr(multiprocessing, "get_context", no_pool)
+
+    paths = []
+    thread = threading.Thread(target=lambda: paths.extend(
+        GuitarTabGenerator().render_pages(tab_positions, str(tmp_path / "tab.png"))))
+    thread.start()
+    thread.join()
+    assert len(paths) == _page_count(GuitarTabGenerator(), tab_positions)
+
+def test_pool_is_bounded_and_not_forked(tab_positions, tmp_path, monkeypatch):
+    methods, sizes = [], []
+    original = multiprocessing.get_context
+    def recording(method=None):
+        methods.append(method)
+        context = original(method)
+        pool = context.Pool
+        class Context:
+            def Pool(self, processes):
+                sizes.append(processes)
+                return pool(processes)
+        return Context()
+    monkeypatch.setattr(multiprocessing, "get_context", recording)
+    monkeypatch.setattr(guitar_tab_generator.os, "cpu_count", lambda: 64)
+
+    paths = GuitarTabGenerator().render_pages(tab_positions, str(tmp_path / "tab.png"))
+    assert len(paths) > 1
+    assert methods and methods[0] in ("forkserver", "spawn")
+    assert sizes == [min(guitar_tab_generator.MAX_RENDER_WORKERS, len(paths))]
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+import soundfile as sf
+
+pytest.importorskip("basic_pitch")
+
+from inference_backends import BACKENDS, available_backends, load_model, model_path
+from transcription import AUDIO_SAMPLE_RATE, load_audio, predict, run_inference_on_audio
+
+@pytest.fixture(scope="module")
+def audio_path(tmp_path_factory):
+    """기타 음역 화음/단음이 섞인 12초 신호"""
+    rng = np.random.default_rng(0)
+    t = np.arange(12 * AUDIO_SAMPLE_RATE) / AUDIO_SAMPLE_RATE
+    y = np.zeros_like(t)
+    for start in np.arange(0.2, 11.0, 0.5):
+        pitches = rng.integers(45, 76, size=int(rng.integers(1, 4)))
+        env = np.where(t >= start, np.exp(-3 * (t - start)), 0.0)
+        for pitch in pitches:
+            frequency = 440 * 2 ** ((pitch - 69) / 12)
+            y += 0.15 * env * sum(np.sin(2 * np.pi * frequency * k * (t - start)) / k for k in (1, 2, 3))
+    path = str(tmp_path_factory.mktemp("audio") / "mix.wav")
+    sf.write(path, y.astype(np.float32), AUDIO_SAMPLE_RATE)
+    return path
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_matches_basic_pitch_predict(backend, audio_path):
+    if backend not in available_backends():
+        pytest.skip(f"{backend} 런타임이 설치되어 있지 않음")
+    from basic_pitch.inference import predict as reference_predict
+
+    path = model_path(backend)
+    reference_output, _, reference_events = reference_predict(audio_path, path)
+
+    output = run_inference_on_audio(load_audio(audio_path), load_model(path))
+    for key in ("note", "onset", "contour"):
+        assert output[key].shape == reference_output[key].shape
+        np.testing.assert_allclose(output[key], reference_output[key], atol=1e-4)
+
+    _, _, events = predict(audio_path, path, cache=None)
+    assert len(events) > 0
+    assert [(round(e[0], 3), round(e[1], 3), e[2]) for e in events] == \
+        [(round(e[0], 3), round(e[1], 3), e[2]) for e in reference_events]
+    np.testing.assert_allclose([e[3] for e in events], [e[3] for e in reference_events], atol=1e-4)
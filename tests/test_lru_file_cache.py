@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+import os
+
+import numpy as np
+
+from activation_cache import OUTPUT_KEYS, ActivationCache
+from stem_cache import StemCache
+
+def test_stem_cache_round_trip(tmp_path):
+    cache = StemCache(str(tmp_path), max_mb=1)
+    stems = np.random.default_rng(0).standard_normal((4, 2, 1000)).astype(np.float32)
+    assert cache.get("a") is None
+    cache.put("a", stems)
+    loaded = cache.get("a")
+    assert loaded.dtype == np.float32
+    np.testing.assert_allclose(loaded, stems, atol=2e-3)
+    assert os.listdir(tmp_path) == ["a.npy"]
+
+def test_activation_cache_round_trip(tmp_path):
+    cache = ActivationCache(str(tmp_path), max_mb=1)
+    output = {k: np.full((10, 88), 0.25, dtype=np.float32) for k in OUTPUT_KEYS}
+    cache.put("b", output)
+    loaded = cache.get("b")
+    assert set(loaded) == set(OUTPUT_KEYS)
+    np.testing.assert_array_equal(loaded["note"], output["note"])
+
+def test_evicts_least_recently_used(tmp_path):
+    stems = np.zeros((4, 2, 20000), dtype=np.float32)  # float16로 약 320KB
+    cache = StemCache(str(tmp_path), max_mb=0.7)
+    cache.put("old", stems)
+    cache.put("used", stems)
+    os.utime(cache.entry_path("old"), (1, 1))
+    os.utime(cache.entry_path("used"), (2, 2))
+    assert cache.get("used") is not None  # 사용 시각 갱신
+    cache.put("new", stems)
+    assert sorted(os.listdir(tmp_path)) == ["new.npy", "used.npy"]
+
+def test_disabled_cache_does_nothing(tmp_path):
+    cache = StemCache(str(tmp_path / "off"), max_mb=0)
+    cache.put("a", np.zeros((4, 2, 10), dtype=np.float32))
+    assert cache.get("a") is None
+    assert not os.path.exists(tmp_path / "off")
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+import io
+
+import mido
+import numpy as np
+import pretty_midi
+import pytest
+
+from midi_io import check_file, midi_bytes, read_midi, write_notes
+from note_array import NoteArray
+
+def _smf(midi_type, tracks, ticks_per_beat=480):
+    """(이벤트 목록, ...) → SMF 바이트, 이벤트는 (delta, mido 메시지)"""
+    midi = mido.MidiFile(type=midi_type, ticks_per_beat=ticks_per_beat)
+    for events in tracks:
+        track = mido.MidiTrack()
+        for delta, message in events:
+            track.append(message.copy(time=delta))
+        midi.tracks.append(track)
+    buffer = io.BytesIO()
+    midi.save(file=buffer)
+    return buffer.getvalue()
+
+def on(note, velocity=100, channel=0):
+    return mido.Message("note_on", note=note, velocity=velocity, channel=channel)
+
+def off(note, channel=0):
+    return mido.Message("note_off", note=note, velocity=64, channel=channel)
+
+def program(number, channel=0):
+    return mido.Message("program_change", program=number, channel=channel)
+
+def tempo(bpm):
+    return mido.MetaMessage("set_tempo", tempo=mido.bpm2tempo(bpm))
+
+def name(text):
+    return mido.MetaMessage("track_name", name=text)
+
+FIXTURES = {
+    # 타입 0: 한 트랙에 두 채널, 벨로시티 0 note on으로 끄기
+    "type0_velocity_zero": _smf(0, [[
+        (0, tempo(100)), (0, program(25)), (0, program(33, channel=1)),
+        (0, on(60)), (0, on(40, channel=1)), (240, on(60, velocity=0)), (0, on(64)),
+        (240, on(40, velocity=0, channel=1)), (0, off(64)),
+    ]]),
+    # 타입 1: 템포 트랙 + 악기 트랙 두 개, 여러 번의 템포 변경
+    "type1_tempo_changes": _smf(1, [
+        [(0, tempo(120)), (960, tempo(90)), (960, tempo(150))],
+        [(0, name("guitar")), (0, program(25)), (0, on(52)), (480, off(52)), (480, on(55)),
+         (960, off(55)), (0, on(57)), (480, off(57))],
+        [(0, name("bass")), (0, program(33, channel=1)), (0, on(28, channel=1)), (2400, off(28, channel=1))],
+    ]),
+    # 같은 틱의 on/off, 같은 음 겹쳐 누르기
+    "same_tick_on_off": _smf(1, [
+        [(0, tempo(120))],
+        [(0, on(62)), (240, off(62)), (0, on(62)), (0, on(62, velocity=70)), (240, off(62)),
+         (0, on(67)), (0, off(67)), (120, off(62))],
+    ]),
+    # 드럼 (채널 10)
+    "drums": _smf(1, [
+        [(0, tempo(128))],
+        [(0, name("drums")), (0, on(36, channel=9)), (0, on(42, channel=9)), (120, off(36, channel=9)),
+         (0, off(42, channel=9)), (120, on(38, channel=9)), (120, off(38, channel=9))],
+    ]),
+    # 노트가 없는 파일
+    "empty": _smf(1, [[(0, tempo(120))]]),
+}
+
+@pytest.mark.parametrize("fixture", sorted(FIXTURES))
+def test_read_matches_pretty_midi(fixture):
+    data = FIXTURES[fixture]
+    ours = read_midi(data)
+    theirs = pretty_midi.PrettyMIDI(io.BytesIO(data))
+
+    assert ours.resolution == theirs.resolution
+    assert len(ours.instruments) == len(theirs.instruments)
+    for a, b in zip(ours.instruments, theirs.instruments):
+        assert (a.program, a.is_drum, a.name) == (b.program, b.is_drum, b.name)
+        expected = NoteArray.from_notes(b.notes)
+        np.testing.assert_array_equal(a.notes.pitch, expected.pitch)
+        np.testing.assert_array_equal(a.notes.velocity, expected.velocity)
+        np.testing.assert_array_equal(a.notes.start, expected.start)
+        np.testing.assert_array_equal(a.notes.end, expected.end)
+
+    result = check_file(io.BytesIO(data), repeat=1)
+    assert result["same_read"]
+    assert result["same_write"] is not False
+
+def test_fixtures_exercise_each_case():
+    assert mido.MidiFile(file=io.BytesIO(FIXTURES["type0_velocity_zero"])).type == 0
+    assert len(pretty_midi.PrettyMIDI(io.BytesIO(FIXTURES["type1_tempo_changes"])).get_tempo_changes()[0]) == 3
+    assert pretty_midi.PrettyMIDI(io.BytesIO(FIXTURES["drums"])).instruments[0].is_drum
+    assert read_midi(FIXTURES["empty"]).instruments == []
+
+@pytest.mark.parametrize("fixture", ["type0_velocity_zero", "same_tick_on_off", "drums"])
+def test_write_matches_pretty_midi_bytes(fixture):
+    theirs = pretty_midi.PrettyMIDI(io.BytesIO(FIXTURES[fixture]))
+    buffer = io.BytesIO()
+    theirs.write(buffer)
+    ours = read_midi(FIXTURES[fixture])
+    assert midi_bytes(ours.instruments, ours.resolution, float(theirs.get_tempo_changes()[1][0])) == buffer.getvalue()
+
+def test_write_notes_round_trip(tmp_path):
+    notes = NoteArray.from_columns([0.0, 0.5, 0.5, 1.25], [0.5, 1.0, 2.0, 1.25], [40, 45, 52, 64], [90, 80, 70, 60])
+    path = str(tmp_path / "notes.mid")
+    write_notes(path, notes, program=25, name="guitar")
+
+    theirs = pretty_midi.PrettyMIDI(path).instruments
+    ours = read_midi(path).instruments
+    assert len(ours) == len(theirs) == 1
+    assert ours[0].name == theirs[0].name == "guitar"
+    expected = NoteArray.from_notes(theirs[0].notes)
+    np.testing.assert_array_equal(ours[0].notes.data[["start", "end", "pitch", "velocity"]],
+                                  expected.data[["start", "end", "pitch", "velocity"]])
+    # 길이 0 노트(같은 틱 on/off)는 pretty_midi처럼 읽을 때 사라짐
+    np.testing.assert_allclose(sorted(ours[0].notes.start.tolist()), [0.0, 0.5, 0.5], atol=1e-3)
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pretty_midi
+import pytest
+
+from midi_conversion_enhanced_musical import (
+    apply_musical_intelligence, calculate_note_density, create_enhanced_note,
+    select_best_musical_note, should_add_note,
+)
+
+def reference_musical_intelligence(all_notes):
+    """
+    Original grid scan: rescans every note at every 20ms step, O(steps x notes)
+    """
+    processed_notes = []
+    
+    # Musical parameters
+    time_resolution = 0.02  # 20ms resolution for precise control
+    
+    # Analyze musical structure
+    total_duration = all_notes[-1].end if all_notes else 0
+    current_time = 0
+    
+    # Track musical context
+    last_pitch = None
+    note_density = calculate_note_density(all_notes)
+    
+    while current_time < total_duration + 1.0:
+        # Find notes active at current time
+        active_notes = [n for n in all_notes 
+                       if n.start <= current_time < n.end]
+        
+        if active_notes:
+            # Select best note using musical intelligence
+            selected_note = select_best_musical_note(
+                active_notes, current_time, last_pitch, note_density
+            )
+            
+            if selected_note:
+                # Check if we should add this note
+                should_add = should_add_note(
+                    selected_note, processed_notes, current_time
+                )
+                
+                if should_add:
+                    # Create musically enhanced note
+                    enhanced_note = create_enhanced_note(
+                        selected_note, current_time, processed_notes
+                    )
+                    
+                    processed_notes.append(enhanced_note)
+                    last_pitch = enhanced_note.pitch
+        
+        current_time += time_resolution
+    
+    return processed_notes
+
+def synthetic_notes(duration, seed=0, polyphony=4):
+    """Dense random transcription (about 8 onsets/s, overlapping chords)"""
+    rng = np.random.RandomState(seed)
+    notes = []
+    for start in np.sort(rng.uniform(0, duration, int(duration * 8))):
+        for _ in range(rng.randint(1, polyphony + 1)):
+            notes.append(pretty_midi.Note(
+                velocity=int(rng.randint(20, 127)),
+                pitch=int(rng.randint(30, 95)),
+                start=float(start),
+                end=float(start + rng.uniform(0.03, 3.0))
+            ))
+    notes.sort(key=lambda x: x.start)
+    return notes
+
+def note_tuples(notes):
+    return [(n.pitch, n.velocity, n.start, n.end) for n in notes]
+
+@pytest.mark.parametrize("seed", range(5))
+def test_sweep_line_matches_grid_scan(seed):
+    notes = synthetic_notes(20 + 10 * seed, seed)
+    assert note_tuples(apply_musical_intelligence(notes)) == note_tuples(reference_musical_intelligence(notes))
+
+def test_sweep_line_skips_silence_like_grid_scan():
+    notes = [
+        pretty_midi.Note(velocity=90, pitch=64, start=0.1, end=0.6),
+        pretty_midi.Note(velocity=80, pitch=67, start=12.0, end=12.5),
+    ]
+    assert note_tuples(apply_musical_intelligence(notes)) == note_tuples(reference_musical_intelligence(notes))
+    assert apply_musical_intelligence([]) == []
+
+def test_benchmark_helper_reports_scaling():
+    from benchmark_musical_intelligence import benchmark_musical_intelligence
+
+    rows = benchmark_musical_intelligence(durations=(5, 10), reference_max=10, repeat=1)
+    assert [row[0] for row in rows] == [5, 10]
+    assert all(row[2] > 0 and row[3] is not None for row in rows)
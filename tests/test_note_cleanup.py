@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+import copy
+
+import numpy as np
+import pretty_midi
+import pytest
+
+from note_array import NoteArray
+from note_cleanup import (
+    clamp_durations, delay_overlaps, drop_overlapped, drop_short, fold_into_range, merge_same_pitch,
+)
+from midi_conversion_monophonic import adjust_for_guitar_tuning, refine_guitar_midi
+
+def reference_merge_same_pitch(notes, max_gap=0.0):
+    """del-in-loop merge: fold each note into the previous kept one while it has the same pitch and overlaps"""
+    notes = [copy.copy(note) for note in notes]
+    i = 1
+    while i < len(notes):
+        prev, note = notes[i - 1], notes[i]
+        if note.pitch == prev.pitch and note.start <= prev.end + max_gap:
+            prev.end = max(prev.end, note.end)
+            del notes[i]
+        else:
+            i += 1
+    return notes
+
+def reference_adjust_for_guitar_tuning(notes):
+    """85ced68 adjust_for_guitar_tuning (one instrument, without prints)"""
+    notes = [copy.copy(note) for note in notes]
+    notes_to_remove = []
+    for i, note in enumerate(notes):
+        if note.end - note.start < 0.03:
+            notes_to_remove.append(i)
+            continue
+        while note.pitch > 100:
+            note.pitch -= 12
+        while note.pitch < 30:
+            note.pitch += 12
+    for i in reversed(notes_to_remove):
+        del notes[i]
+    return notes
+
+def reference_refine(notes):
+    """85ced68 refine_guitar_midi overlap loop (one instrument)"""
+    notes = sorted((copy.copy(note) for note in notes), key=lambda n: n.start)
+    notes_to_remove = []
+    for i in range(len(notes) - 1):
+        current_note = notes[i]
+        next_note = notes[i + 1]
+        overlap = max(0, min(current_note.end, next_note.end) - max(current_note.start, next_note.start))
+        current_duration = current_note.end - current_note.start
+        next_duration = next_note.end - next_note.start
+        if overlap / max(current_duration, next_duration) > 0.9:
+            if current_duration < next_duration:
+                notes_to_remove.append(i)
+            else:
+                current_note.end = next_note.start - 0.01
+    for i in reversed(notes_to_remove):
+        if i < len(notes):
+            del notes[i]
+    for note in notes:
+        note.velocity = min(max(note.velocity, 20), 127)
+    return notes
+
+def reference_monophonic_sequence(notes, low=40, high=60):
+    """85ced68 create_monophonic_sequence without the fret check (octave fold, length clamp, push back)"""
+    sequence = []
+    for note in sorted(notes, key=lambda n: n.start):
+        pitch = note.pitch
+        while pitch < low:
+            pitch += 12
+        while pitch > high:
+            pitch -= 12
+        pitch = max(low, min(pitch, high))
+        onset = note.start
+        duration = max(0.125, min(note.end - note.start, 3.0))
+        if sequence and onset < sequence[-1].end + 0.05:
+            onset = sequence[-1].end + 0.05
+        sequence.append(pretty_midi.Note(velocity=note.velocity, pitch=pitch, start=onset, end=onset + duration))
+    return sequence
+
+def random_notes(count, seed, grid=None, pitches=(40, 41, 52), shuffle=True):
+    """Overlapping notes over a few pitches (repeats of the same pitch are common), optionally grid-snapped and shuffled"""
+    rng = np.random.RandomState(seed)
+    start = np.cumsum(rng.exponential(0.12, count))
+    duration = rng.choice([0.01, 0.05, 0.2, 0.6, 4.0], count) * rng.uniform(0.5, 1.5, count)
+    if grid is not None:
+        start = np.round(start / grid) * grid
+        duration = np.maximum(np.round(duration / grid), 1) * grid
+    pitch = rng.choice(list(pitches) + [20, 110], count)
+    velocity = rng.randint(5, 127, count)
+    notes = [pretty_midi.Note(velocity=int(v), pitch=int(p), start=float(s), end=float(s + d))
+             for v, p, s, d in zip(velocity, pitch, start, duration)]
+    if shuffle:
+        rng.shuffle(notes)
+    return notes
+
+def note_tuples(notes):
+    if isinstance(notes, NoteArray):
+        notes = notes.to_notes()
+    return [(note.start, note.end, note.pitch, note.velocity) for note in notes]
+
+def assert_same_notes(actual, expected):
+    actual, expected = note_tuples(actual), note_tuples(expected)
+    assert len(actual) == len(expected)
+    np.testing.assert_allclose(np.array(actual, dtype=float), np.array(expected, dtype=float), atol=1e-9)
+
+CASES = [
+    dict(count=300, seed=0),
+    dict(count=300, seed=1, grid=0.05),
+    dict(count=300, seed=2, grid=0.1, pitches=(45,)),
+    dict(count=2, seed=3, pitches=(45,)),
+]
+
+@pytest.mark.parametrize("case", CASES)
+def test_merge_same_pitch_matches_del_loop(case):
+    notes = sorted(random_notes(**case), key=lambda n: n.start)
+    for max_gap in (0.0, 0.05):
+        actual = merge_same_pitch(NoteArray.from_notes(notes), max_gap=max_gap)
+        assert_same_notes(actual, reference_merge_same_pitch(notes, max_gap=max_gap))
+
+def test_merge_same_pitch_uses_merged_end():
+    # the third note starts after the second ends but inside the first, which it was merged with
+    notes = NoteArray.from_columns([0.0, 1.0, 3.0], [5.0, 2.0, 4.0], [45, 45, 45])
+    assert note_tuples(merge_same_pitch(notes)) == [(0.0, 5.0, 45, 100)]
+
+@pytest.mark.parametrize("case", CASES)
+def test_drop_short_and_fold_match_del_loop(case):
+    notes = random_notes(**case)
+    folded, _ = fold_into_range(drop_short(NoteArray.from_notes(notes), 0.03), 30, 100)
+    assert_same_notes(folded, reference_adjust_for_guitar_tuning(notes))
+
+@pytest.mark.parametrize("case", CASES)
+def test_drop_overlapped_matches_del_loop(case):
+    notes = random_notes(**case)
+    refined = drop_overlapped(NoteArray.from_notes(notes).sorted_by_start(), ratio=0.9, gap=0.01)
+    refined.velocity[:] = np.clip(refined.velocity, 20, 127)
+    assert_same_notes(refined, reference_refine(notes))
+
+@pytest.mark.parametrize("case", CASES)
+def test_clamp_and_delay_match_sequential_loop(case):
+    notes = random_notes(**case)
+    sequence = NoteArray.from_notes(notes).sorted_by_start()
+    sequence, _ = fold_into_range(sequence, 40, 60)
+    sequence.pitch[:] = np.clip(sequence.pitch, 40, 60)
+    sequence = delay_overlaps(clamp_durations(sequence, min_duration=0.125, max_duration=3.0), gap=0.05)
+    assert_same_notes(sequence, reference_monophonic_sequence(notes))
+
+@pytest.mark.parametrize("case", CASES)
+def test_monophonic_stages_match_del_loops(case):
+    notes = random_notes(**case)
+    midi_data = pretty_midi.PrettyMIDI()
+    midi_data.instruments.append(pretty_midi.Instrument(program=25))
+    midi_data.instruments[0].notes = [copy.copy(note) for note in notes]
+
+    refine_guitar_midi(adjust_for_guitar_tuning(midi_data))
+
+    expected = reference_adjust_for_guitar_tuning(notes)
+    expected = reference_refine(reference_merge_same_pitch(sorted(expected, key=lambda n: n.start)))
+    assert_same_notes(midi_data.instruments[0].notes, expected)
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pretty_midi
+import pytest
+
+from note_array import NoteArray
+from onset_groups import select_lead_notes, select_melody_line
+
+def reference_select_melodic_note(notes, prev_pitch):
+    """97fb0dc 이전 select_melodic_note (midi_conversion_guitar_optimized)"""
+    sweet_spot = (48, 76)
+    scored_notes = []
+    for note in notes:
+        score = 0
+        if sweet_spot[0] <= note.pitch <= sweet_spot[1]:
+            score += 100
+        else:
+            distance = min(abs(note.pitch - sweet_spot[0]), abs(note.pitch - sweet_spot[1]))
+            score += max(0, 100 - distance * 2)
+        score += note.velocity * 0.8
+        duration = note.end - note.start
+        if 0.1 <= duration <= 3.0:
+            score += 50
+        elif duration > 3.0:
+            score -= 20
+        if prev_pitch is not None:
+            interval = abs(note.pitch - prev_pitch)
+            if interval <= 7:
+                score += 30
+            elif interval <= 12:
+                score += 10
+            else:
+                score -= (interval - 12) * 2
+        scored_notes.append((score, note))
+    scored_notes.sort(key=lambda x: x[0], reverse=True)
+    return scored_notes[0][1]
+
+def reference_melody_line(notes, time_resolution=0.02):
+    """97fb0dc 이전 convert_to_musical_monophonic의 dict 버킷 스캔"""
+    time_groups = {}
+    for note in notes:
+        time_key = round(note.start / time_resolution) * time_resolution
+        if time_key not in time_groups:
+            time_groups[time_key] = []
+        time_groups[time_key].append(note)
+
+    monophonic_notes = []
+    prev_pitch = None
+    for time_key in sorted(time_groups.keys()):
+        group_notes = time_groups[time_key]
+        if len(group_notes) == 1:
+            selected_note = group_notes[0]
+        else:
+            selected_note = reference_select_melodic_note(group_notes, prev_pitch)
+        monophonic_notes.append(selected_note)
+        prev_pitch = selected_note.pitch
+    return monophonic_notes
+
+def reference_lead_notes(notes, time_resolution=0.1):
+    """97fb0dc 이전 extract_lead_melody의 dict 버킷 선택 → (유지한 노트, 버킷 수)"""
+    time_groups = {}
+    for note in notes:
+        time_key = round(note.start / time_resolution) * time_resolution
+        if time_key not in time_groups:
+            time_groups[time_key] = []
+        time_groups[time_key].append(note)
+
+    kept = []
+    for time_key, group in sorted(time_groups.items()):
+        guitar_notes = [n for n in group if 35 <= n.pitch <= 95]
+        if not guitar_notes:
+            continue
+        if len(guitar_notes) >= 4:
+            kept.append(max(guitar_notes, key=lambda n: n.pitch))
+        else:
+            kept.extend(guitar_notes)
+    return kept, len(time_groups)
+
+def random_notes(count, seed, grid=None, pitches=None, velocities=None, durations=None):
+    """시작 시각을 grid 배수로 맞추면 버킷 경계(반올림 절반)와 동점이 많은 입력"""
+    rng = np.random.RandomState(seed)
+    start = rng.uniform(0, count * 0.03, count)
+    if grid is not None:
+        start = np.round(start / grid) * grid
+    pitch = rng.choice(pitches, count) if pitches is not None else rng.randint(25, 105, count)
+    velocity = rng.choice(velocities, count) if velocities is not None else rng.randint(1, 128, count)
+    duration = rng.choice(durations, count) if durations is not None else rng.uniform(0.02, 4.0, count)
+    return [pretty_midi.Note(velocity=int(v), pitch=int(p), start=float(s), end=float(s + d))
+            for v, p, s, d in zip(velocity, pitch, start, duration)]
+
+CASES = [
+    dict(count=2000, seed=0),
+    # 20ms 버킷의 절반(10ms) 격자, 같은 점수가 많은 입력
+    dict(count=2000, seed=1, grid=0.01, pitches=[40, 48, 55, 60, 67, 76, 90],
+         velocities=[50, 100], durations=[0.05, 0.5, 4.0]),
+    # 100ms 버킷의 절반(50ms) 격자, 한 버킷에 화음이 많은 입력
+    dict(count=2000, seed=2, grid=0.05, pitches=[30, 36, 48, 60, 60, 72, 95, 100],
+         velocities=[100], durations=[0.5]),
+    dict(count=1, seed=3),
+]
+
+def _indices(selected, notes):
+    position = {id(note): index for index, note in enumerate(notes)}
+    return [position[id(note)] for note in selected]
+
+@pytest.mark.parametrize("case", CASES)
+@pytest.mark.parametrize("time_resolution", [0.02, 0.1])
+def test_select_melody_line_matches_dict_buckets(case, time_resolution):
+    notes = random_notes(**case)
+    selected = select_melody_line(NoteArray.from_notes(notes), time_resolution)
+    assert selected.tolist() == _indices(reference_melody_line(notes, time_resolution), notes)
+
+@pytest.mark.parametrize("case", CASES)
+def test_select_lead_notes_matches_dict_buckets(case):
+    notes = random_notes(**case)
+    kept, groups = select_lead_notes(NoteArray.from_notes(notes), time_resolution=0.1,
+                                     min_pitch=35, max_pitch=95, max_chord=3)
+    expected, expected_groups = reference_lead_notes(notes)
+    assert kept.tolist() == _indices(expected, notes)
+    assert groups == expected_groups
+
+def test_empty_input():
+    assert select_melody_line(NoteArray()).tolist() == []
+    kept, groups = select_lead_notes(NoteArray())
+    assert kept.tolist() == [] and groups == 0
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+import torch
+
+from shared_weights import attach_shared, build_skeleton, load_shared_model
+
+def _loader():
+    torch.manual_seed(0)
+    model = torch.nn.Sequential(torch.nn.Linear(8, 16), torch.nn.BatchNorm1d(16), torch.nn.Linear(16, 8))
+    model[2].weight = torch.nn.Parameter(model[0].weight.detach().T.clone())
+    return model.eval()
+
+@pytest.fixture
+def shared_dir(tmp_path):
+    return str(tmp_path / "models")
+
+def test_attach_matches_loader(shared_dir):
+    shared = load_shared_model("toy", _loader, "v1", shared_dir)
+    reference = _loader()
+    x = torch.randn(4, 8)
+    with torch.no_grad():
+        torch.testing.assert_close(shared(x), reference(x))
+    assert sorted(os.listdir(shared_dir)) == ["toy.json", "toy.weights"]
+    assert os.stat(shared_dir).st_mode & 0o777 == 0o700
+
+    # 두 번째 프로세스 역할: 같은 파일에 연결 (pickle 없이 구조는 loader로 meta에서 다시 만듦)
+    attached = attach_shared("toy", _loader, "v1", shared_dir)
+    assert attached is not None
+    assert attached[0].weight.data_ptr() != reference[0].weight.data_ptr()
+    with torch.no_grad():
+        torch.testing.assert_close(attached(x), reference(x))
+
+def test_skeleton_has_no_storage():
+    skeleton = build_skeleton(_loader)
+    assert {p.device.type for p in skeleton.parameters()} == {"meta"}
+
+def test_version_mismatch_is_not_attached(shared_dir):
+    load_shared_model("toy", _loader, "v1", shared_dir)
+    assert attach_shared("toy", _loader, "v2", shared_dir) is None
+
+def test_unknown_version_is_not_shared(shared_dir):
+    model = load_shared_model("toy", _loader, None, shared_dir)
+    assert not os.path.exists(shared_dir)
+    assert model[0].weight.device.type == "cpu"
+
+def test_foreign_permissions_are_rejected(shared_dir):
+    os.makedirs(shared_dir)
+    os.chmod(shared_dir, 0o777)
+    model = load_shared_model("toy", _loader, "v1", shared_dir)
+    # 안전하지 않은 디렉터리에는 쓰지도 읽지도 않고 프로세스 전용 가중치 사용
+    assert os.listdir(shared_dir) == []
+    assert model[0].weight.requires_grad
+
+def test_attach_from_spec_does_not_run_loader(shared_dir):
+    def describe(model):
+        return {"hidden": model[0].out_features}
+
+    def skeleton(spec):
+        return torch.nn.Sequential(torch.nn.Linear(8, spec["hidden"]), torch.nn.BatchNorm1d(spec["hidden"]),
+                                   torch.nn.Linear(spec["hidden"], 8))
+
+    def failing_loader():
+        raise AssertionError("체크포인트 loader가 다시 실행됨")
+
+    load_shared_model("toy", _loader, "v1", shared_dir, describe=describe, skeleton=skeleton)
+    attached = attach_shared("toy", failing_loader, "v1", shared_dir, skeleton=skeleton)
+    reference = _loader()
+    x = torch.randn(4, 8)
+    with torch.no_grad():
+        torch.testing.assert_close(attached(x), reference(x))
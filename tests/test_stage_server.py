@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import threading
+
+from stage_server import LIGHT_STAGES, STAGES, StageServer
+
+def test_light_stage_not_blocked_by_heavy_stage():
+    server = StageServer(workers=1)
+    release = threading.Event()
+    server.functions = {
+        "separate_guitar_enhanced": lambda *args, **kwargs: release.wait(10),
+        "separate_guitar_fast": lambda *args, **kwargs: True,
+    }
+    server.models = {"demucs": None}
+
+    async def scenario():
+        heavy = asyncio.ensure_future(server.handle_request({"stage": "separate_guitar_enhanced"}))
+        await asyncio.sleep(0.05)
+        # 무거운 스테이지가 executor를 점유한 상태에서도 빠른 분리는 바로 끝남
+        light = await asyncio.wait_for(server.handle_request({"stage": "separate_guitar_fast"}), 2)
+        assert light["success"] and not heavy.done()
+        release.set()
+        assert (await heavy)["success"]
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        server.executor.shutdown()
+        server.light_executor.shutdown()
+
+def test_light_stages_use_no_model():
+    assert LIGHT_STAGES <= set(STAGES)
+    assert all(STAGES[stage][2] is None for stage in LIGHT_STAGES)
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pretty_midi
+import pytest
+import soundfile as sf
+
+pytest.importorskip("basic_pitch")
+
+import transcription
+from midi_conversion_tabify_compatible import (
+    convert_to_tabify_compatible_midi, convert_to_tabify_compatible_midi_stream,
+)
+from transcription import predict, stream_note_events
+
+SR = 22050
+
+def _plucks(duration, seed=0):
+    """감쇠하는 배음 톤을 무작위 음높이로 이어 친 신호"""
+    rng = np.random.default_rng(seed)
+    y = np.zeros(int(duration * SR))
+    t = 0.2
+    while t < duration - 1:
+        frequency = 440 * 2 ** ((int(rng.integers(45, 76)) - 69) / 12)
+        tt = np.arange(int(rng.uniform(0.3, 1.2) * SR)) / SR
+        tone = sum(np.sin(2 * np.pi * frequency * k * tt) / k for k in (1, 2, 3)) * np.exp(-3 * tt)
+        start = int(t * SR)
+        y[start:start + len(tt)] += 0.3 * tone[:len(y) - start]
+        t += rng.uniform(0.25, 0.6)
+    return y.astype(np.float32)
+
+@pytest.fixture(scope="module")
+def plucks_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("audio") / "plucks.wav")
+    sf.write(path, _plucks(45), SR)
+    return path
+
+def test_stream_note_events_match_batch(plucks_path):
+    _, _, batch = predict(plucks_path)
+    streamed = [event for events in stream_note_events(plucks_path, decode_seconds=5) for event in events]
+    assert abs(len(streamed) - len(batch)) <= max(2, len(batch) // 50)
+    batch_onsets = {(round(event[0], 1), int(event[2])) for event in batch}
+    matched = sum((round(event[0], 1), int(event[2])) in batch_onsets for event in streamed)
+    assert matched >= 0.95 * len(batch)
+
+def test_tabify_stream_matches_batch(plucks_path, tmp_path):
+    batch_path, stream_path = str(tmp_path / "batch.mid"), str(tmp_path / "stream.mid")
+    assert convert_to_tabify_compatible_midi(plucks_path, batch_path)
+    assert convert_to_tabify_compatible_midi_stream(plucks_path, stream_path)
+    batch = pretty_midi.PrettyMIDI(batch_path).instruments[0].notes
+    streamed = pretty_midi.PrettyMIDI(stream_path).instruments[0].notes
+    assert abs(len(streamed) - len(batch)) <= max(2, len(batch) // 50)
+
+def test_sustained_note_cannot_grow_buffer(tmp_path, monkeypatch):
+    path = str(tmp_path / "drone.wav")
+    t = np.arange(40 * SR) / SR
+    sf.write(path, (0.3 * np.sin(2 * np.pi * 196 * t)).astype(np.float32), SR)
+
+    decoded_frames = []
+    original = transcription.infer.output_to_notes_polyphonic
+    def recording(frames, *args, **kwargs):
+        decoded_frames.append(frames.shape[0])
+        return original(frames, *args, **kwargs)
+    monkeypatch.setattr(transcription.infer, "output_to_notes_polyphonic", recording)
+
+    list(stream_note_events(path, block_seconds=2, decode_seconds=2, max_buffer_seconds=1e9))
+    unbounded = max(decoded_frames)
+    decoded_frames.clear()
+    events = [event for chunk in stream_note_events(path, block_seconds=2, decode_seconds=2, max_buffer_seconds=10)
+              for event in chunk]
+
+    # 상한이 없으면 계속 울리는 노트가 경계를 붙잡아 곡 전체가 버퍼에 쌓임
+    assert unbounded >= 38 * transcription.ANNOTATIONS_FPS
+    # 상한(10초) + 추출 사이에 새로 들어온 활성화만큼만 남음
+    assert max(decoded_frames) <= 15 * transcription.ANNOTATIONS_FPS
+    assert events and all(event[2] == 55 for event in events)
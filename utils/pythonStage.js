@@ -0,0 +1,125 @@
+const net = require("net");
+const path = require("path");
+const { spawn } = require("child_process");
+const { EventEmitter } = require("events");
+
+// 스크립트 파일 → 스테이지 서버 엔트리포인트
+const SCRIPT_STAGES = {
+  "guitar_separation.py": "separate_guitar",
+  "guitar_separation_improved.py": "separate_guitar_enhanced",
+  "guitar_separation_fast.py": "separate_guitar_fast",
+  "midi_conversion.py": "audio_to_midi",
+  "midi_conversion_monophonic.py": "convert_to_monophonic_midi",
+  "midi_conversion_guitar_optimized.py": "convert_to_guitar_optimized_midi",
+  "midi_conversion_tabify_compatible.py": "convert_to_tabify_compatible_midi",
+  "midi_conversion_enhanced_musical.py": "convert_audio_to_midi_enhanced",
+  "midi_conversion_multi.py": "convert_audio_to_midi_variants",
+  "guitar_tab_generator.py": "generate_guitar_tab",
+  "tabify_converter.py": "convert_midi_to_tab_with_tabify",
+  "stem_format.py": "export_stem_wav",
+};
+
+// --stream 인자가 붙으면 스트리밍 엔트리포인트로 실행 (인자는 함수에 넘기지 않음)
+const STREAM_STAGES = {
+  convert_to_tabify_compatible_midi: "convert_to_tabify_compatible_midi_stream",
+};
+
+// PYTHON_STAGE_SOCKET이 설정된 경우에만 스테이지 서버 사용
+function getStageSocketPath() {
+  return process.env.PYTHON_STAGE_SOCKET || null;
+}
+
+// child_process.spawn과 같은 모양(stdout/stderr/close/error)의 이벤트 객체 생성
+function createProcessEmitter() {
+  const proc = new EventEmitter();
+  proc.stdout = new EventEmitter();
+  proc.stderr = new EventEmitter();
+  return proc;
+}
+
+// 실제 Python 프로세스를 띄우고 이벤트를 그대로 전달
+function spawnFallback(proc, pythonPath, args, options) {
+  const child = spawn(pythonPath, args, options);
+  child.stdout.on("data", (data) => proc.stdout.emit("data", data));
+  child.stderr.on("data", (data) => proc.stderr.emit("data", data));
+  child.on("close", (code) => proc.emit("close", code));
+  child.on("error", (error) => proc.emit("error", error));
+}
+
+/**
+ * Python 스크립트 실행 (스테이지 서버 우선, 없으면 spawn)
+ * args[0]은 스크립트 경로, 나머지는 스크립트 인자
+ */
+function spawnPythonStage(pythonPath, args, options = {}) {
+  const proc = createProcessEmitter();
+  const [scriptPath, ...scriptArgs] = args;
+  let stage = SCRIPT_STAGES[path.basename(scriptPath)];
+  let stageArgs = scriptArgs;
+  if (scriptArgs.includes("--stream") && STREAM_STAGES[stage]) {
+    stage = STREAM_STAGES[stage];
+    stageArgs = scriptArgs.filter((arg) => arg !== "--stream");
+  }
+  const socketPath = getStageSocketPath();
+
+  // 리스너가 붙은 뒤에 이벤트를 보내기 위해 다음 틱에서 실행
+  setImmediate(() => {
+    if (!socketPath || !stage) {
+      spawnFallback(proc, pythonPath, args, options);
+      return;
+    }
+
+    let connected = false;
+    let finished = false;
+    let buffer = "";
+    const socket = net.createConnection(socketPath);
+
+    socket.on("connect", () => {
+      connected = true;
+      socket.write(
+        JSON.stringify({ id: `${Date.now()}`, stage, args: stageArgs }) + "\n"
+      );
+    });
+
+    socket.on("data", (data) => {
+      buffer += data.toString();
+      const newline = buffer.indexOf("\n");
+      if (newline === -1) return;
+
+      const response = JSON.parse(buffer.slice(0, newline));
+      finished = true;
+      socket.end();
+
+      proc.stdout.emit(
+        "data",
+        Buffer.from(`⚡ 스테이지 서버 실행: ${stage} (${response.elapsed}초)\n`)
+      );
+      if (!response.success) {
+        proc.stderr.emit("data", Buffer.from(`${response.error}\n`));
+      }
+      proc.emit("close", response.success ? 0 : 1);
+    });
+
+    socket.on("error", (error) => {
+      if (!connected) {
+        // 서버가 떠 있지 않으면 기존 방식으로 실행
+        console.log(`⚠️ 스테이지 서버 연결 실패 (${error.code}), spawn으로 실행`);
+        spawnFallback(proc, pythonPath, args, options);
+        return;
+      }
+      finished = true;
+      proc.emit("error", error);
+    });
+
+    socket.on("close", () => {
+      // 응답 없이 연결이 끊기면 (서버 종료 등) 실패로 처리
+      if (connected && !finished) {
+        finished = true;
+        proc.emit("close", 1);
+      }
+    });
+  });
+
+  return proc;
+}
+
+module.exports = { spawnPythonStage, SCRIPT_STAGES };